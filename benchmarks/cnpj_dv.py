@@ -0,0 +1,106 @@
+# License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
+
+"""Microbenchmark do cálculo de DV / validação de CNPJ.
+
+Compara o motor de DV baseado em tabelas pré-calculadas
+(``cnpj_cpf._calcular_dv_cnpj`` / ``cnpj_cpf.validar_cnpj``) com a
+implementação anterior (``enumerate`` + ``_char_value`` + regex), copiada
+abaixo como referência, para CNPJs numéricos e alfanuméricos.
+
+Uso::
+
+    python benchmarks/cnpj_dv.py [--numero 200000]
+"""
+
+import argparse
+import random
+import re
+import timeit
+
+from erpbrasil.base.fiscal import cnpj_cpf
+
+# ---------------------------------------------------------------------------
+# Implementação de referência (antes das tabelas de DV)
+# ---------------------------------------------------------------------------
+
+_RE_CNPJ_ALFA = re.compile(r"^[A-Z0-9]{12}[0-9]{2}$")
+_PESOS_DV = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+
+
+def calcular_dv_referencia(cnpj12):
+    soma_dv1 = sum((ord(c) - 48) * _PESOS_DV[i + 1] for i, c in enumerate(cnpj12))
+    dv1 = 0 if soma_dv1 % 11 < 2 else 11 - (soma_dv1 % 11)
+    soma_dv2 = sum((ord(c) - 48) * _PESOS_DV[i] for i, c in enumerate(cnpj12))
+    soma_dv2 += dv1 * _PESOS_DV[12]
+    dv2 = 0 if soma_dv2 % 11 < 2 else 11 - (soma_dv2 % 11)
+    return "{:d}{:d}".format(dv1, dv2)
+
+
+def validar_referencia(cnpj):
+    if not cnpj:
+        return False
+    cnpj = cnpj_cpf._normalizar_cnpj(cnpj)
+    if len(cnpj) != 14 or cnpj == "00000000000000":
+        return False
+    if not _RE_CNPJ_ALFA.match(cnpj):
+        return False
+    if cnpj_cpf._LETRAS_PROIBIDAS & set(cnpj[:12]):
+        return False
+    return cnpj[12:] == calcular_dv_referencia(cnpj[:12])
+
+
+# ---------------------------------------------------------------------------
+# Benchmark
+# ---------------------------------------------------------------------------
+
+
+def gerar_amostra(alfabeto, numero, seed=1):
+    rnd = random.Random(seed)
+    amostra = []
+    for _ in range(numero):
+        base = "".join(rnd.choice(alfabeto) for _ in range(12))
+        amostra.append(base + calcular_dv_referencia(base))
+    return amostra
+
+
+def medir(funcao, amostra, repeticoes=5):
+    tempo = min(
+        timeit.repeat(lambda: list(map(funcao, amostra)), number=1, repeat=repeticoes)
+    )
+    return tempo / len(amostra) * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--numero", type=int, default=200000)
+    args = parser.parse_args()
+
+    amostras = {
+        "numerico": gerar_amostra("0123456789", args.numero),
+        "alfanumerico": gerar_amostra(cnpj_cpf._CARACTERES_CNPJ, args.numero),
+    }
+    casos = [
+        ("dv", calcular_dv_referencia, cnpj_cpf._calcular_dv_cnpj, lambda c: c[:12]),
+        ("validar", validar_referencia, cnpj_cpf.validar_cnpj, lambda c: c),
+    ]
+
+    print(
+        "{:<10} {:<13} {:>12} {:>12} {:>8}".format(
+            "operacao", "amostra", "antes ns/op", "depois ns/op", "ganho"
+        )
+    )
+    for nome, referencia, atual, preparar in casos:
+        for tipo, amostra in amostras.items():
+            entradas = [preparar(c) for c in amostra]
+            assert list(map(referencia, entradas)) == list(map(atual, entradas))
+            antes = medir(referencia, entradas)
+            depois = medir(atual, entradas)
+            print(
+                "{:<10} {:<13} {:>12.0f} {:>12.0f} {:>7.1f}x".format(
+                    nome, tipo, antes, depois, antes / depois
+                )
+            )
+
+
+if __name__ == "__main__":
+    main()
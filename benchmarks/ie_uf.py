@@ -0,0 +1,261 @@
+# License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
+
+"""Benchmark por UF de ``ie.validar`` e ``ie.formata``.
+
+Para cada UF monta um corpus determinístico com as inscrições de
+``tests/test_fiscal_ie_validar.py``, inscrições válidas de ``ie.gerar``,
+as mesmas com um dígito trocado (inválidas) e parte delas com máscara.
+Mede ns/op e o pico de memória alocada por chamada (``tracemalloc``) e
+calcula um hash dos resultados, para conferir que uma otimização mantém
+os resultados idênticos.
+
+Uso::
+
+    python benchmarks/ie_uf.py [--numero 500] [--comparar]
+    python benchmarks/ie_uf.py --salvar --referencia /caminho/do/checkout
+
+``--salvar`` grava em ``benchmarks/ie_baseline.json`` os hashes do corpus e
+dos resultados. Com ``--referencia`` os resultados são calculados pelo
+``ie.py`` de outro checkout do repositório (a implementação original),
+executado em um subprocesso; o corpus continua sendo montado por esta
+árvore. ``--comparar`` termina com erro apenas se algum hash divergir. Os
+tempos e a memória dependem da máquina: são exibidos, mas não são gravados
+nem comparados.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+sys.path.insert(0, os.path.join(RAIZ, "src"))
+
+from erpbrasil.base.fiscal import ie  # noqa: E402
+from tests.test_fiscal_ie_validar import ie_invalidas  # noqa: E402
+from tests.test_fiscal_ie_validar import ie_validas  # noqa: E402
+
+BASELINE = os.path.join(RAIZ, "benchmarks", "ie_baseline.json")
+
+
+# ---------------------------------------------------------------------------
+# Corpus
+# ---------------------------------------------------------------------------
+
+
+def trocar_digito(inscr_est):
+    """Soma 1 ao último dígito, simulando um erro de digitação."""
+    ultimo = inscr_est[-1]
+    return inscr_est[:-1] + str((int(ultimo) + 1) % 10)
+
+
+def montar_corpus(uf, numero):
+    validas = list(ie.gerar(uf, numero, seed=uf))
+    corpus = list(ie_validas.get(uf, [])) + list(ie_invalidas.get(uf, []))
+    corpus += validas
+    corpus += [trocar_digito(i) for i in validas]
+    corpus += [ie.formata(uf, i) for i in validas[::4]]
+    return corpus
+
+
+def digest(valores):
+    return hashlib.sha256(repr(valores).encode("utf-8")).hexdigest()
+
+
+# Executado com o ``src`` da referência no PYTHONPATH; recebe os corpora em
+# JSON e devolve os resultados com o mesmo cálculo de digest()
+_RESULTADOS_REFERENCIA = """
+import hashlib, json, sys
+from erpbrasil.base.fiscal import ie
+
+def digest(valores):
+    return hashlib.sha256(repr(valores).encode("utf-8")).hexdigest()
+
+resultados = {}
+for uf, corpus in json.load(sys.stdin).items():
+    validacoes = [ie.validar(uf, i) for i in corpus]
+    resultados[uf] = {
+        "validas": sum(validacoes),
+        "digest_validar": digest(validacoes),
+        "digest_formata": digest([ie.formata(uf, i) for i in corpus]),
+    }
+json.dump(resultados, sys.stdout)
+"""
+
+
+def resultados_referencia(referencia, corpora):
+    """Calcula ``validas`` e os digests de ``validar``/``formata`` com o
+    ``ie.py`` do checkout ``referencia``."""
+    saida = subprocess.run(
+        [sys.executable, "-c", _RESULTADOS_REFERENCIA],
+        input=json.dumps(corpora),
+        env=dict(os.environ, PYTHONPATH=os.path.join(referencia, "src")),
+        cwd=referencia,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(saida.stdout)
+
+
+# ---------------------------------------------------------------------------
+# Medição
+# ---------------------------------------------------------------------------
+
+
+def medir_tempo(funcao, uf, corpus, repeticoes=5):
+    tempo = min(
+        timeit.repeat(
+            lambda: [funcao(uf, i) for i in corpus], number=1, repeat=repeticoes
+        )
+    )
+    return tempo / len(corpus) * 1e9
+
+
+def medir_memoria(funcao, uf, corpus):
+    """Pico médio de memória alocada (bytes) durante uma chamada."""
+    tracemalloc.start()
+    total = 0
+    try:
+        for inscr_est in corpus:
+            tracemalloc.reset_peak()
+            atual = tracemalloc.get_traced_memory()[0]
+            funcao(uf, inscr_est)
+            total += tracemalloc.get_traced_memory()[1] - atual
+    finally:
+        tracemalloc.stop()
+    return total / len(corpus)
+
+
+def medir_uf(uf, corpus):
+    validacoes = [ie.validar(uf, i) for i in corpus]
+    formatacoes = [ie.formata(uf, i) for i in corpus]
+    return {
+        "corpus": len(corpus),
+        "validas": sum(validacoes),
+        "digest_corpus": digest(corpus),
+        "digest_validar": digest(validacoes),
+        "digest_formata": digest(formatacoes),
+        "validar_ns": medir_tempo(ie.validar, uf, corpus),
+        "formata_ns": medir_tempo(ie.formata, uf, corpus),
+        "validar_bytes": medir_memoria(ie.validar, uf, corpus),
+        "formata_bytes": medir_memoria(ie.formata, uf, corpus),
+    }
+
+
+def conferir_vetores():
+    """Confere os vetores de teste; retorna a lista de divergências."""
+    erros = []
+    for uf, inscricoes in ie_validas.items():
+        erros += [(uf, i) for i in inscricoes if not ie.validar(uf, i)]
+    for uf, inscricoes in ie_invalidas.items():
+        erros += [(uf, i) for i in inscricoes if ie.validar(uf, i)]
+    return erros
+
+
+# ---------------------------------------------------------------------------
+# Relatório
+# ---------------------------------------------------------------------------
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--numero", type=int, default=500)
+    grupo = parser.add_mutually_exclusive_group()
+    grupo.add_argument("--salvar", action="store_true")
+    grupo.add_argument("--comparar", action="store_true")
+    parser.add_argument(
+        "--referencia",
+        help="checkout cuja implementação gera os digests gravados por --salvar",
+    )
+    args = parser.parse_args()
+    if args.referencia and not args.salvar:
+        parser.error("--referencia só pode ser usada com --salvar")
+
+    erros = conferir_vetores()
+    for uf, inscr_est in erros:
+        print("Vetor de teste divergente: {} {}".format(uf, inscr_est))
+
+    corpora = {uf: montar_corpus(uf, args.numero) for uf in sorted(ie._VALIDADORES)}
+    resultados = {uf: medir_uf(uf, corpus) for uf, corpus in corpora.items()}
+
+    base = {}
+    if args.comparar:
+        with open(BASELINE) as arquivo:
+            base = json.load(arquivo)["ufs"]
+    elif args.referencia:
+        referencia = resultados_referencia(args.referencia, corpora)
+        base = {
+            uf: dict(referencia[uf], digest_corpus=r["digest_corpus"])
+            for uf, r in resultados.items()
+        }
+
+    print(
+        "{:<4} {:>7} {:>12} {:>12} {:>10} {:>10}  {}".format(
+            "uf",
+            "corpus",
+            "validar ns",
+            "formata ns",
+            "val bytes",
+            "fmt bytes",
+            "comparação" if base else "",
+        )
+    )
+    for uf, r in resultados.items():
+        comparacao = ""
+        anterior = base.get(uf)
+        if anterior:
+            if anterior["digest_corpus"] != r["digest_corpus"]:
+                comparacao = "CORPUS ALTERADO"
+                erros.append(uf)
+            elif (anterior["digest_validar"], anterior["digest_formata"]) != (
+                r["digest_validar"],
+                r["digest_formata"],
+            ):
+                comparacao = "RESULTADOS DIVERGENTES"
+                erros.append(uf)
+            else:
+                comparacao = "ok"
+        print(
+            "{:<4} {:>7} {:>12.0f} {:>12.0f} {:>10.0f} {:>10.0f}  {}".format(
+                uf,
+                r["corpus"],
+                r["validar_ns"],
+                r["formata_ns"],
+                r["validar_bytes"],
+                r["formata_bytes"],
+                comparacao,
+            )
+        )
+
+    if args.salvar:
+        fonte = base or resultados
+        ufs = {
+            uf: {
+                "corpus": r["corpus"],
+                "digest_corpus": r["digest_corpus"],
+                "validas": fonte[uf]["validas"],
+                "digest_validar": fonte[uf]["digest_validar"],
+                "digest_formata": fonte[uf]["digest_formata"],
+            }
+            for uf, r in resultados.items()
+        }
+        with open(BASELINE, "w") as arquivo:
+            json.dump(
+                {"numero": args.numero, "ufs": ufs},
+                arquivo,
+                indent=2,
+                sort_keys=True,
+            )
+            arquivo.write("\n")
+
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
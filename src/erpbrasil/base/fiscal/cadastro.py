@@ -0,0 +1,227 @@
+# Copyright (C) 2026  Luis Felipe Mileo - KMEE
+# License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
+
+"""Validação conjunta dos dados fiscais de um cadastro (participante).
+
+Cada campo é normalizado uma única vez e validado, e os campos são
+conferidos entre si: o código IBGE do município precisa pertencer à UF e a
+inscrição estadual é validada com a regra dessa UF.
+"""
+
+from collections import namedtuple
+
+from . import cnpj_cpf as _cnpj_cpf
+from . import codigo_municipio as _codigo_municipio
+from . import edoc as _edoc
+from . import ie as _ie
+
+ISENTO = "ISENTO"
+
+# UF usada para participantes no exterior (município 9999999)
+UF_EXTERIOR = "ex"
+MUNICIPIO_EXTERIOR = "9999999"
+
+# Sigla (minúscula) -> código IBGE da UF: os códigos de
+# codigo_municipio.CODIGOS_DE_ESTADO com as siglas de edoc.ESTADOS_IBGE
+CODIGOS_UF = {
+    _edoc.ESTADOS_IBGE[int(codigo)][0].lower(): codigo
+    for codigo in _codigo_municipio.CODIGOS_DE_ESTADO
+}
+
+ResultadoCampo = namedtuple("ResultadoCampo", ["valor", "valido", "erro"])
+ResultadoCampo.__doc__ = """Resultado da validação de um campo.
+
+``valor`` é o valor normalizado; ``valido`` é ``None`` quando o campo não
+foi informado; ``erro`` descreve o problema encontrado, se houver.
+"""
+
+
+class ResultadoRegistro(
+    namedtuple("ResultadoRegistro", ["cnpj_cpf", "inscr_est", "uf", "municipio"])
+):
+    """Resultado da validação de um registro, com um
+    :class:`ResultadoCampo` por campo."""
+
+    __slots__ = ()
+
+    @property
+    def valido(self):
+        """``True`` se nenhum campo informado é inválido."""
+        return all(campo.valido is not False for campo in self)
+
+    @property
+    def erros(self):
+        """Mensagens de erro por campo."""
+        return {
+            campo: resultado.erro
+            for campo, resultado in zip(self._fields, self)
+            if resultado.erro is not None
+        }
+
+
+_NAO_INFORMADO = ResultadoCampo(None, None, None)
+
+
+def _texto(valor):
+    """Converte o campo em texto sem espaços nas pontas; ``None`` quando o
+    campo não foi informado. Valores não textuais (ex.: ``int`` vindo de
+    um banco de dados) são convertidos com ``str``."""
+    if valor is None:
+        return None
+    if isinstance(valor, (bytes, bytearray, memoryview)):
+        valor = bytes(valor).decode("ascii", "replace")
+    elif not isinstance(valor, str):
+        valor = str(valor)
+    return valor.strip() or None
+
+
+def _resultado_cnpj_cpf(valor):
+    valor = _texto(valor)
+    if valor is None:
+        return _NAO_INFORMADO
+    documento = _cnpj_cpf.classificar(valor)
+    # Documentos classificados são ASCII, sem máscara e em maiúsculas, o
+    # formato que validar_campo espera
+    if documento.tipo is not None and _cnpj_cpf.validar_campo(
+        documento.valor.encode("ascii"), 0, len(documento.valor), documento.tipo
+    ):
+        return ResultadoCampo(documento.valor, True, None)
+    return ResultadoCampo(documento.valor, False, "CNPJ/CPF inválido")
+
+
+def _resultado_uf(valor):
+    valor = _texto(valor)
+    if valor is None:
+        return _NAO_INFORMADO
+    uf = valor.lower()
+    if uf in CODIGOS_UF or uf == UF_EXTERIOR:
+        return ResultadoCampo(uf, True, None)
+    return ResultadoCampo(uf, False, "UF inválida")
+
+
+def _resultado_municipio(valor, uf):
+    valor = _texto(valor)
+    if valor is None:
+        return _NAO_INFORMADO
+    codigo = _codigo_municipio.formatar_codigo_municipio(valor)
+    if not _codigo_municipio.validar_codigo_municipio(codigo):
+        return ResultadoCampo(codigo, False, "Código de município inválido")
+
+    if uf.valido:
+        if codigo == MUNICIPIO_EXTERIOR:
+            pertence = uf.valor == UF_EXTERIOR
+        else:
+            pertence = CODIGOS_UF.get(uf.valor) == codigo[:2]
+        if not pertence:
+            return ResultadoCampo(
+                codigo,
+                False,
+                "Município {} não pertence à UF {}".format(codigo, uf.valor.upper()),
+            )
+    return ResultadoCampo(codigo, True, None)
+
+
+def _preparar_inscr_est(valor, uf):
+    """Resolve a IE sem calcular o DV.
+
+    Retorna ``(resultado, None)`` quando a validação já está decidida ou
+    ``(None, (uf, inscr_est))`` com o par que ainda precisa ser validado,
+    como informado: a máscara é removida apenas no resultado.
+    """
+    inscr_est = _texto(valor)
+    if inscr_est is None:
+        return _NAO_INFORMADO, None
+    if inscr_est.upper() == ISENTO:
+        return ResultadoCampo(ISENTO, True, None), None
+    if uf.valido is None:
+        return ResultadoCampo(inscr_est, False, "UF não informada"), None
+    if not uf.valido:
+        return ResultadoCampo(inscr_est, False, "UF inválida"), None
+    if uf.valor == UF_EXTERIOR:
+        return (
+            ResultadoCampo(inscr_est, False, "Participante do exterior sem IE"),
+            None,
+        )
+    return None, (uf.valor, inscr_est)
+
+
+def _validar_registros(registros, validar_ies):
+    parciais = []
+    pares = []
+    for registro in registros:
+        uf = _resultado_uf(registro.get("uf"))
+        inscr_est, par = _preparar_inscr_est(registro.get("inscr_est"), uf)
+        if par is not None:
+            pares.append(par)
+        parciais.append(
+            (
+                _resultado_cnpj_cpf(registro.get("cnpj_cpf")),
+                inscr_est,
+                uf,
+                _resultado_municipio(registro.get("municipio"), uf),
+            )
+        )
+
+    validas = iter(validar_ies(pares))
+    pares = iter(pares)
+    resultados = []
+    for documento, inscr_est, uf, municipio in parciais:
+        if inscr_est is None:
+            sigla, valor = next(pares)
+            valor = _ie.desformata(sigla, valor)
+            if next(validas):
+                inscr_est = ResultadoCampo(valor, True, None)
+            else:
+                erro = "Inscrição estadual inválida para a UF {}".format(sigla.upper())
+                inscr_est = ResultadoCampo(valor, False, erro)
+        resultados.append(ResultadoRegistro(documento, inscr_est, uf, municipio))
+    return resultados
+
+
+def validar_registro(cnpj_cpf=None, inscr_est=None, uf=None, municipio=None):
+    """Valida os dados fiscais de um cadastro.
+
+    Campos não informados (``None`` ou vazios) não são validados. A IE
+    ``ISENTO`` é aceita; qualquer outra IE exige uma UF válida, é validada
+    como informada por :func:`erpbrasil.base.fiscal.ie.validar` e devolvida
+    sem máscara. O município (código IBGE) precisa pertencer à UF; o código
+    ``9999999`` corresponde à UF ``EX`` (exterior). Valores que não são
+    texto (ex.: ``int``) são convertidos com ``str``.
+
+    Args:
+        cnpj_cpf (str | int): CNPJ ou CPF, com ou sem máscara.
+        inscr_est (str | int): Inscrição estadual ou ``ISENTO``.
+        uf (str): Sigla da UF.
+        municipio (str | int): Código IBGE do município.
+
+    Returns:
+        ResultadoRegistro: Resultado de cada campo e as propriedades
+            ``valido`` e ``erros``.
+    """
+    registro = {
+        "cnpj_cpf": cnpj_cpf,
+        "inscr_est": inscr_est,
+        "uf": uf,
+        "municipio": municipio,
+    }
+    return _validar_registros(
+        [registro], lambda pares: [_ie.validar(*par) for par in pares]
+    )[0]
+
+
+def validar_registros(registros):
+    """Valida uma tabela de cadastros.
+
+    As inscrições estaduais de todos os registros são validadas de uma vez
+    por :func:`erpbrasil.base.fiscal.ie.validar_lote`.
+
+    Args:
+        registros: Iterável de mapeamentos com as chaves ``cnpj_cpf``,
+            ``inscr_est``, ``uf`` e ``municipio`` (chaves ausentes equivalem
+            a campos não informados).
+
+    Returns:
+        list: Um :class:`ResultadoRegistro` por registro, na ordem de
+            entrada.
+    """
+    return _validar_registros(registros, _ie.validar_lote)
@@ -19,7 +19,15 @@ Letras proibidas (solicitação ENCAT à RFB, pendente confirmação):
     I, O, U, Q, F
 """
 
-import re
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import namedtuple
+from functools import total_ordering
+
+from ..misc import LRUCache
+from ..misc import importar_numpy
+from ..misc import permutacao
 
 # ---------------------------------------------------------------------------
 # Constantes
@@ -28,21 +36,56 @@ import re
 # Letras proibidas no CNPJ Alfa (conforme solicitação ENCAT/RFB — NT 2025.001)
 _LETRAS_PROIBIDAS = frozenset("IOUQF")
 
-# Regex: primeiras 12 posições alfanuméricas + 2 dígitos verificadores
-_RE_CNPJ_ALFA = re.compile(r"^[A-Z0-9]{12}[0-9]{2}$")
-
-# Regex para remover máscara (pontos, barra, hífen)
-_RE_MASCARA = re.compile(r"[./-]")
-
 # Pesos para cálculo do DV do CNPJ (posições 1-13)
 # DV1 usa pesosDV[1:13], DV2 usa pesosDV[0:13]
 _PESOS_DV = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
 
+# Caracteres aceitos nas 12 primeiras posições (raiz + ordem) do CNPJ
+_CARACTERES_CNPJ = "".join(
+    c for c in "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ" if c not in _LETRAS_PROIBIDAS
+)
+
+# Sentinela das tabelas de DV para caracteres não permitidos: qualquer soma
+# que a inclua fica negativa, o que rejeita o CNPJ na mesma passada.
+_INVALIDO = -(1 << 20)
+
+# DV correspondente a cada resto da divisão por 11
+_DV_POR_RESTO = tuple(0 if r < 2 else 11 - r for r in range(11))
+
+_DIGITOS = "0123456789"
+
+# Valor de cada dígito, indexado tanto pelo caractere quanto pelo byte, o que
+# permite comparar DVs de ``str`` e de ``bytes``/``memoryview`` da mesma forma
+_VALOR_DIGITO = {c: int(c) for c in _DIGITOS}
+_VALOR_DIGITO.update({ord(c): int(c) for c in _DIGITOS})
+
+# Bytes removidos por _somente_digitos() em entradas bytes-like
+_NAO_DIGITOS_BYTES = bytes(b for b in range(256) if not 48 <= b <= 57)
+
+# Entradas tratadas como ASCII, sem decodificação
+_TIPOS_BYTES = (bytes, bytearray, memoryview)
+
+# Tipos de documento identificados por classificar()
+CPF = "cpf"
+CNPJ = "cnpj"
+CNPJ_ALFA = "cnpj_alfa"
+
+DocumentoNormalizado = namedtuple("DocumentoNormalizado", ["tipo", "valor"])
+DocumentoNormalizado.__doc__ = """Resultado de :func:`classificar`.
+
+``tipo`` é ``CPF``, ``CNPJ``, ``CNPJ_ALFA`` ou ``None`` (não reconhecido) e
+``valor`` é o documento sem máscara (CNPJ em maiúsculas, CPF só dígitos).
+"""
+
+# Tamanho (em caracteres) dos itens aceitos diretamente pelo caminho vetorizado
+_TAM_CNPJ = 14
+
 
 # ---------------------------------------------------------------------------
 # Funções internas
 # ---------------------------------------------------------------------------
 
+
 def _char_value(c):
     """Retorna o valor numérico de um caractere para cálculo de DV.
 
@@ -59,12 +102,58 @@ def _char_value(c):
     return ord(c) - 48
 
 
+def _montar_tabela_dv(pesos, caracteres=_CARACTERES_CNPJ):
+    """Pré-calcula, para cada posição, a contribuição ``valor * peso`` de
+    cada caractere permitido na soma do DV.
+
+    Cada tabela é indexada pelo caractere (``"A"``) e pelo valor do byte
+    (``65``), de modo que ``str``, ``bytes`` e ``memoryview`` são
+    percorridos com as mesmas tabelas, sem decodificação.
+    """
+    tabelas = []
+    for peso in pesos:
+        tabela = {c: _char_value(c) * peso for c in caracteres}
+        tabela.update({ord(c): valor for c, valor in tabela.items()})
+        tabelas.append(tabela)
+    return tuple(tabelas)
+
+
+# Contribuição de cada caractere, por posição, para as somas do DV1 e do DV2
+_TABELA_DV1 = _montar_tabela_dv(_PESOS_DV[1:13])
+_TABELA_DV2 = _montar_tabela_dv(_PESOS_DV[0:12])
+_SENTINELAS = (_INVALIDO,) * 12
+
+# Idem para o CPF: pesos 10..2 (DV1) e 11..3 (DV2) sobre os 9 primeiros dígitos
+_TABELA_CPF_DV1 = _montar_tabela_dv(range(10, 1, -1), _DIGITOS)
+_TABELA_CPF_DV2 = _montar_tabela_dv(range(11, 2, -1), _DIGITOS)
+
+
+def _somas_dv_cnpj(cnpj):
+    """Calcula as somas ponderadas do DV1 e do DV2 (sem o termo do DV1).
+
+    Usa apenas as 12 primeiras posições de ``cnpj``; caracteres fora de
+    ``_CARACTERES_CNPJ`` resultam em somas negativas.
+
+    Args:
+        cnpj (str | bytes | memoryview): CNPJ sem máscara, em maiúsculas
+            (12 ou 14 posições).
+
+    Returns:
+        tuple: ``(soma_dv1, soma_dv2)``.
+    """
+    return (
+        sum(map(dict.get, _TABELA_DV1, cnpj, _SENTINELAS)),
+        sum(map(dict.get, _TABELA_DV2, cnpj, _SENTINELAS)),
+    )
+
+
 def _calcular_dv_cnpj(cnpj12):
     """Calcula os dois dígitos verificadores de um CNPJ (sem os DVs).
 
     Suporta CNPJ puramente numérico e CNPJ alfanumérico.  O algoritmo é
     idêntico — a diferença está no valor atribuído a cada caractere
-    (``ord(c) - 48`` em vez de ``int(c)`` direto).
+    (``ord(c) - 48`` em vez de ``int(c)`` direto).  As contribuições de
+    cada posição vêm das tabelas ``_TABELA_DV1``/``_TABELA_DV2``.
 
     Args:
         cnpj12 (str): 12 primeiros caracteres do CNPJ (sem DVs),
@@ -78,26 +167,67 @@ def _calcular_dv_cnpj(cnpj12):
             contiver caracteres não permitidos.
     """
     if len(cnpj12) != 12:
-        raise ValueError(
-            "cnpj12 deve ter 12 caracteres, recebido: {!r}".format(cnpj12)
-        )
+        raise ValueError("cnpj12 deve ter 12 caracteres, recebido: {!r}".format(cnpj12))
 
-    soma_dv1 = sum(
-        _char_value(c) * _PESOS_DV[i + 1]
-        for i, c in enumerate(cnpj12)
-    )
-    dv1 = 0 if soma_dv1 % 11 < 2 else 11 - (soma_dv1 % 11)
+    soma_dv1, soma_dv2 = _somas_dv_cnpj(cnpj12)
+    if soma_dv1 < 0:
+        raise ValueError("cnpj12 contém caracteres não permitidos: {!r}".format(cnpj12))
 
-    soma_dv2 = sum(
-        _char_value(c) * _PESOS_DV[i]
-        for i, c in enumerate(cnpj12)
-    )
-    soma_dv2 += dv1 * _PESOS_DV[12]
-    dv2 = 0 if soma_dv2 % 11 < 2 else 11 - (soma_dv2 % 11)
+    dv1 = _DV_POR_RESTO[soma_dv1 % 11]
+    dv2 = _DV_POR_RESTO[(soma_dv2 + dv1 * _PESOS_DV[12]) % 11]
 
     return "{:d}{:d}".format(dv1, dv2)
 
 
+def _dvs_cpf(cpf):
+    """Calcula os DVs (inteiros) das 9 primeiras posições de um CPF.
+
+    Returns:
+        tuple | None: ``(dv1, dv2)``, ou ``None`` se houver algum caractere
+            que não seja dígito nas 9 primeiras posições.
+    """
+    soma_dv1 = sum(map(dict.get, _TABELA_CPF_DV1, cpf, _SENTINELAS))
+    if soma_dv1 < 0:
+        return None
+    dv1 = _DV_POR_RESTO[soma_dv1 % 11]
+    soma_dv2 = sum(map(dict.get, _TABELA_CPF_DV2, cpf, _SENTINELAS)) + dv1 * 2
+    return dv1, _DV_POR_RESTO[soma_dv2 % 11]
+
+
+def _calcular_dv_cpf(cpf9):
+    """Calcula os dois dígitos verificadores de um CPF.
+
+    Args:
+        cpf9 (str): 9 primeiros dígitos do CPF (ou o CPF completo; apenas as
+            9 primeiras posições são consideradas).
+
+    Returns:
+        str: Os dois dígitos verificadores, ou ``""`` se houver algum
+            caractere que não seja dígito nas 9 primeiras posições.
+    """
+    dvs = _dvs_cpf(cpf9)
+    if dvs is None:
+        return ""
+    return _DIGITOS[dvs[0]] + _DIGITOS[dvs[1]]
+
+
+def _erro_tipo(valor):
+    return TypeError(
+        "CNPJ/CPF deve ser str, bytes, bytearray ou memoryview, não {}".format(
+            type(valor).__name__
+        )
+    )
+
+
+def _texto(valor):
+    """Converte entradas bytes-like em ``str`` (ASCII) para formatação."""
+    if isinstance(valor, _TIPOS_BYTES):
+        return bytes(valor).decode("ascii", "replace")
+    if not isinstance(valor, str):
+        raise _erro_tipo(valor)
+    return valor
+
+
 def _normalizar_cnpj(cnpj):
     """Remove máscara e converte para maiúsculas.
 
@@ -105,20 +235,164 @@ def _normalizar_cnpj(cnpj):
     Para CNPJs alfanuméricos remove apenas '.', '/' e '-'.
 
     Args:
-        cnpj (str): CNPJ com ou sem máscara.
+        cnpj (str | bytes | bytearray | memoryview): CNPJ com ou sem máscara.
 
     Returns:
-        str: CNPJ sem máscara, em maiúsculas.
+        str | bytes: CNPJ sem máscara, em maiúsculas.
     """
+    if isinstance(cnpj, _TIPOS_BYTES):
+        cnpj = bytes(cnpj).strip().upper()
+        return cnpj.replace(b".", b"").replace(b"/", b"").replace(b"-", b"")
+    if not isinstance(cnpj, str):
+        raise _erro_tipo(cnpj)
+
+    # str.replace encadeado é mais rápido que regex/translate para
+    # textos curtos como um CNPJ
     cnpj = cnpj.strip().upper()
-    cnpj = _RE_MASCARA.sub("", cnpj)
-    return cnpj
+    return cnpj.replace(".", "").replace("/", "").replace("-", "")
+
+
+def _somente_digitos(valor):
+    """Mantém apenas os dígitos ASCII de ``valor`` (sem regex).
+
+    Args:
+        valor (str | bytes | bytearray | memoryview): Texto com ou sem
+            pontuação.
+
+    Returns:
+        str | bytes: Somente os caracteres ``0-9`` de ``valor``.
+    """
+    if isinstance(valor, _TIPOS_BYTES):
+        return bytes(valor).translate(None, _NAO_DIGITOS_BYTES)
+    if not isinstance(valor, str):
+        raise _erro_tipo(valor)
+    if valor.isdigit() and valor.isascii():
+        return valor
+    return "".join(filter(_DIGITOS.__contains__, valor))
+
+
+def _validar_cnpj_normalizado(cnpj):
+    """Valida um CNPJ de 14 posições já sem máscara e em maiúsculas.
+
+    Aceita ``str``, ``bytes`` ou ``memoryview``: a aritmética é feita sobre
+    os valores ASCII-48 via tabelas, sem decodificar bytes.
+    """
+    # Uma única passada pelas tabelas de DV: letras proibidas e caracteres
+    # inválidos nas 12 primeiras posições tornam a soma negativa. Como todo
+    # caractere diferente de "0" contribui positivamente, soma zero só ocorre
+    # no CNPJ zerado, que é inválido.
+    soma_dv1, soma_dv2 = _somas_dv_cnpj(cnpj)
+    if soma_dv1 <= 0:
+        return False
+
+    dv1 = _DV_POR_RESTO[soma_dv1 % 11]
+    if _VALOR_DIGITO.get(cnpj[12]) != dv1:
+        return False
+    dv2 = _DV_POR_RESTO[(soma_dv2 + dv1 * _PESOS_DV[12]) % 11]
+    return _VALOR_DIGITO.get(cnpj[13]) == dv2
+
+
+def _validar_cpf_normalizado(cpf):
+    """Valida um CPF contendo apenas dígitos (``str``, ``bytes`` ou
+    ``memoryview``)."""
+    # min == max: todos os dígitos iguais
+    if len(cpf) != 11 or min(cpf) == max(cpf):
+        return False
+
+    dvs = _dvs_cpf(cpf)
+    return (
+        dvs is not None
+        and _VALOR_DIGITO.get(cpf[9]) == dvs[0]
+        and _VALOR_DIGITO.get(cpf[10]) == dvs[1]
+    )
+
+
+def _validar_documento(documento):
+    """Valida um :class:`DocumentoNormalizado` conforme o seu tipo."""
+    if documento.tipo == CPF:
+        return _validar_cpf_normalizado(documento.valor)
+    if documento.tipo is not None:
+        return _validar_cnpj_normalizado(documento.valor)
+    return False
+
+
+def _formata_cnpj_normalizado(cnpj):
+    return "{}.{}.{}/{}-{}".format(
+        cnpj[0:2],
+        cnpj[2:5],
+        cnpj[5:8],
+        cnpj[8:12],
+        cnpj[12:14],
+    )
+
+
+def _formata_cpf_normalizado(cpf):
+    return "{}.{}.{}-{}".format(cpf[0:3], cpf[3:6], cpf[6:9], cpf[9:11])
+
+
+# Cache global ativado por ativar_cache(); None quando desativado
+_cache_global = None
+
+
+def _validar(documento):
+    """Valida ``documento`` usando o cache global, se estiver ativo."""
+    cache = _cache_global
+    if cache is None or documento.tipo is None:
+        return _validar_documento(documento)
+    return cache._cache.get(documento, _validar_documento)
 
 
 # ---------------------------------------------------------------------------
 # API pública
 # ---------------------------------------------------------------------------
 
+
+def classificar(cnpj_cpf):
+    """Normaliza e classifica um documento em uma única varredura, sem regex.
+
+    A máscara é removida com ``str.replace`` e o resultado é classificado
+    pelo tamanho e pelo conjunto de caracteres, seguindo as mesmas regras de
+    roteamento de :func:`validar`:
+
+    - 14 caracteres após remover ``.``, ``/`` e ``-``: ``CNPJ`` (só dígitos)
+      ou ``CNPJ_ALFA`` (dígitos e letras). Com outros caracteres, ``None``.
+    - 11 dígitos: ``CPF``.
+    - Qualquer outra coisa: ``None``.
+
+    Entradas ``bytes``/``bytearray``/``memoryview`` são tratadas como ASCII,
+    sem decodificação; nesse caso ``valor`` é ``bytes``.
+
+    Args:
+        cnpj_cpf (str | bytes | bytearray | memoryview): CNPJ ou CPF, com ou
+            sem máscara.
+
+    Returns:
+        DocumentoNormalizado: Tipo e valor normalizado do documento.
+
+    Raises:
+        TypeError: Se ``cnpj_cpf`` não for texto nem bytes-like.
+    """
+    candidato = _normalizar_cnpj(cnpj_cpf)
+    tamanho = len(candidato)
+
+    if tamanho == 14:
+        if not (candidato.isascii() and candidato.isalnum()):
+            return DocumentoNormalizado(None, candidato)
+        if candidato.isdigit():
+            return DocumentoNormalizado(CNPJ, candidato)
+        return DocumentoNormalizado(CNPJ_ALFA, candidato)
+
+    if tamanho == 11 and candidato.isdigit() and candidato.isascii():
+        return DocumentoNormalizado(CPF, candidato)
+
+    # Caminho raro: sobra algum caractere que não é máscara de CNPJ
+    apenas_digitos = _somente_digitos(cnpj_cpf)
+    if len(apenas_digitos) == 11:
+        return DocumentoNormalizado(CPF, apenas_digitos)
+
+    return DocumentoNormalizado(None, candidato)
+
+
 def validar_cnpj(cnpj):
     """Valida um CNPJ numérico ou alfanumérico.
 
@@ -135,7 +409,8 @@ def validar_cnpj(cnpj):
     - Dígitos verificadores calculados pelo módulo 11 com valores ASCII-48.
 
     Args:
-        cnpj (str): CNPJ a ser validado (com ou sem pontuação).
+        cnpj (str | bytes | bytearray | memoryview): CNPJ a ser validado
+            (com ou sem pontuação).
 
     Returns:
         bool: ``True`` se válido, ``False`` caso contrário.
@@ -143,34 +418,19 @@ def validar_cnpj(cnpj):
     if not cnpj:
         return False
 
-    cnpj = _normalizar_cnpj(cnpj)
-
-    if len(cnpj) != 14:
+    documento = classificar(cnpj)
+    if documento.tipo not in (CNPJ, CNPJ_ALFA):
         return False
 
-    # Rejeita CNPJ zerado
-    if cnpj == "00000000000000":
-        return False
-
-    # Valida formato: 12 alfanuméricos + 2 dígitos
-    if not _RE_CNPJ_ALFA.match(cnpj):
-        return False
-
-    # Verifica letras proibidas nas 12 primeiras posições
-    if _LETRAS_PROIBIDAS & set(cnpj[:12]):
-        return False
-
-    # Verifica dígitos verificadores
-    dv_informado = cnpj[12:]
-    dv_calculado = _calcular_dv_cnpj(cnpj[:12])
-    return dv_informado == dv_calculado
+    return _validar(documento)
 
 
 def validar_cpf(cpf):
     """Valida um CPF — Cadastro de Pessoa Física.
 
     Args:
-        cpf (str): CPF a ser validado (com ou sem pontuação).
+        cpf (str | bytes | bytearray | memoryview): CPF a ser validado
+            (com ou sem pontuação).
 
     Returns:
         bool: ``True`` se válido, ``False`` caso contrário.
@@ -178,19 +438,13 @@ def validar_cpf(cpf):
     if not cpf:
         return False
 
-    cpf = re.sub(r"[^0-9]", "", cpf)
-
-    if len(cpf) != 11 or cpf == cpf[0] * len(cpf):
-        return False
-
-    cpf_ints = list(map(int, cpf))
-    novo = cpf_ints[:9]
+    documento = classificar(cpf)
+    if documento.tipo == CPF:
+        return _validar(documento)
 
-    while len(novo) < 11:
-        r = sum([(len(novo) + 1 - i) * v for i, v in enumerate(novo)]) % 11
-        novo.append(0 if r < 2 else 11 - r)
-
-    return novo == cpf_ints
+    # Fora do roteamento de classificar() (ex.: 14 caracteres com espaços),
+    # o CPF continua sendo avaliado apenas pelos seus dígitos.
+    return _validar_cpf_normalizado(_somente_digitos(cpf))
 
 
 def validar(cnpj_cpf=None):
@@ -202,7 +456,8 @@ def validar(cnpj_cpf=None):
     - 11 dígitos (após remoção de pontuação numérica): trata como CPF.
 
     Args:
-        cnpj_cpf (str): CNPJ ou CPF para ser validado.
+        cnpj_cpf (str | bytes | bytearray | memoryview): CNPJ ou CPF para
+            ser validado.
 
     Returns:
         bool | None: ``True`` se válido, ``False`` se inválido,
@@ -211,17 +466,7 @@ def validar(cnpj_cpf=None):
     if not cnpj_cpf:
         return None
 
-    # Tenta como CNPJ (remove apenas máscara, preserva letras)
-    candidato = _normalizar_cnpj(cnpj_cpf)
-    if len(candidato) == 14:
-        return validar_cnpj(candidato)
-
-    # Tenta como CPF (remove tudo que não é dígito)
-    apenas_digitos = re.sub(r"[^0-9]", "", cnpj_cpf)
-    if len(apenas_digitos) == 11:
-        return validar_cpf(apenas_digitos)
-
-    return False
+    return _validar(classificar(cnpj_cpf))
 
 
 def formata_cnpj(cnpj=None):
@@ -231,7 +476,8 @@ def formata_cnpj(cnpj=None):
     é aplicada sobre os caracteres originais (letras são preservadas).
 
     Args:
-        cnpj (str): CNPJ com 14 caracteres, com ou sem pontuação.
+        cnpj (str | bytes | bytearray | memoryview): CNPJ com 14
+            caracteres, com ou sem pontuação.
 
     Returns:
         str: CNPJ formatado, ou a string original se não tiver 14 caracteres.
@@ -239,15 +485,9 @@ def formata_cnpj(cnpj=None):
     if not cnpj:
         return cnpj
 
-    cnpj = _normalizar_cnpj(cnpj)
+    cnpj = _normalizar_cnpj(_texto(cnpj))
     if len(cnpj) == 14:
-        return "{}.{}.{}/{}-{}".format(
-            cnpj[0:2],
-            cnpj[2:5],
-            cnpj[5:8],
-            cnpj[8:12],
-            cnpj[12:14],
-        )
+        return _formata_cnpj_normalizado(cnpj)
     return cnpj
 
 
@@ -255,7 +495,8 @@ def formata_cpf(cpf=None):
     """Formata um CPF com pontuação (``XXX.XXX.XXX-XX``).
 
     Args:
-        cpf (str): CPF com 11 dígitos, com ou sem pontuação.
+        cpf (str | bytes | bytearray | memoryview): CPF com 11 dígitos, com
+            ou sem pontuação.
 
     Returns:
         str: CPF formatado, ou a string original se não tiver 11 dígitos.
@@ -263,9 +504,9 @@ def formata_cpf(cpf=None):
     if not cpf:
         return cpf
 
-    cpf = re.sub(r"[^0-9]", "", cpf)
+    cpf = _somente_digitos(_texto(cpf))
     if len(cpf) == 11:
-        return "{}.{}.{}-{}".format(cpf[0:3], cpf[3:6], cpf[6:9], cpf[9:11])
+        return _formata_cpf_normalizado(cpf)
     return cpf
 
 
@@ -273,7 +514,8 @@ def formata(cnpj_cpf=None):
     """Formata um CNPJ ou CPF com pontuação conforme o número de caracteres.
 
     Args:
-        cnpj_cpf (str): CNPJ (14 chars) ou CPF (11 dígitos).
+        cnpj_cpf (str | bytes | bytearray | memoryview): CNPJ (14 chars) ou
+            CPF (11 dígitos). Entradas bytes-like são lidas como ASCII.
 
     Returns:
         str | None: String formatada, ou ``None`` se ``cnpj_cpf`` for falsy.
@@ -281,12 +523,813 @@ def formata(cnpj_cpf=None):
     if not cnpj_cpf:
         return None
 
-    candidato = _normalizar_cnpj(cnpj_cpf)
-    if len(candidato) == 14:
-        return formata_cnpj(candidato)
-
-    apenas_digitos = re.sub(r"[^0-9]", "", cnpj_cpf)
-    if len(apenas_digitos) == 11:
-        return formata_cpf(apenas_digitos)
+    cnpj_cpf = _texto(cnpj_cpf)
+    documento = classificar(cnpj_cpf)
+    if len(documento.valor) == 14:
+        if documento.tipo is None:
+            # Ex.: "- 1234..." só fica sem espaços após nova normalização
+            return formata_cnpj(documento.valor)
+        return _formata_cnpj_normalizado(documento.valor)
+    if documento.tipo == CPF:
+        return _formata_cpf_normalizado(documento.valor)
 
     return cnpj_cpf
+
+
+def validar_campo(buffer, inicio, tamanho, tipo=None):
+    """Valida um CNPJ/CPF gravado em um campo de largura fixa de um buffer.
+
+    O campo é lido por ``memoryview`` diretamente do buffer (``bytes``,
+    ``bytearray``, ``mmap``...), sem cópia e sem decodificação. Como em
+    arquivos posicionais, o campo deve conter o documento sem máscara e em
+    maiúsculas.
+
+    Args:
+        buffer: Objeto que suporte o protocolo de buffer.
+        inicio (int): Posição inicial do campo.
+        tamanho (int): Largura do campo.
+        tipo (str): ``CNPJ`` ou ``CPF``. Quando omitido, campos de 14
+            posições são CNPJ e de 11 posições são CPF. Com ``CPF`` em um
+            campo mais largo (ex.: 14 posições), o CPF ocupa as 11 últimas
+            posições e as anteriores devem ser zeros.
+
+    Returns:
+        bool: ``True`` se o documento do campo for válido.
+    """
+    campo = memoryview(buffer)
+    if campo.format != "B":
+        campo = campo.cast("B")
+    campo = campo[inicio : inicio + tamanho]
+    if len(campo) != tamanho:
+        return False
+
+    if tipo is None:
+        tipo = {14: CNPJ, 11: CPF}.get(tamanho)
+
+    if tipo == CPF:
+        if tamanho < 11:
+            return False
+        preenchimento = campo[: tamanho - 11]
+        if preenchimento and not min(preenchimento) == max(preenchimento) == 48:
+            return False
+        return _validar_cpf_normalizado(campo[tamanho - 11 :])
+    if tipo in (CNPJ, CNPJ_ALFA) and tamanho == 14:
+        return _validar_cnpj_normalizado(campo)
+    return False
+
+
+def _dvs_somas(soma1, soma2):
+    """DVs a partir das somas ponderadas da base (o DV1 entra no DV2 com
+    peso 2)."""
+    dv1 = _DV_POR_RESTO[soma1 % 11]
+    return dv1, _DV_POR_RESTO[(soma2 + dv1 * 2) % 11]
+
+
+def _correcoes(valor, tabela_dv1, tabela_dv2, alfabeto):
+    """Busca substituições simples e transposições adjacentes válidas.
+
+    As somas ponderadas são lineares: trocar o caractere da posição ``i``
+    altera cada soma apenas em ``tabela[i][novo] - tabela[i][antigo]``.
+    Assim, as somas do documento são calculadas uma única vez e cada
+    variante é testada com poucas operações, sem revalidar do zero.
+
+    Args:
+        valor (str): Documento normalizado (base + 2 DVs).
+        tabela_dv1: Tabelas de contribuição das posições da base no DV1.
+        tabela_dv2: Idem para o DV2 (sem o termo do DV1, de peso 2).
+        alfabeto (str): Caracteres testados nas substituições da base.
+
+    Returns:
+        set: Variantes cujos DVs conferem.
+    """
+    n = len(tabela_dv1)
+    base = valor[:n]
+    c1 = [t.get(c, _INVALIDO) for t, c in zip(tabela_dv1, base)]
+    c2 = [t.get(c, _INVALIDO) for t, c in zip(tabela_dv2, base)]
+    soma1 = sum(c1)
+    soma2 = sum(c2)
+    d1 = _VALOR_DIGITO.get(valor[n])
+    d2 = _VALOR_DIGITO.get(valor[n + 1])
+    candidatos = set()
+
+    # Substituição em uma posição da base
+    for i in range(n):
+        for c in alfabeto.replace(base[i], ""):
+            s1 = soma1 - c1[i] + tabela_dv1[i][c]
+            if s1 >= 0 and _dvs_somas(s1, soma2 - c2[i] + tabela_dv2[i][c]) == (d1, d2):
+                candidatos.add(base[:i] + c + valor[i + 1 :])
+
+    if soma1 >= 0:
+        dv1, dv2 = _dvs_somas(soma1, soma2)
+        # Substituição em um dos DVs
+        if dv1 != d1 and dv2 == d2:
+            candidatos.add(base + _DIGITOS[dv1] + valor[n + 1])
+        if dv1 == d1 and dv2 != d2:
+            candidatos.add(base + valor[n] + _DIGITOS[dv2])
+        # Transposição dos DVs
+        if d1 != d2 and (dv1, dv2) == (d2, d1):
+            candidatos.add(base + valor[n + 1] + valor[n])
+
+    # Transposição de posições adjacentes da base
+    for i in range(n - 1):
+        a, b = base[i], base[i + 1]
+        if a == b:
+            continue
+        s1 = soma1 - c1[i] - c1[i + 1]
+        s1 += tabela_dv1[i].get(b, _INVALIDO) + tabela_dv1[i + 1].get(a, _INVALIDO)
+        s2 = soma2 - c2[i] - c2[i + 1]
+        s2 += tabela_dv2[i].get(b, _INVALIDO) + tabela_dv2[i + 1].get(a, _INVALIDO)
+        if s1 >= 0 and _dvs_somas(s1, s2) == (d1, d2):
+            candidatos.add(base[:i] + b + a + valor[i + 2 :])
+
+    # Transposição entre a última posição da base e o DV1
+    a, b = base[n - 1], valor[n]
+    novo_d1 = _VALOR_DIGITO.get(a)
+    if a != b and novo_d1 is not None:
+        s1 = soma1 - c1[n - 1] + tabela_dv1[n - 1].get(b, _INVALIDO)
+        s2 = soma2 - c2[n - 1] + tabela_dv2[n - 1].get(b, _INVALIDO)
+        if s1 >= 0 and _dvs_somas(s1, s2) == (novo_d1, d2):
+            candidatos.add(base[:-1] + b + a + valor[n + 1])
+
+    return candidatos
+
+
+def sugerir_correcoes(cnpj_cpf, alfanumerico=None):
+    """Sugere documentos válidos próximos de um CNPJ/CPF digitado com erro.
+
+    Considera todas as variantes com um único caractere trocado ou com dois
+    caracteres adjacentes invertidos (inclusive os DVs) e retorna as que
+    resultam em um documento válido. As somas dos DVs são calculadas uma vez
+    e cada variante é avaliada incrementalmente.
+
+    Args:
+        cnpj_cpf (str | bytes | bytearray | memoryview): CNPJ (14 posições) ou
+            CPF (11 dígitos), com ou sem máscara.
+        alfanumerico (bool): Testa letras nas substituições da base do CNPJ.
+            Quando omitido, letras só são testadas se o CNPJ já contiver
+            alguma letra.
+
+    Returns:
+        list: Documentos sem máscara, ordenados, diferentes da entrada.
+    """
+    if not cnpj_cpf:
+        return []
+    cnpj_cpf = _texto(cnpj_cpf)
+
+    documento = classificar(cnpj_cpf)
+    valor = documento.valor
+    if documento.tipo == CPF:
+        candidatos = _correcoes(valor, _TABELA_CPF_DV1, _TABELA_CPF_DV2, _DIGITOS)
+        candidatos = {c for c in candidatos if min(c) != max(c)}
+    elif len(valor) == 14:
+        if alfanumerico is None:
+            alfanumerico = not valor[:12].isdigit()
+        alfabeto = _CARACTERES_CNPJ if alfanumerico else _DIGITOS
+        candidatos = _correcoes(valor, _TABELA_DV1, _TABELA_DV2, alfabeto)
+        candidatos.discard("00000000000000")
+    else:
+        return []
+
+    candidatos.discard(valor)
+    return sorted(candidatos)
+
+
+# ---------------------------------------------------------------------------
+# Cache de validação
+# ---------------------------------------------------------------------------
+
+
+class CachedValidator(object):
+    """Validador de CNPJ/CPF com cache LRU limitado.
+
+    A chave do cache é o documento normalizado por :func:`classificar`, de
+    modo que ``"02.960.895/0001-31"`` e ``"02960895000131"`` compartilham a
+    mesma entrada. Pode ser usado diretamente ou ativado para todo o módulo
+    com :func:`ativar_cache`.
+
+    Args:
+        maxsize (int): Número máximo de documentos mantidos no cache.
+    """
+
+    def __init__(self, maxsize=4096):
+        self._cache = LRUCache(maxsize)
+
+    def validar(self, cnpj_cpf=None):
+        """Mesmo contrato de :func:`validar`, consultando o cache."""
+        if not cnpj_cpf:
+            return None
+
+        documento = classificar(cnpj_cpf)
+        if documento.tipo is None:
+            return False
+        return self._cache.get(documento, _validar_documento)
+
+    __call__ = validar
+
+    def stats(self):
+        """Retorna ``hits``, ``misses``, ``evictions``, ``currsize`` e
+        ``maxsize`` do cache."""
+        return self._cache.stats()
+
+    def clear(self):
+        """Esvazia o cache e zera as estatísticas."""
+        self._cache.clear()
+
+
+def ativar_cache(maxsize=4096):
+    """Ativa um :class:`CachedValidator` global.
+
+    A partir da chamada, :func:`validar`, :func:`validar_cnpj` e
+    :func:`validar_cpf` passam a consultar o cache, sem mudança nos pontos
+    de chamada.
+
+    Args:
+        maxsize (int): Número máximo de documentos mantidos no cache.
+
+    Returns:
+        CachedValidator: O validador global, para consulta de ``stats()``.
+    """
+    global _cache_global
+    _cache_global = CachedValidator(maxsize)
+    return _cache_global
+
+
+def desativar_cache():
+    """Desativa o cache global de validação."""
+    global _cache_global
+    _cache_global = None
+
+
+# ---------------------------------------------------------------------------
+# Documento compacto
+# ---------------------------------------------------------------------------
+
+# Os DVs são redundantes em um documento válido: basta guardar a base.
+# CNPJ: 12 posições em base 36 (< 36**12 < 2**63).
+# CPF:  9 dígitos com o bit 63 ligado, o que ordena os CPFs após os CNPJs.
+_BASE36 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+_BIT_CPF = 1 << 63
+
+
+def _compactar(documento):
+    """Converte um :class:`DocumentoNormalizado` válido em inteiro."""
+    if documento.tipo == CPF:
+        return _BIT_CPF | int(documento.valor[:9])
+    return int(documento.valor[:12], 36)
+
+
+def _expandir(codigo):
+    """Inverso de :func:`_compactar`: retorna o documento sem máscara."""
+    if codigo & _BIT_CPF:
+        cpf9 = "{:09d}".format(codigo ^ _BIT_CPF)
+        return cpf9 + _calcular_dv_cpf(cpf9)
+
+    caracteres = []
+    for _ in range(12):
+        codigo, resto = divmod(codigo, 36)
+        caracteres.append(_BASE36[resto])
+    cnpj12 = "".join(reversed(caracteres))
+    return cnpj12 + _calcular_dv_cnpj(cnpj12)
+
+
+def _codigo(cnpj_cpf):
+    """Retorna o código compacto de um CNPJ/CPF válido ou ``None``."""
+    if isinstance(cnpj_cpf, Documento):
+        return cnpj_cpf._codigo
+    if not cnpj_cpf:
+        return None
+    documento = classificar(cnpj_cpf)
+    if not _validar_documento(documento):
+        return None
+    return _compactar(documento)
+
+
+@total_ordering
+class Documento(object):
+    """CNPJ (numérico ou alfanumérico) ou CPF válido compactado em um inteiro.
+
+    Apenas a base do documento é guardada (os DVs são recalculados quando
+    necessário), em um único inteiro de 64 bits. Instâncias são imutáveis,
+    ``hashable`` e ordenáveis: CNPJs em ordem alfanumérica, seguidos dos CPFs.
+
+    Args:
+        cnpj_cpf (str | Documento): CNPJ ou CPF, com ou sem máscara.
+
+    Raises:
+        ValueError: Se o documento for inválido.
+    """
+
+    __slots__ = ("_codigo",)
+
+    def __init__(self, cnpj_cpf):
+        codigo = _codigo(cnpj_cpf)
+        if codigo is None:
+            raise ValueError("CNPJ/CPF inválido: {!r}".format(cnpj_cpf))
+        self._codigo = codigo
+
+    @classmethod
+    def de_codigo(cls, codigo):
+        """Cria um documento a partir do inteiro retornado por ``int()``."""
+        documento = cls.__new__(cls)
+        documento._codigo = int(codigo)
+        return documento
+
+    @property
+    def tipo(self):
+        """``CPF``, ``CNPJ`` ou ``CNPJ_ALFA``."""
+        if self._codigo & _BIT_CPF:
+            return CPF
+        return CNPJ if str(self).isdigit() else CNPJ_ALFA
+
+    def formata(self):
+        """Retorna o documento com máscara."""
+        if self._codigo & _BIT_CPF:
+            return _formata_cpf_normalizado(str(self))
+        return _formata_cnpj_normalizado(str(self))
+
+    def __int__(self):
+        return self._codigo
+
+    def __str__(self):
+        return _expandir(self._codigo)
+
+    def __repr__(self):
+        return "{:s}({!r})".format(self.__class__.__name__, str(self))
+
+    def __hash__(self):
+        return hash(self._codigo)
+
+    def __eq__(self, other):
+        if not isinstance(other, Documento):
+            return NotImplemented
+        return self._codigo == other._codigo
+
+    def __lt__(self, other):
+        if not isinstance(other, Documento):
+            return NotImplemented
+        return self._codigo < other._codigo
+
+
+class DocumentoSet(object):
+    """Conjunto imutável de CNPJs/CPFs em um ``array('Q')`` ordenado.
+
+    Cada documento ocupa 8 bytes; a pertinência é verificada por busca
+    binária. Com NumPy instalado, a ordenação é feita no próprio buffer do
+    array, sem criar objetos Python por documento.
+
+    Args:
+        documentos: Iterável de ``str`` ou :class:`Documento`.
+
+    Raises:
+        ValueError: Se algum documento for inválido.
+    """
+
+    __slots__ = ("_codigos",)
+
+    def __init__(self, documentos=()):
+        codigos = array("Q")
+        for documento in documentos:
+            codigo = _codigo(documento)
+            if codigo is None:
+                raise ValueError("CNPJ/CPF inválido: {!r}".format(documento))
+            codigos.append(codigo)
+
+        np = importar_numpy()
+        if np is not None:
+            ordenados = np.unique(np.frombuffer(codigos, dtype=np.uint64))
+            codigos = array("Q")
+            codigos.frombytes(ordenados.tobytes())
+        else:
+            codigos = array("Q", sorted(set(codigos)))
+        self._codigos = codigos
+
+    @property
+    def codigos(self):
+        """``array('Q')`` ordenado com os códigos dos documentos."""
+        return self._codigos
+
+    def __contains__(self, cnpj_cpf):
+        codigo = _codigo(cnpj_cpf)
+        if codigo is None:
+            return False
+        i = bisect_left(self._codigos, codigo)
+        return i < len(self._codigos) and self._codigos[i] == codigo
+
+    def __len__(self):
+        return len(self._codigos)
+
+    def __iter__(self):
+        return map(Documento.de_codigo, self._codigos)
+
+
+# ---------------------------------------------------------------------------
+# Índice por raiz (matriz/filiais)
+# ---------------------------------------------------------------------------
+
+_ORDEM_MATRIZ = int("0001", 36)
+
+# Quantidade de ordens pendentes a partir da qual o IndiceRaiz as ordena
+# mesmo sem consulta, para que os sets não cresçam sem limite
+_LIMITE_PENDENTES = 1 << 16
+
+
+def _codigo_ordem(ordem):
+    """Converte a ordem (``"0001"``, ``"00A1"`` ou ``1``) em inteiro base 36."""
+    if isinstance(ordem, int):
+        ordem = "{:04d}".format(ordem)
+    return int(_normalizar_cnpj(ordem), 36)
+
+
+def _cnpj_normalizado_valido(cnpj):
+    """Retorna o CNPJ sem máscara (``str``), ou ``None`` se for inválido."""
+    if not cnpj:
+        return None
+    documento = classificar(cnpj)
+    if documento.tipo not in (CNPJ, CNPJ_ALFA):
+        return None
+    if not _validar_cnpj_normalizado(documento.valor):
+        return None
+    # Entradas bytes-like são decodificadas: raízes e ordens são sempre str
+    return _texto(documento.valor)
+
+
+def _ordem_base36(codigo):
+    caracteres = []
+    for _ in range(4):
+        codigo, resto = divmod(codigo, 36)
+        caracteres.append(_BASE36[resto])
+    return "".join(reversed(caracteres))
+
+
+class IndiceRaiz(object):
+    """Índice de CNPJs agrupados por raiz (8 primeiras posições).
+
+    Cada raiz é guardada uma única vez, como chave de um ``dict``; as ordens
+    (posições 9 a 12) ficam em um ``array('I')`` ordenado por raiz, com os
+    caracteres em base 36. Os DVs não são armazenados: os CNPJs são
+    remontados na consulta. Isso permite construir o índice a partir de um
+    fluxo de CNPJs sem manter as strings originais.
+
+    As ordens incluídas ficam pendentes em um ``set`` por raiz e são
+    ordenadas em bloco na primeira consulta à raiz (ao final de
+    :meth:`atualizar`, ou quando o total pendente passa de um limite),
+    evitando uma inserção ordenada a cada CNPJ.
+
+    Args:
+        cnpjs: Iterável opcional de CNPJs (com ou sem máscara).
+    """
+
+    __slots__ = ("_raizes", "_pendentes", "_n_pendentes", "_total")
+
+    def __init__(self, cnpjs=()):
+        self._raizes = {}
+        self._pendentes = {}
+        self._n_pendentes = 0
+        self._total = 0
+        self.atualizar(cnpjs)
+
+    def adicionar(self, cnpj):
+        """Adiciona um CNPJ ao índice.
+
+        Returns:
+            bool: ``True`` se o CNPJ foi incluído, ``False`` se já existia.
+
+        Raises:
+            ValueError: Se o CNPJ for inválido.
+        """
+        normalizado = _cnpj_normalizado_valido(cnpj)
+        if normalizado is None:
+            raise ValueError("CNPJ inválido: {!r}".format(cnpj))
+
+        raiz = normalizado[:8]
+        ordem = int(normalizado[8:12], 36)
+        ordens = self._raizes.get(raiz)
+        if ordens is None:
+            ordens = self._raizes[raiz] = array("I")
+        i = bisect_left(ordens, ordem)
+        if i < len(ordens) and ordens[i] == ordem:
+            return False
+        pendentes = self._pendentes.setdefault(raiz, set())
+        if ordem in pendentes:
+            return False
+        pendentes.add(ordem)
+        self._total += 1
+        self._n_pendentes += 1
+        if self._n_pendentes >= _LIMITE_PENDENTES:
+            self._consolidar()
+        return True
+
+    def atualizar(self, cnpjs):
+        """Adiciona todos os CNPJs de um iterável ao índice."""
+        for cnpj in cnpjs:
+            self.adicionar(cnpj)
+        self._consolidar()
+
+    def _consolidar(self):
+        """Ordena as ordens pendentes de todas as raízes."""
+        for raiz in list(self._pendentes):
+            self._ordens(raiz)
+
+    def _ordens(self, raiz):
+        """Ordens da raiz, já incluídas as pendentes."""
+        ordens = self._raizes.get(raiz, ())
+        pendentes = self._pendentes.pop(raiz, None)
+        if pendentes:
+            self._n_pendentes -= len(pendentes)
+            # Duas sequências ordenadas: o timsort apenas as intercala
+            ordens.extend(sorted(pendentes))
+            ordens = self._raizes[raiz] = array("I", sorted(ordens))
+        return ordens
+
+    def _montar(self, raiz, ordens):
+        for ordem in ordens:
+            cnpj12 = raiz + _ordem_base36(ordem)
+            yield cnpj12 + _calcular_dv_cnpj(cnpj12)
+
+    def estabelecimentos(self, raiz):
+        """Todos os CNPJs (sem máscara) da raiz, em ordem.
+
+        Args:
+            raiz (str): Raiz do CNPJ (ou um CNPJ completo), com ou sem máscara.
+        """
+        raiz = _normalizar_cnpj(raiz)[:8]
+        return list(self._montar(raiz, self._ordens(raiz)))
+
+    def filiais(self, raiz):
+        """CNPJs da raiz, exceto a matriz (ordem ``0001``)."""
+        raiz = _normalizar_cnpj(raiz)[:8]
+        ordens = [o for o in self._ordens(raiz) if o != _ORDEM_MATRIZ]
+        return list(self._montar(raiz, ordens))
+
+    def matriz(self, raiz):
+        """CNPJ da matriz (ordem ``0001``) da raiz ou ``None``."""
+        raiz = _normalizar_cnpj(raiz)[:8]
+        ordens = self._ordens(raiz)
+        i = bisect_left(ordens, _ORDEM_MATRIZ)
+        if i < len(ordens) and ordens[i] == _ORDEM_MATRIZ:
+            return next(self._montar(raiz, (_ORDEM_MATRIZ,)))
+        return None
+
+    def intervalo(self, raiz, inicio, fim):
+        """CNPJs da raiz com ordem entre ``inicio`` e ``fim`` (inclusive).
+
+        Args:
+            raiz (str): Raiz do CNPJ (ou um CNPJ completo).
+            inicio (str | int): Ordem inicial (``"0001"``, ``"00A1"`` ou ``1``).
+            fim (str | int): Ordem final.
+        """
+        raiz = _normalizar_cnpj(raiz)[:8]
+        ordens = self._ordens(raiz)
+        i = bisect_left(ordens, _codigo_ordem(inicio))
+        j = bisect_right(ordens, _codigo_ordem(fim))
+        return list(self._montar(raiz, ordens[i:j]))
+
+    def raizes(self):
+        """Raízes presentes no índice."""
+        return self._raizes.keys()
+
+    def __contains__(self, cnpj):
+        cnpj = _cnpj_normalizado_valido(cnpj)
+        if cnpj is None:
+            return False
+        ordens = self._ordens(cnpj[:8])
+        ordem = int(cnpj[8:12], 36)
+        i = bisect_left(ordens, ordem)
+        return i < len(ordens) and ordens[i] == ordem
+
+    def __len__(self):
+        return self._total
+
+    def __iter__(self):
+        for raiz in list(self._raizes):
+            yield from self._montar(raiz, self._ordens(raiz))
+
+
+def filiais(raiz, inicio=1, fim=9999, formatado=False):
+    """Gera os CNPJs dos estabelecimentos de uma raiz, ordem a ordem.
+
+    A contribuição da raiz para as somas dos DVs é calculada uma única vez;
+    a cada ordem são somadas apenas as contribuições das 4 posições da
+    ordem. Suporta raízes alfanuméricas.
+
+    Args:
+        raiz (str): Raiz do CNPJ (8 posições), com ou sem máscara.
+        inicio (int): Primeira ordem (inclusive).
+        fim (int): Última ordem (inclusive).
+        formatado (bool): Gera os CNPJs com máscara.
+
+    Yields:
+        str: CNPJ de cada ordem entre ``inicio`` e ``fim``.
+
+    Raises:
+        ValueError: Se a raiz for inválida ou o intervalo estiver fora de
+            ``0..9999``.
+    """
+    raiz = _normalizar_cnpj(raiz or "")
+    soma_raiz1 = sum(map(dict.get, _TABELA_DV1[:8], raiz, _SENTINELAS))
+    soma_raiz2 = sum(map(dict.get, _TABELA_DV2[:8], raiz, _SENTINELAS))
+    if len(raiz) != 8 or soma_raiz1 < 0:
+        raise ValueError("Raiz de CNPJ inválida: {!r}".format(raiz))
+    if not 0 <= inicio <= fim <= 9999:
+        raise ValueError("Intervalo de ordens inválido: {}-{}".format(inicio, fim))
+
+    tabela_ordem1 = _TABELA_DV1[8:]
+    tabela_ordem2 = _TABELA_DV2[8:]
+    peso_dv1 = _PESOS_DV[12]
+    for numero in range(inicio, fim + 1):
+        ordem = "{:04d}".format(numero)
+        soma_dv1 = soma_raiz1 + sum(map(dict.__getitem__, tabela_ordem1, ordem))
+        dv1 = _DV_POR_RESTO[soma_dv1 % 11]
+        soma_dv2 = soma_raiz2 + sum(map(dict.__getitem__, tabela_ordem2, ordem))
+        dv2 = _DV_POR_RESTO[(soma_dv2 + dv1 * peso_dv1) % 11]
+        cnpj = raiz + ordem + _DIGITOS[dv1] + _DIGITOS[dv2]
+        if cnpj == "00000000000000":
+            continue
+        yield _formata_cnpj_normalizado(cnpj) if formatado else cnpj
+
+
+# ---------------------------------------------------------------------------
+# Geração de documentos válidos
+# ---------------------------------------------------------------------------
+
+
+def _base_alfabeto(valor, alfabeto, tamanho):
+    caracteres = []
+    base = len(alfabeto)
+    for _ in range(tamanho):
+        valor, resto = divmod(valor, base)
+        caracteres.append(alfabeto[resto])
+    return "".join(reversed(caracteres))
+
+
+def gerar_cnpj(n, alfanumerico=False, seed=None):
+    """Gera ``n`` CNPJs válidos e distintos, sem máscara.
+
+    Os CNPJs são produzidos sob demanda (gerador), então é possível gerar
+    milhões sem mantê-los em memória. Com ``alfanumerico=True`` as 12
+    primeiras posições usam dígitos e letras, exceto as proibidas.
+
+    Args:
+        n (int): Quantidade de CNPJs.
+        alfanumerico (bool): Gera CNPJs alfanuméricos.
+        seed: Semente para resultados reprodutíveis.
+
+    Yields:
+        str: CNPJ válido com 14 posições.
+    """
+    if alfanumerico:
+        alfabeto = _CARACTERES_CNPJ
+    else:
+        alfabeto = _DIGITOS
+    # A base zero ("000000000000") é excluída: o CNPJ zerado é inválido
+    for valor in permutacao(n, len(alfabeto) ** 12 - 1, seed):
+        cnpj12 = _base_alfabeto(valor + 1, alfabeto, 12)
+        yield cnpj12 + _calcular_dv_cnpj(cnpj12)
+
+
+def gerar_cpf(n, seed=None):
+    """Gera ``n`` CPFs válidos e distintos, sem máscara.
+
+    Args:
+        n (int): Quantidade de CPFs.
+        seed: Semente para resultados reprodutíveis.
+
+    Yields:
+        str: CPF válido com 11 dígitos.
+    """
+    # CPFs com todos os dígitos iguais são inválidos e são pulados; a
+    # permutação percorre até o fim do espaço para compensar.
+    restantes = n
+    for valor in permutacao(10**9, 10**9, seed):
+        if not restantes:
+            return
+        cpf9 = "{:09d}".format(valor)
+        cpf = cpf9 + _calcular_dv_cpf(cpf9)
+        if cpf == cpf[0] * 11:
+            continue
+        restantes -= 1
+        yield cpf
+
+
+# ---------------------------------------------------------------------------
+# Validação em lote (NumPy)
+# ---------------------------------------------------------------------------
+
+
+def _codigos_cnpj_lote(cnpjs):
+    """Converte uma coleção de CNPJs em uma matriz ``(n, 14)`` de códigos.
+
+    Arrays NumPy ``S``/``U`` com até 14 posições são reinterpretados sem
+    cópia dos caracteres. Qualquer outra entrada (listas, arrays com máscara,
+    ``object``) passa antes por :func:`_normalizar_cnpj`; valores vazios ou
+    que não resultem em 14 caracteres viram uma linha zerada (inválida).
+
+    Args:
+        cnpjs: Array NumPy ``S``/``U`` ou iterável de ``str``.
+
+    Returns:
+        numpy.ndarray: Matriz de inteiros com um código por caractere
+            (``0`` indica ausência de caractere).
+    """
+    np = importar_numpy()
+    arr = cnpjs if isinstance(cnpjs, np.ndarray) else None
+    if arr is not None and arr.dtype.kind in "SU":
+        largura = arr.dtype.itemsize // (4 if arr.dtype.kind == "U" else 1)
+        if largura <= _TAM_CNPJ:
+            arr = np.ascontiguousarray(arr.ravel())
+            if largura < _TAM_CNPJ:
+                arr = arr.astype("{}{}".format(arr.dtype.kind, _TAM_CNPJ))
+            tipo = np.uint32 if arr.dtype.kind == "U" else np.uint8
+            return arr.view(tipo).reshape(-1, _TAM_CNPJ).astype(np.int64)
+
+    if arr is not None:
+        cnpjs = arr.ravel().tolist()
+    normalizados = []
+    for cnpj in cnpjs:
+        if isinstance(cnpj, bytes):
+            cnpj = cnpj.decode("ascii", "replace")
+        cnpj = _normalizar_cnpj(cnpj) if cnpj else ""
+        normalizados.append(cnpj if len(cnpj) == _TAM_CNPJ else "")
+    arr = np.array(normalizados, dtype="U{}".format(_TAM_CNPJ))
+    return arr.view(np.uint32).reshape(-1, _TAM_CNPJ).astype(np.int64)
+
+
+def _tabela_permitidos_lote():
+    """Tabela ASCII (128 posições) dos caracteres aceitos nas 12 primeiras
+    posições do CNPJ, já considerando as letras proibidas."""
+    np = importar_numpy()
+    tabela = np.zeros(128, dtype=bool)
+    tabela[ord("0") : ord("9") + 1] = True
+    tabela[ord("A") : ord("Z") + 1] = True
+    for letra in _LETRAS_PROIBIDAS:
+        tabela[ord(letra)] = False
+    return tabela
+
+
+def validar_cnpj_lote(cnpjs):
+    """Valida uma coleção de CNPJs (numéricos e alfanuméricos) de uma só vez.
+
+    O resultado é idêntico a aplicar :func:`validar_cnpj` a cada item, mas
+    com NumPy o cálculo é feito sobre uma matriz de códigos ``ord(c) - 48``
+    e os dois DVs saem de um único produto matricial contra ``_PESOS_DV``.
+    Sem NumPy instalado, cai para a validação item a item.
+
+    Args:
+        cnpjs: Array NumPy ``S14``/``U14`` (ou menor) ou lista de CNPJs,
+            com ou sem pontuação.
+
+    Returns:
+        numpy.ndarray | list: Máscara booleana com o mesmo formato da
+            entrada (``list`` quando NumPy não está disponível).
+    """
+    np = importar_numpy()
+    if np is None:
+        return [validar_cnpj(cnpj) for cnpj in cnpjs]
+
+    if isinstance(cnpjs, np.ndarray):
+        formato = cnpjs.shape
+    else:
+        cnpjs = list(cnpjs)
+        formato = None
+    codigos = _codigos_cnpj_lote(cnpjs)
+    if not len(codigos):
+        return np.zeros(formato or 0, dtype=bool)
+
+    # Letras minúsculas são aceitas por validar_cnpj (normaliza com upper)
+    minusculas = (codigos >= ord("a")) & (codigos <= ord("z"))
+    codigos = np.where(minusculas, codigos - 32, codigos)
+
+    # Caracteres fora do ASCII podem mudar de tamanho/valor com str.upper();
+    # essas linhas (raras) seguem pelo caminho escalar para manter a paridade.
+    nao_ascii = (codigos > 127).any(axis=1)
+    codigos = np.where(codigos > 127, 0, codigos)
+
+    permitidos = _tabela_permitidos_lote()[codigos[:, :12]].all(axis=1)
+    valores = codigos - 48
+    dvs_numericos = ((valores[:, 12:] >= 0) & (valores[:, 12:] <= 9)).all(axis=1)
+    zerado = (valores == 0).all(axis=1)
+
+    pesos = np.array([_PESOS_DV[1:13], _PESOS_DV[0:12]], dtype=np.int64).T
+    somas = valores[:, :12] @ pesos
+    resto1 = somas[:, 0] % 11
+    dv1 = np.where(resto1 < 2, 0, 11 - resto1)
+    resto2 = (somas[:, 1] + dv1 * _PESOS_DV[12]) % 11
+    dv2 = np.where(resto2 < 2, 0, 11 - resto2)
+
+    resultado = (
+        permitidos
+        & dvs_numericos
+        & ~zerado
+        & (valores[:, 12] == dv1)
+        & (valores[:, 13] == dv2)
+    )
+
+    if nao_ascii.any():
+        originais = cnpjs.ravel() if formato is not None else cnpjs
+        for i in np.flatnonzero(nao_ascii):
+            original = originais[i]
+            resultado[i] = isinstance(original, str) and validar_cnpj(original)
+
+    if formato is not None:
+        resultado = resultado.reshape(formato)
+    return resultado
@@ -2,8 +2,13 @@
 # Copyright (C) 2020  Luis Felipe Mileo - KMEE
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
+import mmap
 import re
+from bisect import bisect_right
+from collections import namedtuple
+from operator import getitem
 
+from ..misc import importar_numpy
 from ..misc import modulo11
 from ..misc import punctuation_rm
 from . import cnpj_cpf
@@ -204,64 +209,9 @@ class ChaveEdoc(object):
 
         """
 
-        # Verifica se o valor do campo CUF é válido
-        # O valor deve ser o código do IBGE da UF
-        if int(self.campos[ChaveEdoc.CUF]) not in CODIGO_ESTADOS_IBGE:
-            raise ValueError(
-                ("Chave de acesso invalida (codigo UF: {!r}): {!r}").format(
-                    self.campos[ChaveEdoc.CUF], self.chave
-                )
-            )
-
-        # Verifica se o valor do campo MODELO é válido
-        if self.campos[ChaveEdoc.MODELO] not in CODIGO_MODELOS_EDOC:
-            raise ValueError(
-                (
-                    "Chave de acesso invalida " "(Modelos não permitidos: {!r}): {!r}"
-                ).format(self.campos[ChaveEdoc.MODELO], self.chave)
-            )
-
-        # Verifica se o valor do campo Série é válido
-        series_cnpj = list(range(0, 889 + 1)) + list(range(900, 909 + 1))
-        series_cnpj_cpf = list(range(890, 899 + 1))
-        series_cpf = list(range(910, 969 + 1))
-        series_geral = series_cnpj + series_cnpj_cpf + series_cpf
-
-        serie_number = int(self.campos[ChaveEdoc.SERIE])
-        if serie_number not in series_geral:
-            raise ValueError(
-                ("Chave de acesso invalida " "(Série: {!r}): {!r}").format(
-                    self.campos[ChaveEdoc.SERIE], self.chave
-                )
-            )
-
-        # Por padrão o documento do emitente é o CNPJ
-        doc_emitente = ["CNPJ", self.campos[ChaveEdoc.CNPJ_CPF]]
-
-        # Caso a série esteja entre 920 a 969, o documento do emitente
-        # deve ser CPF
-        # Caso a série esteja entre 890 e 899 o documento do emitente
-        # pode ser CPF ou CNPJ
-        if (serie_number in series_cpf) or (
-            serie_number in series_cnpj_cpf
-            and not cnpj_cpf.validar(self.campos[ChaveEdoc.CNPJ_CPF])
-        ):
-            doc_emitente = ["CPF", self.campos[ChaveEdoc.CNPJ_CPF][3:]]
-
-        if not cnpj_cpf.validar(doc_emitente[1]):
-            raise ValueError(
-                ("Chave de acesso invalida " "({!r} emitente: {!r}): {!r}").format(
-                    doc_emitente[0], cnpj_cpf.formata(doc_emitente[1]), self.chave
-                )
-            )
-
-        digito = modulo11(self.campos[:43])
-        if not (digito == int(self.campos[-1])):
-            raise ValueError(
-                (
-                    "Digito verificador invalido: " "chave={!r}, digito calculado={!r}"
-                ).format(self.chave, digito)
-            )
+        motivo = _motivo_chave(self.campos)
+        if motivo != CHAVE_VALIDA:
+            raise ValueError(_mensagem_chave(motivo, self.campos, self.chave))
 
     def __str__(self):
         return self.chaveMOD
@@ -359,3 +309,891 @@ class ChaveCFeSAT(ChaveEdoc):
     FORMA = slice(0, 0)
     CODIGO = slice(37, 43)  # CNF
     DV = slice(43, None)
+
+
+# ---------------------------------------------------------------------------
+# Validação da chave
+# ---------------------------------------------------------------------------
+
+# Códigos retornados por validar_chaves(); as regras são verificadas nesta
+# ordem e o código é o da primeira que falhar
+CHAVE_VALIDA = 0
+CHAVE_TAMANHO_INVALIDO = 1
+CHAVE_UF_INVALIDA = 2
+CHAVE_MODELO_INVALIDO = 3
+CHAVE_SERIE_INVALIDA = 4
+CHAVE_EMITENTE_INVALIDO = 5
+CHAVE_DV_INVALIDO = 6
+
+# Documento do emitente exigido pela série (ver ChaveEdoc.validar)
+_SERIE_CNPJ = 0
+_SERIE_CNPJ_CPF = 1
+_SERIE_CPF = 2
+_SERIE_INVALIDA = 3
+
+
+def _classe_serie(serie):
+    if 0 <= serie <= 889 or 900 <= serie <= 909:
+        return _SERIE_CNPJ
+    if 890 <= serie <= 899:
+        return _SERIE_CNPJ_CPF
+    if 910 <= serie <= 969:
+        return _SERIE_CPF
+    return _SERIE_INVALIDA
+
+
+_CLASSES_SERIE = tuple(_classe_serie(serie) for serie in range(1000))
+_UFS_CHAVE = frozenset(CODIGO_ESTADOS_IBGE)
+_MODELOS_CHAVE = frozenset(int(modelo) for modelo in CODIGO_MODELOS_EDOC)
+
+
+def _pesos_posicoes(pesos, inicio):
+    vetor = [0] * 43
+    vetor[inicio : inicio + len(pesos)] = pesos
+    return vetor
+
+
+def _pesos_numero(fatia):
+    return _pesos_posicoes(
+        [10**i for i in range(fatia.stop - fatia.start - 1, -1, -1)], fatia.start
+    )
+
+
+# Valores calculados em uma única passada pelos 43 primeiros dígitos,
+# empacotados em campos de 12 bits de um mesmo inteiro
+_PESOS_CHAVE = [
+    # modulo11: pesos 2 a 9, da direita para a esquerda
+    [2 + (42 - i) % 8 for i in range(43)],
+    _pesos_posicoes(cnpj_cpf._PESOS_DV[1:13], ChaveEdoc.CNPJ_CPF.start),
+    _pesos_posicoes(cnpj_cpf._PESOS_DV[0:12], ChaveEdoc.CNPJ_CPF.start),
+    _pesos_posicoes(range(10, 1, -1), ChaveEdoc.CNPJ_CPF.start + 3),
+    _pesos_posicoes(range(11, 2, -1), ChaveEdoc.CNPJ_CPF.start + 3),
+    _pesos_numero(ChaveEdoc.CUF),
+    _pesos_numero(ChaveEdoc.MODELO),
+    _pesos_numero(ChaveEdoc.SERIE),
+]
+_BITS = 12
+_MASCARA = (1 << _BITS) - 1
+(
+    _SOMA_DV,
+    _SOMA_CNPJ_DV1,
+    _SOMA_CNPJ_DV2,
+    _SOMA_CPF_DV1,
+    _SOMA_CPF_DV2,
+    _VALOR_CUF,
+    _VALOR_MODELO,
+    _VALOR_SERIE,
+) = range(0, _BITS * len(_PESOS_CHAVE), _BITS)
+
+_TABELAS_CHAVE = tuple(
+    {
+        str(d): sum(d * pesos[i] << (_BITS * k) for k, pesos in enumerate(_PESOS_CHAVE))
+        for d in range(10)
+    }
+    for i in range(43)
+)
+
+# Posição dos DVs do emitente na chave (os mesmos para CNPJ e CPF)
+_DV1_EMITENTE = ChaveEdoc.CNPJ_CPF.stop - 2
+_DV2_EMITENTE = ChaveEdoc.CNPJ_CPF.stop - 1
+
+
+def _confere_dvs_emitente(campos, soma_dv1, soma_dv2):
+    dv1 = cnpj_cpf._DV_POR_RESTO[soma_dv1 % 11]
+    dv2 = cnpj_cpf._DV_POR_RESTO[(soma_dv2 + dv1 * 2) % 11]
+    return (
+        campos[_DV1_EMITENTE] == cnpj_cpf._DIGITOS[dv1]
+        and campos[_DV2_EMITENTE] == cnpj_cpf._DIGITOS[dv2]
+    )
+
+
+def _documento_emitente(campos, classe):
+    """Retorna o tipo e o documento do emitente, conforme a série."""
+    documento = campos[ChaveEdoc.CNPJ_CPF]
+    if classe == _SERIE_CPF or (
+        classe == _SERIE_CNPJ_CPF and not cnpj_cpf.validar(documento)
+    ):
+        return "CPF", documento[3:]
+    return "CNPJ", documento
+
+
+def _motivo_chave_generico(campos):
+    """Mesmas regras de :func:`_motivo_chave`, para campos que não são 44
+    dígitos ASCII (chaves montadas pelo construtor com campos de tamanho
+    inesperado, dígitos Unicode aceitos por ``CHAVE_REGEX``)."""
+    if int(campos[ChaveEdoc.CUF]) not in CODIGO_ESTADOS_IBGE:
+        return CHAVE_UF_INVALIDA
+    if campos[ChaveEdoc.MODELO] not in CODIGO_MODELOS_EDOC:
+        return CHAVE_MODELO_INVALIDO
+    classe = _classe_serie(int(campos[ChaveEdoc.SERIE]))
+    if classe == _SERIE_INVALIDA:
+        return CHAVE_SERIE_INVALIDA
+    if not cnpj_cpf.validar(_documento_emitente(campos, classe)[1]):
+        return CHAVE_EMITENTE_INVALIDO
+    if modulo11(campos[:43]) != int(campos[-1]):
+        return CHAVE_DV_INVALIDO
+    return CHAVE_VALIDA
+
+
+def _motivo_chave(campos):
+    """Retorna o código da primeira regra que a chave não cumpre, ou
+    ``CHAVE_VALIDA``.
+
+    Uma única passada pelas tabelas ``_TABELAS_CHAVE`` fornece a UF, o
+    modelo, a série e as somas dos DVs do emitente (CNPJ e CPF) e da chave,
+    sem converter nem fatiar os dígitos.
+    """
+    if not (len(campos) == 44 and campos.isascii() and campos.isdigit()):
+        return _motivo_chave_generico(campos)
+
+    somas = sum(map(getitem, _TABELAS_CHAVE, campos))
+    if ((somas >> _VALOR_CUF) & _MASCARA) not in _UFS_CHAVE:
+        return CHAVE_UF_INVALIDA
+    if ((somas >> _VALOR_MODELO) & _MASCARA) not in _MODELOS_CHAVE:
+        return CHAVE_MODELO_INVALIDO
+    classe = _CLASSES_SERIE[(somas >> _VALOR_SERIE) & _MASCARA]
+    if classe == _SERIE_INVALIDA:
+        return CHAVE_SERIE_INVALIDA
+
+    emitente_ok = False
+    if classe != _SERIE_CPF:
+        # Soma zero: CNPJ zerado
+        soma_dv1 = (somas >> _SOMA_CNPJ_DV1) & _MASCARA
+        emitente_ok = soma_dv1 > 0 and _confere_dvs_emitente(
+            campos, soma_dv1, (somas >> _SOMA_CNPJ_DV2) & _MASCARA
+        )
+    if not emitente_ok and classe != _SERIE_CNPJ:
+        # CPF com todos os dígitos iguais é inválido
+        inicio = ChaveEdoc.CNPJ_CPF.start + 3
+        emitente_ok = campos.count(
+            campos[inicio], inicio, ChaveEdoc.CNPJ_CPF.stop
+        ) != 11 and _confere_dvs_emitente(
+            campos,
+            (somas >> _SOMA_CPF_DV1) & _MASCARA,
+            (somas >> _SOMA_CPF_DV2) & _MASCARA,
+        )
+    if not emitente_ok:
+        return CHAVE_EMITENTE_INVALIDO
+
+    dv = cnpj_cpf._DV_POR_RESTO[((somas >> _SOMA_DV) & _MASCARA) % 11]
+    if campos[43] != cnpj_cpf._DIGITOS[dv]:
+        return CHAVE_DV_INVALIDO
+    return CHAVE_VALIDA
+
+
+def _mensagem_chave(motivo, campos, chave):
+    """Monta a mensagem de erro de :meth:`ChaveEdoc.validar`."""
+    if motivo == CHAVE_TAMANHO_INVALIDO:
+        return "Chave de acesso invalida: {!r}".format(chave)
+    if motivo == CHAVE_UF_INVALIDA:
+        return ("Chave de acesso invalida (codigo UF: {!r}): {!r}").format(
+            campos[ChaveEdoc.CUF], chave
+        )
+    if motivo == CHAVE_MODELO_INVALIDO:
+        return (
+            "Chave de acesso invalida " "(Modelos não permitidos: {!r}): {!r}"
+        ).format(campos[ChaveEdoc.MODELO], chave)
+    if motivo == CHAVE_SERIE_INVALIDA:
+        return ("Chave de acesso invalida " "(Série: {!r}): {!r}").format(
+            campos[ChaveEdoc.SERIE], chave
+        )
+    if motivo == CHAVE_EMITENTE_INVALIDO:
+        classe = _classe_serie(int(campos[ChaveEdoc.SERIE]))
+        tipo, documento = _documento_emitente(campos, classe)
+        return ("Chave de acesso invalida " "({!r} emitente: {!r}): {!r}").format(
+            tipo, cnpj_cpf.formata(documento), chave
+        )
+    return ("Digito verificador invalido: " "chave={!r}, digito calculado={!r}").format(
+        chave, modulo11(campos[:43])
+    )
+
+
+# ---------------------------------------------------------------------------
+# Leitura de chaves em lote (NumPy)
+# ---------------------------------------------------------------------------
+
+# (coluna, atributo com a fatia na classe da chave); colunas cuja fatia é
+# vazia (FORMA no CF-e SAT) ficam fora do layout
+_CAMPOS_CHAVE = [
+    ("codigo_uf", "CUF"),
+    ("ano_mes", "AAMM"),
+    ("cnpj_cpf_emitente", "CNPJ_CPF"),
+    ("modelo_documento", "MODELO"),
+    ("numero_serie", "SERIE"),
+    ("numero_documento", "NUMERO"),
+    ("forma_emissao", "FORMA"),
+    ("codigo_aleatorio", "CODIGO"),
+    ("digito_verificador", "DV"),
+]
+
+# Colunas devolvidas como texto (bytes), preservando os zeros à esquerda
+_CAMPOS_TEXTO = ("ano_mes", "cnpj_cpf_emitente")
+
+# Linhas processadas por vez, para limitar a memória das matrizes auxiliares:
+# o produto pelos pesos converte os dígitos do bloco para float64, cerca de
+# 5,8 MB (2 ** 14 linhas * 44 dígitos * 8 bytes) por bloco
+_BLOCO_CHAVES = 1 << 14
+
+
+def _layout_chaves(classe):
+    """Retorna ``[(coluna, inicio, fim)]`` e o ``dtype`` estruturado."""
+    np = importar_numpy()
+    campos = []
+    tipos = []
+    for nome, atributo in _CAMPOS_CHAVE:
+        inicio, fim, _ = getattr(classe, atributo).indices(44)
+        largura = fim - inicio
+        if largura <= 0:
+            continue
+        campos.append((nome, inicio, fim))
+        if nome in _CAMPOS_TEXTO:
+            tipos.append((nome, "S%d" % largura))
+        elif largura <= 2:
+            tipos.append((nome, "u1"))
+        elif largura <= 4:
+            tipos.append((nome, "u2"))
+        else:
+            tipos.append((nome, "u4"))
+    tipos.append(("valida", "?"))
+    return campos, np.dtype(tipos)
+
+
+# Tipos lidos como buffer de chaves concatenadas
+_TIPOS_BUFFER = (bytes, bytearray, memoryview, mmap.mmap)
+
+# Espaços descartados no final de um buffer (os de ``bytes.rstrip``)
+_ESPACOS = b" \t\n\r\x0b\x0c"
+
+
+def _formato_buffer(dados):
+    """Lê o formato de um buffer de chaves.
+
+    O buffer tem registros de 44 posições, separados ou não por quebras de
+    linha; o separador (``\\n`` ou ``\\r\\n``) é o que segue o primeiro
+    registro e vale para todos. Espaços no final são ignorados.
+
+    O buffer não é copiado: apenas o final é percorrido para descartar os
+    espaços.
+
+    Returns:
+        tuple: ``(dados, passo, separador, quantidade)``, com ``dados`` um
+            ``memoryview`` do buffer sem os espaços finais; o registro ``i``
+            começa em ``i * passo`` e o último não tem separador.
+
+    Raises:
+        ValueError: Se o tamanho do buffer não for múltiplo do registro.
+    """
+    dados = memoryview(dados).cast("B")
+    fim = len(dados)
+    while fim and dados[fim - 1] in _ESPACOS:
+        fim -= 1
+    dados = dados[:fim]
+    passo = 44
+    if len(dados) > 44:
+        passo = 46 if dados[44:46] == b"\r\n" else 45 if dados[44:45] == b"\n" else 44
+    separador = b"\r\n"[46 - passo :] if passo > 44 else b""
+    quantidade, resto = divmod(len(dados) + len(separador), passo)
+    if resto:
+        raise ValueError("Buffer de chaves com registros de tamanho variável")
+    return dados, passo, separador, quantidade
+
+
+def _codigos_chaves(chaves):
+    """Converte as chaves em uma matriz ``(n, 44)`` de códigos ASCII."""
+    np = importar_numpy()
+    if isinstance(chaves, _TIPOS_BUFFER):
+        dados, passo, separador, quantidade = _formato_buffer(chaves)
+        if not quantidade:
+            return np.zeros((0, 44), dtype=np.uint8)
+        # Vistas com passo sobre o próprio buffer: o último registro não tem
+        # separador, então as linhas não cobrem o buffer inteiro
+        plano = np.frombuffer(dados, dtype=np.uint8)
+        separadores = np.lib.stride_tricks.as_strided(
+            plano[44:],
+            shape=(quantidade - 1, len(separador)),
+            strides=(passo, 1),
+            writeable=False,
+        )
+        if (separadores != np.frombuffer(separador, np.uint8)).any():
+            raise ValueError("Buffer de chaves com registros de tamanho variável")
+        return np.lib.stride_tricks.as_strided(
+            plano, shape=(quantidade, 44), strides=(passo, 1), writeable=False
+        )
+
+    if isinstance(chaves, np.ndarray) and chaves.dtype.kind in "SU":
+        chaves = chaves.ravel()
+        if chaves.dtype.itemsize == 44:
+            return np.ascontiguousarray(chaves).view(np.uint8).reshape(-1, 44)
+        if chaves.dtype.itemsize == 44 * 4:
+            codigos = np.ascontiguousarray(chaves).view(np.uint32).reshape(-1, 44)
+            return np.where(codigos < 128, codigos, 0).astype(np.uint8)
+        chaves = chaves.tolist()
+
+    # Chaves de outro tamanho viram linhas vazias (inválidas)
+    vazia = "\0" * 44
+    texto = "".join(
+        (c.decode("latin-1") if isinstance(c, bytes) else c) if len(c) == 44 else vazia
+        for c in chaves
+    )
+    codigos = np.frombuffer(texto.encode("ascii", "replace"), dtype=np.uint8)
+    return codigos.reshape(-1, 44)
+
+
+def _dv_modulo11(somas):
+    np = importar_numpy()
+    resto = somas % 11
+    return np.where(resto < 2, 0, 11 - resto)
+
+
+def _coluna_pesos(pesos, inicio):
+    np = importar_numpy()
+    coluna = np.zeros(44)
+    coluna[inicio : inicio + len(pesos)] = pesos
+    return coluna
+
+
+def _pesos_chaves(campos):
+    """Matriz ``(44, m)`` cujo produto pelos dígitos das chaves fornece, de
+    uma vez, o valor de cada coluna numérica e as somas ponderadas usadas
+    na validação (``float64``: exato para estes valores e calculado via
+    BLAS)."""
+    np = importar_numpy()
+    colunas = {}
+    for nome, inicio, fim in campos + [
+        ("_cuf", ChaveEdoc.CUF.start, ChaveEdoc.CUF.stop),
+        ("_modelo", ChaveEdoc.MODELO.start, ChaveEdoc.MODELO.stop),
+        ("_serie", ChaveEdoc.SERIE.start, ChaveEdoc.SERIE.stop),
+    ]:
+        colunas[nome] = _coluna_pesos(
+            10.0 ** np.arange(fim - inicio - 1, -1, -1), inicio
+        )
+
+    emitente = ChaveEdoc.CNPJ_CPF.start
+    pesos_cnpj = cnpj_cpf._PESOS_DV
+    colunas["_cnpj_dv1"] = _coluna_pesos(pesos_cnpj[1:], emitente)
+    colunas["_cnpj_dv2"] = _coluna_pesos(pesos_cnpj[:12], emitente)
+    colunas["_cpf_dv1"] = _coluna_pesos(range(10, 1, -1), emitente + 3)
+    colunas["_cpf_dv2"] = _coluna_pesos(range(11, 2, -1), emitente + 3)
+    # modulo11: pesos 2 a 9, da direita para a esquerda
+    colunas["_dv"] = _coluna_pesos(2 + np.arange(42, -1, -1) % 8, 0)
+
+    nomes = [nome for nome in colunas if nome not in _CAMPOS_TEXTO]
+    return nomes, np.stack([colunas[nome] for nome in nomes], axis=1)
+
+
+def _motivos_chaves(digitos, formato_ok, valores):
+    """Versão vetorizada de :func:`_motivo_chave`: código de cada linha."""
+    np = importar_numpy()
+    serie = valores["_serie"]
+    documento = digitos[:, ChaveEdoc.CNPJ_CPF]
+
+    dv1 = _dv_modulo11(valores["_cnpj_dv1"])
+    dv2 = _dv_modulo11(valores["_cnpj_dv2"] + dv1 * cnpj_cpf._PESOS_DV[12])
+    cnpj_ok = (
+        documento[:, :12].any(axis=1)
+        & (documento[:, 12] == dv1)
+        & (documento[:, 13] == dv2)
+    )
+
+    cpf = documento[:, 3:]
+    dv1 = _dv_modulo11(valores["_cpf_dv1"])
+    dv2 = _dv_modulo11(valores["_cpf_dv2"] + dv1 * 2)
+    cpf_ok = (
+        (cpf.min(axis=1) != cpf.max(axis=1)) & (cpf[:, 9] == dv1) & (cpf[:, 10] == dv2)
+    )
+
+    # Séries 910-969: CPF; 890-899: CNPJ ou CPF; demais: CNPJ
+    emitente_ok = np.where(
+        serie >= 910,
+        cpf_ok,
+        np.where((serie >= 890) & (serie <= 899), cnpj_ok | cpf_ok, cnpj_ok),
+    )
+
+    # np.select usa a primeira condição verdadeira, na ordem de validar()
+    return np.select(
+        [
+            ~formato_ok,
+            ~np.isin(valores["_cuf"], list(_UFS_CHAVE)),
+            ~np.isin(valores["_modelo"], list(_MODELOS_CHAVE)),
+            serie > 969,
+            ~emitente_ok,
+            _dv_modulo11(valores["_dv"]) != digitos[:, 43],
+        ],
+        [
+            CHAVE_TAMANHO_INVALIDO,
+            CHAVE_UF_INVALIDA,
+            CHAVE_MODELO_INVALIDO,
+            CHAVE_SERIE_INVALIDA,
+            CHAVE_EMITENTE_INVALIDO,
+            CHAVE_DV_INVALIDO,
+        ],
+        CHAVE_VALIDA,
+    ).astype(np.uint8)
+
+
+def _ler_bloco(bloco, nomes, pesos):
+    """Retorna os dígitos, a máscara das linhas com 44 dígitos e os valores
+    de cada coluna de ``pesos`` para um bloco de códigos ASCII."""
+    np = importar_numpy()
+    # Caracteres que não são dígitos resultam em valores acima de 9
+    digitos = bloco - np.uint8(48)
+    formato_ok = (digitos <= 9).all(axis=1)
+    digitos[~formato_ok] = 0
+
+    somas = (digitos @ pesos).astype(np.int64)
+    return digitos, formato_ok, dict(zip(nomes, somas.T))
+
+
+def parse_chaves(chaves, classe=ChaveEdoc):
+    """Lê chaves de acesso em lote para um array estruturado NumPy.
+
+    Usa as mesmas fatias de ``classe`` (``CUF``, ``AAMM``, ``CNPJ_CPF``,
+    ``MODELO``, ``SERIE``, ``NUMERO``, ``FORMA``, ``CODIGO`` e ``DV``), sem
+    criar um objeto por chave. Cada fatia vira uma coluna com o nome da
+    propriedade correspondente: ``ano_mes`` (``AAMM``) e
+    ``cnpj_cpf_emitente`` (sem máscara) em bytes, com os zeros à esquerda,
+    e as demais como inteiros sem sinal. Com :class:`ChaveCFeSAT` a série e
+    o número têm os tamanhos do CF-e SAT e não há ``forma_emissao``.
+
+    A coluna ``valida`` indica se a chave passaria em
+    :meth:`ChaveEdoc.validar`. Chaves que não têm 44 dígitos ficam com todas
+    as colunas zeradas e ``valida`` falso.
+
+    Args:
+        chaves: Iterável de chaves (``str``), array NumPy ``S44``/``U44`` ou
+            buffer (``bytes``, ``mmap``) com as chaves concatenadas,
+            separadas ou não por quebras de linha.
+        classe: :class:`ChaveEdoc` ou :class:`ChaveCFeSAT`.
+
+    Returns:
+        numpy.ndarray: Array estruturado com uma linha por chave.
+    """
+    np = importar_numpy()
+    if np is None:
+        raise ImportError("parse_chaves requer NumPy")
+
+    campos, dtype = _layout_chaves(classe)
+    nomes, pesos = _pesos_chaves(campos)
+    codigos = _codigos_chaves(chaves)
+    resultado = np.zeros(len(codigos), dtype=dtype)
+    textos = [
+        (nome, inicio, fim) for nome, inicio, fim in campos if nome in _CAMPOS_TEXTO
+    ]
+
+    for inicio in range(0, len(codigos), _BLOCO_CHAVES):
+        bloco = codigos[inicio : inicio + _BLOCO_CHAVES]
+        digitos, formato_ok, valores = _ler_bloco(bloco, nomes, pesos)
+        motivos = _motivos_chaves(digitos, formato_ok, valores)
+        valores["valida"] = motivos == CHAVE_VALIDA
+
+        linhas = resultado[inicio : inicio + len(bloco)]
+        for nome in dtype.names:
+            if nome not in _CAMPOS_TEXTO:
+                linhas[nome] = valores[nome]
+        for nome, comeco, fim in textos:
+            texto = np.ascontiguousarray(digitos[:, comeco:fim] + np.uint8(48))
+            linhas[nome] = texto.view(dtype[nome]).ravel()
+            linhas[nome][~formato_ok] = b""
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Validação de chaves em lote
+# ---------------------------------------------------------------------------
+
+
+def _codigo_chave(chave):
+    if isinstance(chave, bytes):
+        chave = chave.decode("latin-1")
+    matcher = CHAVE_REGEX.match(chave)
+    if not matcher:
+        return CHAVE_TAMANHO_INVALIDO
+    return _motivo_chave(matcher.group("campos"))
+
+
+def _dividir_buffer(dados):
+    """Separa as chaves de um buffer com as mesmas regras de
+    :func:`_codigos_chaves` (ver :func:`_formato_buffer`)."""
+    dados, passo, separador, quantidade = _formato_buffer(dados)
+    chaves = []
+    for inicio in range(0, quantidade * passo, passo):
+        fim = min(inicio + passo, len(dados))
+        if dados[inicio + 44 : fim] != separador[: fim - inicio - 44]:
+            raise ValueError("Buffer de chaves com registros de tamanho variável")
+        chaves.append(dados[inicio : inicio + 44].tobytes())
+    return chaves
+
+
+def validar_chaves(chaves):
+    """Valida chaves de acesso em lote, sem exceções.
+
+    Aplica as regras de :meth:`ChaveEdoc.validar` e retorna, para cada
+    chave, o código da primeira regra que falhou: ``CHAVE_VALIDA``,
+    ``CHAVE_TAMANHO_INVALIDO`` (não tem 44 dígitos), ``CHAVE_UF_INVALIDA``,
+    ``CHAVE_MODELO_INVALIDO``, ``CHAVE_SERIE_INVALIDA``,
+    ``CHAVE_EMITENTE_INVALIDO`` ou ``CHAVE_DV_INVALIDO``. Nenhuma mensagem
+    é montada; use :func:`mensagem_chave` apenas para as chaves que
+    interessarem.
+
+    Com NumPy as chaves são validadas em blocos, como em
+    :func:`parse_chaves`.
+
+    Args:
+        chaves: Iterável de chaves (``str`` ou ``bytes``), array NumPy
+            ``S44``/``U44`` ou buffer (``bytes``, ``mmap``) com as chaves
+            concatenadas, separadas ou não por quebras de linha.
+
+    Returns:
+        numpy.ndarray | list: Códigos (``uint8``) na ordem de entrada; uma
+            lista de ``int`` quando o NumPy não está instalado.
+    """
+    np = importar_numpy()
+    if np is None:
+        if isinstance(chaves, _TIPOS_BUFFER):
+            chaves = _dividir_buffer(chaves)
+        return [_codigo_chave(chave) for chave in chaves]
+
+    buffer = isinstance(chaves, _TIPOS_BUFFER)
+    if isinstance(chaves, np.ndarray):
+        chaves = chaves.ravel()
+    elif not buffer:
+        chaves = list(chaves)
+
+    nomes, pesos = _pesos_chaves([])
+    codigos = _codigos_chaves(chaves)
+    motivos = np.empty(len(codigos), dtype=np.uint8)
+    for inicio in range(0, len(codigos), _BLOCO_CHAVES):
+        bloco = codigos[inicio : inicio + _BLOCO_CHAVES]
+        motivos[inicio : inicio + len(bloco)] = _motivos_chaves(
+            *_ler_bloco(bloco, nomes, pesos)
+        )
+
+    # Itens que não são 44 dígitos ASCII (outros tamanhos, dígitos Unicode
+    # aceitos por CHAVE_REGEX) são conferidos um a um
+    if not buffer:
+        for indice in np.flatnonzero(motivos == CHAVE_TAMANHO_INVALIDO):
+            motivos[indice] = _codigo_chave(chaves[indice])
+    return motivos
+
+
+def mensagem_chave(chave, codigo=None):
+    """Mensagem de erro de :meth:`ChaveEdoc.validar` para ``chave``.
+
+    Args:
+        chave (str): Chave de acesso.
+        codigo (int): Código retornado por :func:`validar_chaves`; se
+            omitido, a chave é validada novamente.
+
+    Returns:
+        str | None: A mensagem, ou ``None`` se a chave é válida.
+    """
+    if isinstance(chave, bytes):
+        chave = chave.decode("latin-1")
+    if codigo is None:
+        codigo = _codigo_chave(chave)
+    if codigo == CHAVE_VALIDA:
+        return None
+    matcher = CHAVE_REGEX.match(chave)
+    if matcher:
+        # ChaveEdoc guarda apenas os campos (sem a quebra de linha final que
+        # CHAVE_REGEX aceita), e é deles que :meth:`ChaveEdoc.validar` monta
+        # a mensagem
+        chave = matcher.group("campos")
+    return _mensagem_chave(codigo, chave, chave)
+
+
+# ---------------------------------------------------------------------------
+# Análise de numeração
+# ---------------------------------------------------------------------------
+
+ResultadoNumeracao = namedtuple(
+    "ResultadoNumeracao",
+    [
+        "cnpj_cpf_emitente",
+        "modelo_documento",
+        "numero_serie",
+        "quantidade",
+        "primeiro",
+        "ultimo",
+        "lacunas",
+        "duplicados",
+        "fora_de_ordem",
+    ],
+)
+ResultadoNumeracao.__doc__ = """Numeração de uma série de um emitente.
+
+``lacunas`` é a lista de faixas ``(inicio, fim)`` de números ausentes entre
+``primeiro`` e ``ultimo``; ``duplicados`` mapeia cada número repetido para
+o número de ocorrências; ``fora_de_ordem`` lista os ``(numero, ano_mes)``
+emitidos em um mês anterior ao do número imediatamente menor da série (uma
+entrada por par de números vizinhos, independente da ordem das chaves).
+"""
+
+
+class _Numeracao(object):
+    """Números de uma série como intervalos contíguos, com o ano/mês das
+    pontas de cada intervalo.
+
+    As inversões de mês entre números consecutivos são registradas quando
+    os dois números se juntam em um intervalo; as inversões entre intervalos
+    separados por lacunas só são calculadas em :meth:`fora_de_ordem`, a
+    partir da lista final de intervalos.
+    """
+
+    __slots__ = (
+        "inicios",
+        "fins",
+        "meses_inicio",
+        "meses_fim",
+        "quantidade",
+        "duplicados",
+        "inversoes",
+    )
+
+    def __init__(self):
+        self.inicios = []
+        self.fins = []
+        self.meses_inicio = []
+        self.meses_fim = []
+        self.quantidade = 0
+        self.duplicados = {}
+        self.inversoes = []
+
+    def adicionar(self, numero, ano_mes):
+        self.quantidade += 1
+        inicios = self.inicios
+        fins = self.fins
+        # Intervalo que começa em ou antes de numero
+        i = bisect_right(inicios, numero) - 1
+        if i >= 0 and numero <= fins[i]:
+            self.duplicados[numero] = self.duplicados.get(numero, 1) + 1
+            return
+
+        proximo = i + 1
+        tem_proximo = proximo < len(inicios)
+        junta_anterior = i >= 0 and fins[i] == numero - 1
+        junta_proximo = tem_proximo and inicios[proximo] == numero + 1
+        if junta_anterior and ano_mes < self.meses_fim[i]:
+            self.inversoes.append((numero, ano_mes))
+        if junta_proximo and self.meses_inicio[proximo] < ano_mes:
+            self.inversoes.append((numero + 1, self.meses_inicio[proximo]))
+        if junta_anterior and junta_proximo:
+            fins[i] = fins.pop(proximo)
+            self.meses_fim[i] = self.meses_fim.pop(proximo)
+            del inicios[proximo]
+            del self.meses_inicio[proximo]
+        elif junta_anterior:
+            fins[i] = numero
+            self.meses_fim[i] = ano_mes
+        elif junta_proximo:
+            inicios[proximo] = numero
+            self.meses_inicio[proximo] = ano_mes
+        else:
+            inicios.insert(proximo, numero)
+            fins.insert(proximo, numero)
+            self.meses_inicio.insert(proximo, ano_mes)
+            self.meses_fim.insert(proximo, ano_mes)
+
+    def lacunas(self):
+        return [
+            (fim + 1, inicio - 1) for fim, inicio in zip(self.fins, self.inicios[1:])
+        ]
+
+    def fora_de_ordem(self):
+        inversoes = list(self.inversoes)
+        for i in range(1, len(self.inicios)):
+            if self.meses_inicio[i] < self.meses_fim[i - 1]:
+                inversoes.append((self.inicios[i], self.meses_inicio[i]))
+        return sorted(inversoes)
+
+
+class AnaliseNumeracao(object):
+    """Lacunas, duplicidades e inversões de mês na numeração de chaves de
+    acesso, por emitente, modelo e série.
+
+    As chaves são consumidas uma a uma (não precisam estar ordenadas) e cada
+    série guarda apenas os intervalos de números contíguos já vistos, de
+    modo que a memória é proporcional ao número de lacunas e anomalias e não
+    ao número de chaves::
+
+        analise = AnaliseNumeracao()
+        analise.adicionar_chaves(chaves)
+        for resultado in analise.resultados():
+            print(resultado.numero_serie, resultado.lacunas)
+
+    Args:
+        classe: :class:`ChaveEdoc` ou :class:`ChaveCFeSAT`, que define as
+            fatias de série e número.
+        validar (bool): Descarta as chaves que não passam em
+            :meth:`ChaveEdoc.validar`.
+    """
+
+    def __init__(self, classe=ChaveEdoc, validar=False):
+        self.classe = classe
+        self.validar = validar
+        self.invalidas = 0
+        self._series = {}
+
+    def adicionar(self, chave):
+        """Registra uma chave (``str`` ou :class:`ChaveEdoc`).
+
+        Chaves que não têm 44 dígitos (ou inválidas, com ``validar``) são
+        apenas contadas em ``invalidas``.
+        """
+        campos = chave.campos if isinstance(chave, ChaveEdoc) else chave
+        if not (len(campos) == 44 and campos.isascii() and campos.isdigit()):
+            matcher = CHAVE_REGEX.match(campos)
+            if not matcher:
+                self.invalidas += 1
+                return
+            campos = matcher.group("campos")
+        if self.validar and _motivo_chave(campos) != CHAVE_VALIDA:
+            self.invalidas += 1
+            return
+
+        classe = self.classe
+        serie = (campos[classe.CNPJ_CPF], campos[classe.MODELO], campos[classe.SERIE])
+        numeracao = self._series.get(serie)
+        if numeracao is None:
+            numeracao = self._series[serie] = _Numeracao()
+        numeracao.adicionar(int(campos[classe.NUMERO]), campos[classe.AAMM])
+
+    def adicionar_chaves(self, chaves):
+        """Registra cada chave de um iterável."""
+        for chave in chaves:
+            self.adicionar(chave)
+
+    def resultados(self):
+        """Retorna um :class:`ResultadoNumeracao` por série, ordenados por
+        emitente, modelo e série.
+
+        Returns:
+            list: Resultados com as lacunas entre o primeiro e o último
+                número de cada série.
+        """
+        resultados = []
+        for serie, numeracao in sorted(self._series.items()):
+            resultados.append(
+                ResultadoNumeracao(
+                    *serie,
+                    quantidade=numeracao.quantidade,
+                    primeiro=numeracao.inicios[0],
+                    ultimo=numeracao.fins[-1],
+                    lacunas=numeracao.lacunas(),
+                    duplicados=dict(sorted(numeracao.duplicados.items())),
+                    fora_de_ordem=numeracao.fora_de_ordem(),
+                )
+            )
+        return resultados
+
+
+# ---------------------------------------------------------------------------
+# Geração de chaves em sequência
+# ---------------------------------------------------------------------------
+
+
+def _tabela_trecho(inicio, tamanho):
+    """Contribuição para a soma do DV da chave de cada valor de um trecho
+    de ``tamanho`` dígitos a partir da posição ``inicio``."""
+    pesos = _PESOS_CHAVE[0][inicio : inicio + tamanho]
+    return tuple(
+        sum(int(c) * peso for c, peso in zip("{:0{}d}".format(valor, tamanho), pesos))
+        for valor in range(10**tamanho)
+    )
+
+
+# Número do documento (9 dígitos) em três trechos de 3 dígitos
+_DV_NUMERO = [_tabela_trecho(ChaveEdoc.NUMERO.start + i, 3) for i in (0, 3, 6)]
+# Código numérico (8 dígitos) em trechos de 2, 3 e 3 dígitos
+_DV_CODIGO = [
+    _tabela_trecho(ChaveEdoc.CODIGO.start, 2),
+    _tabela_trecho(ChaveEdoc.CODIGO.start + 2, 3),
+    _tabela_trecho(ChaveEdoc.CODIGO.start + 5, 3),
+]
+# Soma de d ** 9 dos dígitos de cada trecho de 3 dígitos, para o código
+# numérico de ChaveEdoc.calculo_codigo_aleatorio
+_POTENCIAS_TRECHO = tuple(
+    sum(int(c) ** 9 for c in "{:03d}".format(valor)) for valor in range(1000)
+)
+
+
+def gerar_chaves(
+    emitente,
+    modelo,
+    serie,
+    numero_inicial,
+    quantidade,
+    codigo_uf,
+    ano_mes,
+    forma_emissao=1,
+):
+    """Gera chaves de acesso com números de documento consecutivos.
+
+    Cada chave é idêntica à de ``ChaveEdoc(...).chave`` com os mesmos
+    campos, inclusive o código numérico calculado por
+    :meth:`ChaveEdoc.calculo_codigo_aleatorio`. A parte fixa da chave
+    (UF, ano/mês, emitente, modelo, série e forma de emissão) entra nas
+    somas do código numérico e do DV uma única vez; para cada número só são
+    somadas as contribuições do número e do código, tiradas de tabelas.
+
+    Args:
+        emitente (str): CNPJ ou CPF do emitente, com ou sem máscara.
+        modelo (int | str): Modelo do documento (``55``, ``65``...).
+        serie (int | str): Série do documento.
+        numero_inicial (int): Número do primeiro documento.
+        quantidade (int): Quantidade de chaves.
+        codigo_uf (int): Código IBGE da UF.
+        ano_mes (str): Ano e mês de emissão (``AAMM``).
+        forma_emissao (int | str): Forma de emissão.
+
+    Yields:
+        str: Chave de acesso com 44 dígitos.
+    """
+    prefixo = (
+        str(codigo_uf).zfill(ChaveEdoc.CUF.stop - ChaveEdoc.CUF.start)
+        + ano_mes
+        + str(punctuation_rm(emitente)).zfill(
+            ChaveEdoc.CNPJ_CPF.stop - ChaveEdoc.CNPJ_CPF.start
+        )
+        + str(modelo).zfill(ChaveEdoc.MODELO.stop - ChaveEdoc.MODELO.start)
+        + str(serie).zfill(ChaveEdoc.SERIE.stop - ChaveEdoc.SERIE.start)
+    )
+    forma = str(forma_emissao).zfill(ChaveEdoc.FORMA.stop - ChaveEdoc.FORMA.start)
+    fixos = prefixo + "0" * 9 + forma
+    if not (len(fixos) == ChaveEdoc.CODIGO.start and fixos.isdigit()):
+        raise ValueError("Campos da chave de acesso inválidos: {!r}".format(fixos))
+    ultimo = numero_inicial + quantidade - 1
+    if numero_inicial < 1 or ultimo >= 10**9:
+        raise ValueError(
+            "Numeração fora do intervalo 1 a 999999999: {} a {}".format(
+                numero_inicial, ultimo
+            )
+        )
+
+    # Com o número zerado, as somas ficam só com a parte fixa
+    soma_codigo = sum(int(c) ** 9 for c in fixos)
+    soma_dv = sum(int(c) * peso for c, peso in zip(fixos, _PESOS_CHAVE[0]))
+    numero0, numero1, numero2 = _DV_NUMERO
+    codigo0, codigo1, codigo2 = _DV_CODIGO
+    potencias = _POTENCIAS_TRECHO
+    restos = cnpj_cpf._DV_POR_RESTO
+    molde = prefixo + "%09d" + forma + "%08d%d"
+
+    for numero in range(numero_inicial, ultimo + 1):
+        n0, resto = divmod(numero, 1000000)
+        n1, n2 = divmod(resto, 1000)
+        codigo = soma_codigo + potencias[n0] + potencias[n1] + potencias[n2]
+        # Últimos 8 dígitos da soma, como em calculo_codigo_aleatorio
+        codigo %= 100000000
+        c0, resto = divmod(codigo, 1000000)
+        c1, c2 = divmod(resto, 1000)
+        soma = (
+            soma_dv
+            + numero0[n0]
+            + numero1[n1]
+            + numero2[n2]
+            + codigo0[c0]
+            + codigo1[c1]
+            + codigo2[c2]
+        )
+        yield molde % (numero, codigo, restos[soma % 11])
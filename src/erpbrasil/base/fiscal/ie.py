@@ -3,7 +3,15 @@
 # Copyright (C) 2023  Gabriel Krauss - KMEE
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
+import random
 import re
+import threading
+from collections import namedtuple
+
+from ..misc import LRUCache
+from ..misc import SomaPonderada
+from ..misc import importar_numpy
+from ..misc import permutacao
 
 PARAMETERS = {
     "ac": {
@@ -102,63 +110,110 @@ PARAMETERS = {
 
 
 def validar(uf, inscr_est):
-    result = True
-    try:
-        validar_by_uf = globals()["validar_%s" % uf]
-        if not validar_by_uf(inscr_est):
-            result = False
-    except KeyError:
-        if not validar_param(uf, inscr_est):
-            result = False
-    return result
+    cache = _cache_global
+    if cache is not None:
+        return cache.validar(uf, inscr_est)
+    return _validar(uf, inscr_est)
+
+
+def _validar(uf, inscr_est):
+    validar_by_uf = _VALIDADORES.get(uf)
+    if validar_by_uf is None:
+        return True
+    return bool(validar_by_uf(inscr_est))
 
 
 def validar_param(uf, inscr_est):
-    if uf not in PARAMETERS:
+    validar_by_param = _VALIDADORES_PARAM.get(uf)
+    if validar_by_param is None:
         return True
+    return validar_by_param(inscr_est)
 
-    tam = PARAMETERS[uf].get("tam", 0)
-    inscr_est = inscr_est.strip().rjust(int(tam), "0")
-    inscr_est = re.sub("[^0-9]", "", inscr_est)
-    val_tam = PARAMETERS[uf].get("val_tam", tam - 1)
 
-    if isinstance(tam, list):
-        i = tam.find(len(inscr_est))
-        if i == -1:
-            return False
-        else:
-            val_tam = val_tam[i]
-    else:
-        if len(inscr_est) != tam:
+# Regra de uma UF descrita em PARAMETERS, já resolvida: ``pesos`` traz a
+# tupla de pesos de cada DV, a partir da posição ``val_tam``
+_RegraParam = namedtuple(
+    "_RegraParam", ["tam", "val_tam", "starts_with", "divisor", "pesos", "usa_resto"]
+)
+
+
+def _compilar_regra_param(uf, parametros):
+    tam = parametros.get("tam", 0)
+    val_tam = parametros.get("val_tam", tam - 1)
+
+    # A cada DV calculado, os pesos ganham um novo elemento à esquerda
+    prod = parametros.get("prod", [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])[-val_tam:]
+    pesos = []
+    for _ in range(tam - val_tam):
+        pesos.append(tuple(prod))
+        prod = [prod[0] + 1] + prod
+
+    return _RegraParam(
+        tam=tam,
+        val_tam=val_tam,
+        starts_with=parametros.get("starts_with", ""),
+        divisor=parametros.get("div", 11),
+        pesos=tuple(pesos),
+        usa_resto=uf == "rr",
+    )
+
+
+def _normalizar_param(regra, inscr_est):
+    return re.sub("[^0-9]", "", inscr_est.strip().rjust(regra.tam, "0"))
+
+
+def _compilar_dvs_param(regra):
+    """Lista ``(posição, SomaPonderada)`` dos DVs de uma UF de ``PARAMETERS``."""
+    restos = list(range(regra.divisor)) if regra.usa_resto else None
+    return [
+        (posicao, SomaPonderada(pesos_dv, regra.divisor, restos))
+        for posicao, pesos_dv in enumerate(regra.pesos, regra.val_tam)
+    ]
+
+
+def _compilar_validador_param(uf, regra, dvs):
+    """Gera o validador de uma UF descrita em ``PARAMETERS``.
+
+    Tamanhos, prefixo, divisor e os pesos de cada DV são resolvidos uma
+    única vez; o validador gerado apenas normaliza e confere os DVs.
+    """
+    tam, starts_with = regra.tam, regra.starts_with
+
+    def validar_by_param(inscr_est):
+        inscr_est = re.sub("[^0-9]", "", inscr_est.strip().rjust(tam, "0"))
+        if len(inscr_est) != tam or not inscr_est.startswith(starts_with):
             return False
+        for posicao, dv in dvs:
+            if not dv.confere(inscr_est, posicao):
+                return False
+        return True
 
-    sw = PARAMETERS[uf].get("starts_with", "")
-    if not inscr_est.startswith(sw):
-        return False
+    validar_by_param.__name__ = "validar_param_%s" % uf
+    return validar_by_param
 
-    inscr_est_ints = [int(c) for c in inscr_est]
-    nova_ie = inscr_est_ints[:val_tam]
-    prod = PARAMETERS[uf].get("prod", [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2])
-    prod = prod[-val_tam:]
 
-    while len(nova_ie) < tam:
-        r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % PARAMETERS[uf].get(
-            "div", 11
-        )
+# Pesos de cada UF com regra própria, pré-calculados por SomaPonderada
 
-        if r > 1:
-            f = 11 - r
-        else:
-            f = 0
+# AP: 'p' e 'd' dependem da faixa dos 8 primeiros dígitos
+_DV_AP = [
+    (3017000, SomaPonderada([9, 8, 7, 6, 5, 4, 3, 2], constante=5)),
+    (
+        3019022,
+        SomaPonderada(
+            [9, 8, 7, 6, 5, 4, 3, 2],
+            restos=[1, 0] + list(range(9, 0, -1)),
+            constante=9,
+        ),
+    ),
+    (None, SomaPonderada([9, 8, 7, 6, 5, 4, 3, 2])),
+]
 
-        if uf not in "rr":
-            nova_ie.append(f)
-        else:
-            nova_ie.append(r)
-        prod.insert(0, prod[0] + 1)
 
-    # Se o número gerado coincidir com o número original, é válido
-    return nova_ie == inscr_est_ints
+def _dv_ap(inscr_est):
+    inscr_est_int = int(inscr_est[:8])
+    for limite, dv in _DV_AP:
+        if limite is None or inscr_est_int <= limite:
+            return dv
 
 
 def validar_ap(inscr_est):
@@ -174,77 +229,58 @@ def validar_ap(inscr_est):
 
     # Pega apenas os 8 primeiros dígitos da inscrição estadual e
     # define os valores de 'p' e 'd'
-    inscr_est_int = int(inscr_est[:8])
-    if inscr_est_int <= 3017000:
-        inscr_est_p = 5
-        inscr_est_d = 0
-    elif inscr_est_int <= 3019022:
-        inscr_est_p = 9
-        inscr_est_d = 1
-    else:
-        inscr_est_p = 0
-        inscr_est_d = 0
+    return _dv_ap(inscr_est).confere(inscr_est, 8)
 
-    # Pega apenas os 8 primeiros dígitos da inscrição estadual e
-    # gera o dígito verificador
-    inscr_est = list(map(int, inscr_est))
-    nova_ie = inscr_est[:8]
-
-    prod = [9, 8, 7, 6, 5, 4, 3, 2]
-    r = (inscr_est_p + sum([x * y for (x, y) in zip(nova_ie, prod)])) % 11
-    if r > 1:
-        f = 11 - r
-    elif r == 1:
-        f = 0
-    else:
-        f = inscr_est_d
-    nova_ie.append(f)
 
-    return nova_ie == inscr_est
+# BA: (tamanho, dígito que define o módulo) -> (DV final, DV anterior) para
+# os módulos 10 e 11; o DV final entra no cálculo do anterior
+_DV_BA = {
+    tam: {
+        modulo: (
+            SomaPonderada(pesos[1:], modulo, restos),
+            SomaPonderada(pesos[:-1] + [0, pesos[-1]], modulo, restos),
+        )
+        for modulo, restos in (
+            (10, [0] + [10 - r for r in range(1, 10)]),
+            (11, [0, 0] + [11 - r for r in range(2, 11)]),
+        )
+    }
+    for tam, pesos in ((8, [8, 7, 6, 5, 4, 3, 2]), (9, [9, 8, 7, 6, 5, 4, 3, 2]))
+}
+
+
+def _dvs_ba(inscr_est):
+    # O módulo é definido pelo primeiro dígito (8 posições) ou pelo
+    # segundo (9 posições)
+    if inscr_est[len(inscr_est) - 8] in "0123458":
+        modulo = 10
+    else:
+        modulo = 11
+    return _DV_BA[len(inscr_est)][modulo]
 
 
 def validar_ba(inscr_est):
     inscr_est = re.sub("[^0-9]", "", inscr_est)
-    inscr_est = list(map(int, inscr_est))
 
     # verificando o tamanho da inscrição estadual
-    if len(inscr_est) == 8:
-        tam = 8
-        val_tam = 6
-        test_digit = 0
-    elif len(inscr_est) == 9:
-        tam = 9
-        val_tam = 7
-        test_digit = 1
-    else:
+    if len(inscr_est) not in _DV_BA:
         return False
 
-    nova_ie = inscr_est[:val_tam]
+    dv_final, dv_anterior = _dvs_ba(inscr_est)
+    return dv_final.confere(inscr_est, -1) and dv_anterior.confere(inscr_est, -2)
 
-    prod = [8, 7, 6, 5, 4, 3, 2][-val_tam:]
 
-    if inscr_est[test_digit] in [0, 1, 2, 3, 4, 5, 8]:
-        modulo = 10
-    else:
-        modulo = 11
+# GO: 'd' vale 1 na faixa 10103105 a 10119997
+_DV_GO = SomaPonderada([9, 8, 7, 6, 5, 4, 3, 2])
+_DV_GO_FAIXA = SomaPonderada(
+    [9, 8, 7, 6, 5, 4, 3, 2], restos=[0, 1] + list(range(9, 0, -1))
+)
 
-    while len(nova_ie) < tam:
-        r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % modulo
-        if r > 0:
-            f = modulo - r
-        else:
-            f = 0
 
-        if f >= 10 and modulo == 11:
-            f = 0
-
-        if len(nova_ie) == val_tam:
-            nova_ie.append(f)
-        else:
-            nova_ie.insert(val_tam, f)
-        prod.insert(0, prod[0] + 1)
-
-    return nova_ie == inscr_est
+def _dv_go(inscr_est):
+    if 10103105 <= int(inscr_est[:8]) <= 10119997:
+        return _DV_GO_FAIXA
+    return _DV_GO
 
 
 def validar_go(inscr_est):
@@ -260,29 +296,19 @@ def validar_go(inscr_est):
         return False
 
     # Pega apenas os 8 primeiros dígitos da inscrição estadual e
-    # define os valores de 'p' e 'd'
-    inscr_est_int = int(inscr_est[:8])
-    if inscr_est_int >= 10103105 and inscr_est_int <= 10119997:
-        inscr_est_d = 1
-    else:
-        inscr_est_d = 0
+    # define o valor de 'd'
+    return _dv_go(inscr_est).confere(inscr_est, 8)
 
-    # Pega apenas os 8 primeiros dígitos da inscrição estadual e
-    # gera o dígito verificador
-    inscr_est = list(map(int, inscr_est))
-    nova_ie = inscr_est[:8]
-
-    prod = [9, 8, 7, 6, 5, 4, 3, 2]
-    r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-    if r > 1:
-        f = 11 - r
-    elif r == 1:
-        f = inscr_est_d
-    else:
-        f = 0
-    nova_ie.append(f)
 
-    return nova_ie == inscr_est
+# MG: o primeiro DV soma os algarismos dos produtos, com um zero inserido
+# após o terceiro dígito (o que desloca a alternância dos pesos)
+_DV1_MG = SomaPonderada(
+    [1, 2, 1, 1, 2, 1, 2, 1, 2, 1, 2],
+    modulo=10,
+    restos=[0] + [10 - r for r in range(1, 10)],
+    luhn=True,
+)
+_DV2_MG = SomaPonderada([3, 2, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2])
 
 
 def validar_mg(inscr_est):
@@ -299,211 +325,113 @@ def validar_mg(inscr_est):
 
     inscr_est = re.sub("[^0-9]", "", inscr_est)
 
+    # Inscrições antigas, com 11 dígitos, são aceitas sem conferência de DV
+    if len(inscr_est) == 11:
+        return True
+
     # verificando o tamanho da inscrição estadual
-    if len(inscr_est) not in [13, 11]:
+    if len(inscr_est) != 13:
         return False
 
-    # Pega apenas os 11 primeiros dígitos da inscrição estadual e
-    # gera os dígitos verificadores
-    inscr_est = list(map(int, inscr_est))
-    nova_ie = inscr_est[:11]
-    if len(inscr_est) == 11:
-        nova_ie = inscr_est
-
-    nova_ie_aux = list(nova_ie)
-    nova_ie_aux.insert(3, 0)
-    prod = [1, 2, 1, 2, 1, 2, 1, 2, 1, 2, 1, 2]
-    r = str([x * y for (x, y) in zip(nova_ie_aux, prod)])
-    r = re.sub("[^0-9]", "", r)
-    r = list(map(int, r))
-    r = sum(r)
-    r2 = (r // 10 + 1) * 10
-    r = r2 - r
-
-    if r >= 10:
-        r = 0
-
-    nova_ie.append(r)
-
-    prod = [3, 2, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2]
-    r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-    if r > 1:
-        f = 11 - r
-    else:
-        f = 0
-    nova_ie.append(f)
+    return _DV1_MG.confere(inscr_est, 11) and _DV2_MG.confere(inscr_est, 12)
+
 
-    return nova_ie == inscr_est
+_DV_PE = (
+    SomaPonderada([8, 7, 6, 5, 4, 3, 2]),
+    SomaPonderada([9, 8, 7, 6, 5, 4, 3, 2]),
+)
+# Formato antigo, com 14 dígitos: DV = 11 - r, menos 10 se passar de 10
+_DV_PE_14 = SomaPonderada(
+    [5, 4, 3, 2, 1, 9, 8, 7, 6, 5, 4, 3, 2],
+    restos=[1, None] + list(range(9, 0, -1)),
+)
 
 
 def validar_pe(inscr_est):
     inscr_est = re.sub("[^0-9]", "", inscr_est)
 
-    # verificando o tamanho da inscrição estadual
-    if (len(inscr_est) != 9) and (len(inscr_est) != 14):
-        return False
-
-    inscr_est = list(map(int, inscr_est))
-
     # verificando o tamanho da inscrição estadual
     if len(inscr_est) == 9:
-        # Pega apenas os 7 primeiros dígitos da inscrição estadual e
-        # gera os dígitos verificadores
-        inscr_est = list(map(int, inscr_est))
-        nova_ie = inscr_est[:7]
-
-        prod = [8, 7, 6, 5, 4, 3, 2]
-        while len(nova_ie) < 9:
-            r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-            if r > 1:
-                f = 11 - r
-            else:
-                f = 0
-            nova_ie.append(f)
-            prod.insert(0, 9)
+        # Os 7 primeiros dígitos geram os dois dígitos verificadores
+        return _DV_PE[0].confere(inscr_est, 7) and _DV_PE[1].confere(inscr_est, 8)
     elif len(inscr_est) == 14:
-        # Pega apenas os 13 primeiros dígitos da inscrição estadual e
-        # gera o dígito verificador
-        inscr_est = list(map(int, inscr_est))
-        nova_ie = inscr_est[:13]
-
-        prod = [5, 4, 3, 2, 1, 9, 8, 7, 6, 5, 4, 3, 2]
-        r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-        f = 11 - r
-        if f > 10:
-            f = f - 10
-        nova_ie.append(f)
-
-    return nova_ie == inscr_est
+        # Os 13 primeiros dígitos geram o dígito verificador
+        return _DV_PE_14.confere(inscr_est, 13)
+    return False
+
+
+# RN: o resto é calculado sobre a soma multiplicada por 10
+_DV_RN = {
+    tam: SomaPonderada(
+        [10 * p for p in [10, 9, 8, 7, 6, 5, 4, 3, 2][10 - tam :]],
+        restos=list(range(10)) + [0],
+    )
+    for tam in (9, 10)
+}
 
 
 def validar_rn(inscr_est):
-    def gera_digito_rn(nova_ie, prod):
-        r = (sum([x * y for (x, y) in zip(nova_ie, prod)]) * 10) % 11
-        if r == 10:
-            r = 0
-        return r
-
     inscr_est = re.sub("[^0-9]", "", inscr_est)
-    inscr_est = list(map(int, inscr_est))
-    aux = [2, 0]
-    if inscr_est[:2] == aux[:2]:
-        if len(inscr_est) == 9:
-            nova_ie = inscr_est[:8]
-            prod = [9, 8, 7, 6, 5, 4, 3, 2]
-            f = gera_digito_rn(nova_ie, prod)
-            nova_ie.append(f)
-
-        elif len(inscr_est) == 10:
-            nova_ie = inscr_est[:9]
-            prod = [10, 9, 8, 7, 6, 5, 4, 3, 2]
-            f = gera_digito_rn(nova_ie, prod)
-            nova_ie.append(f)
-        else:
-            return False
-    else:
+    if not inscr_est.startswith("20") or len(inscr_est) not in _DV_RN:
         return False
+    return _DV_RN[len(inscr_est)].confere(inscr_est, -1)
 
-    return nova_ie == inscr_est
 
+# RO: DV = 11 - r, menos 10 se passar de 9. No formato de 9 dígitos os 3
+# primeiros são desprezados
+_RESTOS_RO = [1, 0] + list(range(9, 0, -1))
+_DV_RO = {
+    9: SomaPonderada([0, 0, 0, 6, 5, 4, 3, 2], restos=_RESTOS_RO),
+    14: SomaPonderada([6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2], restos=_RESTOS_RO),
+}
 
-def validar_ro(inscr_est):
-    def gera_digito_ro(nova_ie, prod):
-        r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-        f = 11 - r
-        if f > 9:
-            f = f - 10
-        return f
 
+def validar_ro(inscr_est):
     inscr_est = re.sub("[^0-9]", "", inscr_est)
-    inscr_est = list(map(int, inscr_est))
 
     # verificando o tamanho da inscrição estadual
-    if len(inscr_est) == 9:
-        # Despreza-se os 3 primeiros dígitos, pega apenas os 8 primeiros
-        # dígitos da inscrição estadual e gera o dígito verificador
-        nova_ie = inscr_est[3:8]
-
-        prod = [6, 5, 4, 3, 2]
-        f = gera_digito_ro(nova_ie, prod)
-        nova_ie.append(f)
-
-        nova_ie = inscr_est[0:3] + nova_ie
-    elif len(inscr_est) == 14:
-        # Pega apenas os 13 primeiros dígitos da inscrição estadual e
-        # gera o dígito verificador
-        nova_ie = inscr_est[:13]
-
-        prod = [6, 5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
-        f = gera_digito_ro(nova_ie, prod)
-        nova_ie.append(f)
-    else:
+    if len(inscr_est) not in _DV_RO:
         return False
+    return _DV_RO[len(inscr_est)].confere(inscr_est, -1)
 
-    return nova_ie == inscr_est
 
+# SP: restos 10 viram 0; para produtor rural o resto 10 não admite DV
+_DV1_SP = SomaPonderada([1, 3, 4, 5, 6, 7, 8, 10], restos=list(range(10)) + [0])
+_DV2_SP = SomaPonderada(
+    [3, 2, 10, 9, 8, 7, 6, 5, 4, 3, 2], restos=list(range(10)) + [0]
+)
+_DV_SP_PR = SomaPonderada([1, 3, 4, 5, 6, 7, 8, 10], restos=list(range(10)) + [None])
 
-def validar_sp(inscr_est):
-    def gera_digito_sp(nova_ie, prod):
-        r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-        if r < 10:
-            return r
-        elif r == 10:
-            return 0
-        else:
-            return 1
-
-    def gera_digito_sp_pr(nova_ie, prod):
-        r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-        return r
 
-    # Industriais e comerciais
-    if inscr_est[0] != "P":
+def validar_sp(inscr_est):
+    # Industriais e comerciais (a inscrição vazia cai aqui e é inválida)
+    if inscr_est[:1] != "P":
         inscr_est = re.sub("[^0-9]", "", inscr_est)
 
         # verificando o tamanho da inscrição estadual
         if len(inscr_est) != 12:
             return False
 
-        # Pega apenas os 8 primeiros dígitos da inscrição estadual e
-        # gera o primeiro dígito verificador
-        inscr_est = list(map(int, inscr_est))
-        nova_ie = inscr_est[:8]
-
-        prod = [1, 3, 4, 5, 6, 7, 8, 10]
-        f = gera_digito_sp(nova_ie, prod)
-        nova_ie.append(f)
-
-        # gera o segundo dígito verificador
-        nova_ie.extend(inscr_est[9:11])
-        prod = [3, 2, 10, 9, 8, 7, 6, 5, 4, 3, 2]
-        f = gera_digito_sp(nova_ie, prod)
-        nova_ie.append(f)
+        # Os 8 primeiros dígitos geram o primeiro dígito verificador, que
+        # entra no cálculo do segundo
+        return _DV1_SP.confere(inscr_est, 8) and _DV2_SP.confere(inscr_est, 11)
 
     # Produtor rural
-    else:
-        inscr_est = re.sub("[^0-9]", "", inscr_est)
-
-        # verificando o tamanho da inscrição estadual
-        if len(inscr_est) != 12:
-            return False
+    inscr_est = re.sub("[^0-9]", "", inscr_est)
 
-        # verificando o primeiro dígito depois do 'P'
-        if inscr_est[0] != "0":
-            return False
+    # verificando o tamanho da inscrição estadual
+    if len(inscr_est) != 12:
+        return False
 
-        # Pega apenas os 8 primeiros dígitos da inscrição estadual e
-        # gera o dígito verificador
-        inscr_est = list(map(int, inscr_est))
-        nova_ie = inscr_est[:8]
+    # verificando o primeiro dígito depois do 'P'
+    if inscr_est[0] != "0":
+        return False
 
-        prod = [1, 3, 4, 5, 6, 7, 8, 10]
-        f = gera_digito_sp_pr(nova_ie, prod)
-        nova_ie.append(f)
+    # Os 8 primeiros dígitos geram o dígito verificador
+    return _DV_SP_PR.confere(inscr_est, 8)
 
-        nova_ie.extend(inscr_est[9:])
 
-    return nova_ie == inscr_est
+_DV_TO = SomaPonderada([9, 8, 7, 6, 5, 4, 3, 2])
 
 
 def validar_to(inscr_est):
@@ -519,29 +447,96 @@ def validar_to(inscr_est):
     if len(inscr_est) != 9:
         return False
 
-    # Pega apenas os dígitos que entram no cálculo
-    inscr_est = list(map(int, inscr_est))
-    nova_ie = inscr_est[:8]
+    return _DV_TO.confere(inscr_est, 8)
+
+
+# Layout de formatação de uma UF. ``mascaras`` associa a quantidade de
+# dígitos ao template compilado; entradas com ``minimo`` a ``tam - 1``
+# dígitos são completadas com zeros à esquerda e, com ``preenche_bruto``,
+# o preenchimento é feito antes de remover a pontuação (AP e GO)
+_Layout = namedtuple(
+    "_Layout", ["mascaras", "tam", "minimo", "preenche_bruto", "prefixo"]
+)
+
+
+def _compilar_mascara(mascara):
+    """Converte uma máscara (``#`` para cada dígito) em template de format."""
+    return mascara.replace("{", "{{").replace("}", "}}").replace("#", "{}")
+
+
+def _layout(mascaras, tam=0, minimo=0, preenche_bruto=False, prefixo=""):
+    mascaras = {m.count("#"): _compilar_mascara(m) for m in mascaras}
+    return _Layout(mascaras, tam, minimo, preenche_bruto, prefixo)
+
+
+def _layout_param(parametros):
+    # A máscara é obtida aplicando o formato da UF a ``tam`` marcadores. O
+    # formato de PR descarta o último dígito, por isso a chave é ``tam`` e
+    # não a quantidade de marcadores
+    tam = parametros.get("tam", 0)
+    mascara = _compilar_mascara(parametros["format"]("#" * tam))
+    return _Layout({tam: mascara}, tam, 0, False, "")
+
+
+def _escolher_layout(uf, inscr_est):
+    if uf == "sp" and inscr_est.startswith("P"):
+        return _LAYOUT_SP_PRODUTOR
+    return _LAYOUTS.get(uf)
 
-    prod = [9, 8, 7, 6, 5, 4, 3, 2]
-    r = sum([x * y for (x, y) in zip(nova_ie, prod)]) % 11
-    if r > 1:
-        f = 11 - r
-    else:
-        f = 0
-    nova_ie.append(f)
-    return nova_ie == inscr_est
+
+def _digitos_layout(layout, inscr_est):
+    if layout.preenche_bruto:
+        inscr_est = inscr_est.strip().rjust(layout.tam, "0")
+    digitos = re.sub("[^0-9]", "", inscr_est)
+    if layout.minimo <= len(digitos) < layout.tam:
+        digitos = digitos.rjust(layout.tam, "0")
+    return digitos
 
 
 def formata(uf, inscr_est):
-    try:
-        formata_by_uf = globals()["formata_%s" % uf]
-        inscr_est = formata_by_uf(inscr_est)
-    except KeyError:
-        inscr_est = re.sub("[^0-9]", "", inscr_est)
-        inscr_est = formata_param(uf, inscr_est)
+    cache = _cache_global
+    if cache is not None:
+        return cache.formata(uf, inscr_est)
+    return _formata(uf, inscr_est)
 
-    return inscr_est
+
+def _formata(uf, inscr_est):
+    layout = _escolher_layout(uf, inscr_est)
+    if layout is None:
+        return re.sub("[^0-9]", "", inscr_est)
+
+    digitos = _digitos_layout(layout, inscr_est)
+    template = layout.mascaras.get(len(digitos))
+    if template is None:
+        return digitos
+    return template.format(*digitos)
+
+
+def formata_lote(pares):
+    """Formata uma coleção de pares ``(uf, inscr_est)``.
+
+    :param pares: Iterável de tuplas ``(uf, inscr_est)``.
+    :return: Lista com as inscrições formatadas, na ordem de entrada.
+    """
+    return [formata(uf, inscr_est) for uf, inscr_est in pares]
+
+
+def desformata(uf, inscr_est):
+    """Remove a máscara de uma inscrição estadual.
+
+    Usa o mesmo layout de :func:`formata`: a inscrição volta aos dígitos que
+    seriam formatados (com o preenchimento de zeros da UF) e o produtor
+    rural de SP mantém o ``P``. Sempre que ``formata`` aplica a máscara,
+    ``formata(uf, desformata(uf, x))`` é igual a ``formata(uf, x)``.
+
+    :param uf: Sigla da UF, em minúsculas.
+    :param inscr_est: Inscrição estadual, formatada ou não.
+    :return: Inscrição estadual sem máscara.
+    """
+    layout = _escolher_layout(uf, inscr_est)
+    if layout is None:
+        return re.sub("[^0-9]", "", inscr_est)
+    return layout.prefixo + _digitos_layout(layout, inscr_est)
 
 
 def formata_param(uf, inscr_est):
@@ -560,91 +555,577 @@ def formata_param(uf, inscr_est):
 
 
 def formata_ap(inscr_est):
-    tam = 9
-    inscr_est = inscr_est.strip().rjust(int(tam), "0")
-    inscr_est = re.sub("[^0-9]", "", inscr_est)
-    if len(inscr_est) == tam:
-        inscr_est = "{0}.{1}.{2}-{3}".format(
-            inscr_est[:2], inscr_est[2:5], inscr_est[5:8], inscr_est[8:9]
-        )
-    return inscr_est
+    return formata("ap", inscr_est)
 
 
 def formata_ba(inscr_est):
-    inscr_est = re.sub("[^0-9]", "", inscr_est)
-    if len(inscr_est) == 8:
-        inscr_est = inscr_est.rjust(9, "0")
-    if len(inscr_est) == 9:
-        inscr_est = "{0}.{1}.{2}".format(inscr_est[:3], inscr_est[3:6], inscr_est[6:9])
-
-    return inscr_est
+    return formata("ba", inscr_est)
 
 
 def formata_go(inscr_est):
-    tam = 9
-    inscr_est = inscr_est.strip().rjust(int(tam), "0")
-    inscr_est = re.sub("[^0-9]", "", inscr_est)
-    if len(inscr_est) == tam:
-        inscr_est = "{0}.{1}.{2}-{3}".format(
-            inscr_est[:2], inscr_est[2:5], inscr_est[5:8], inscr_est[8:9]
-        )
-
-    return inscr_est
+    return formata("go", inscr_est)
 
 
 def formata_mg(inscr_est):
-    inscr_est = re.sub("[^0-9]", "", inscr_est)
-    if len(inscr_est) == 13:
-        inscr_est = "{0}.{1}.{2}/{3}-{4}".format(
-            inscr_est[:3],
-            inscr_est[3:6],
-            inscr_est[6:9],
-            inscr_est[9:11],
-            inscr_est[11:13],
-        )
-    return inscr_est
+    return formata("mg", inscr_est)
 
 
 def formata_pe(inscr_est):
-    inscr_est = re.sub("[^0-9]", "", inscr_est)
-    if len(inscr_est) == 9:
-        inscr_est = "{0}-{1}".format(inscr_est[:7], inscr_est[7:9])
-
-    if len(inscr_est) == 14:
-        inscr_est = "{0}.{1}.{2}.{3}-{4}".format(
-            inscr_est[:2], inscr_est[2], inscr_est[3:6], inscr_est[6:13], inscr_est[13]
-        )
-    return inscr_est
+    return formata("pe", inscr_est)
 
 
 def formata_rn(inscr_est):
-    inscr_est = re.sub("[^0-9]", "", inscr_est)
-    if len(inscr_est) == 9:
-        inscr_est = "{0}.{1}.{2}-{3}".format(
-            inscr_est[:2], inscr_est[2:5], inscr_est[5:8], inscr_est[8:9]
-        )
-
-    if len(inscr_est) == 10:
-        inscr_est = "{0}.{1}.{2}-{3}".format(
-            inscr_est[:3], inscr_est[3:6], inscr_est[6:9], inscr_est[9:10]
-        )
-    return inscr_est
+    return formata("rn", inscr_est)
 
 
 def formata_sp(inscr_est):
-    # Adicionar a formatação para IEs normal e para produtor rural
-    if re.match("P", inscr_est) is None:
-        # Se IE normal
-        inscr_est = re.sub("[^0-9]", "", inscr_est)
-        if len(inscr_est) == 12:
-            inscr_est = "{0}.{1}.{2}.{3}".format(
-                inscr_est[:3], inscr_est[3:6], inscr_est[6:9], inscr_est[9:12]
+    # IEs normal e de produtor rural (iniciada por 'P')
+    return formata("sp", inscr_est)
+
+
+# ---------------------------------------------------------------------------
+# Registro dos validadores e formatadores por UF, montado na importação
+# ---------------------------------------------------------------------------
+
+_REGRAS_PARAM = {
+    uf: _compilar_regra_param(uf, parametros) for uf, parametros in PARAMETERS.items()
+}
+
+_DVS_PARAM = {uf: _compilar_dvs_param(regra) for uf, regra in _REGRAS_PARAM.items()}
+
+_VALIDADORES_PARAM = {
+    uf: _compilar_validador_param(uf, regra, _DVS_PARAM[uf])
+    for uf, regra in _REGRAS_PARAM.items()
+}
+
+_VALIDADORES = dict(_VALIDADORES_PARAM)
+_VALIDADORES.update(
+    {
+        "ap": validar_ap,
+        "ba": validar_ba,
+        "go": validar_go,
+        "mg": validar_mg,
+        "pe": validar_pe,
+        "rn": validar_rn,
+        "ro": validar_ro,
+        "sp": validar_sp,
+        "to": validar_to,
+    }
+)
+
+_LAYOUTS = {
+    uf: _layout_param(parametros)
+    for uf, parametros in PARAMETERS.items()
+    if "format" in parametros
+}
+_LAYOUTS.update(
+    {
+        "ap": _layout(["##.###.###-#"], tam=9, minimo=9, preenche_bruto=True),
+        "ba": _layout(["###.###.###"], tam=9, minimo=8),
+        "go": _layout(["##.###.###-#"], tam=9, minimo=9, preenche_bruto=True),
+        "mg": _layout(["###.###.###/##-##"]),
+        "pe": _layout(["#######-##", "##.#.###.#######-#"]),
+        "rn": _layout(["##.###.###-#", "###.###.###-#"]),
+        "sp": _layout(["###.###.###.###"]),
+    }
+)
+_LAYOUT_SP_PRODUTOR = _layout(["P-########.#/###"], prefixo="P")
+
+# ---------------------------------------------------------------------------
+# Cache de normalização e validação
+# ---------------------------------------------------------------------------
+
+_cache_global = None
+
+
+class CachedValidator(object):
+    """Validação e formatação de IEs com cache LRU limitado.
+
+    Os resultados de :func:`validar` e de :func:`formata` são guardados em
+    entradas separadas, indexadas pelo par ``(uf, inscr_est)`` como
+    recebido: uma consulta só calcula o que foi pedido. As estatísticas são
+    mantidas também por UF. Seguro para uso entre threads.
+
+    :param int maxsize: Número máximo de inscrições mantidas no cache.
+    """
+
+    def __init__(self, maxsize=4096):
+        self._cache = LRUCache(maxsize)
+        self._lock = threading.Lock()
+        self._consultas = {}
+        self._calculos = {}
+
+    def _calcular(self, chave):
+        funcao, uf, inscr_est = chave
+        with self._lock:
+            self._calculos[uf] = self._calculos.get(uf, 0) + 1
+        return funcao(uf, inscr_est)
+
+    def _consultar(self, funcao, uf, inscr_est):
+        with self._lock:
+            self._consultas[uf] = self._consultas.get(uf, 0) + 1
+        return self._cache.get((funcao, uf, inscr_est), self._calcular)
+
+    def validar(self, uf, inscr_est):
+        """Mesmo contrato de :func:`validar`, consultando o cache."""
+        return self._consultar(_validar, uf, inscr_est)
+
+    def formata(self, uf, inscr_est):
+        """Mesmo contrato de :func:`formata`, consultando o cache."""
+        return self._consultar(_formata, uf, inscr_est)
+
+    __call__ = validar
+
+    def stats(self):
+        """Retorna ``hits``, ``misses``, ``evictions``, ``currsize`` e
+        ``maxsize`` do cache, e em ``por_uf`` os ``hits`` e ``misses`` de
+        cada UF."""
+        stats = self._cache.stats()
+        with self._lock:
+            stats["por_uf"] = {
+                uf: {
+                    "hits": consultas - self._calculos.get(uf, 0),
+                    "misses": self._calculos.get(uf, 0),
+                }
+                for uf, consultas in self._consultas.items()
+            }
+        return stats
+
+    def clear(self):
+        """Esvazia o cache e zera as estatísticas."""
+        with self._lock:
+            self._cache.clear()
+            self._consultas.clear()
+            self._calculos.clear()
+
+
+def ativar_cache(maxsize=4096):
+    """Ativa um :class:`CachedValidator` global.
+
+    A partir da chamada, :func:`validar` e :func:`formata` (e as funções
+    que dependem delas) passam a consultar o cache.
+
+    :param int maxsize: Número máximo de inscrições mantidas no cache.
+    :return: O :class:`CachedValidator` global, para consulta de ``stats()``.
+    """
+    global _cache_global
+    _cache_global = CachedValidator(maxsize)
+    return _cache_global
+
+
+def desativar_cache():
+    """Desativa o cache global de IEs."""
+    global _cache_global
+    _cache_global = None
+
+
+# ---------------------------------------------------------------------------
+# Validação em lote
+# ---------------------------------------------------------------------------
+
+
+def _matriz_digitos(digitos, tam):
+    """Converte strings de exatamente ``tam`` dígitos ASCII em uma matriz
+    ``(n, tam)``."""
+    np = importar_numpy()
+    texto = "".join(digitos).encode("ascii")
+    matriz = np.frombuffer(texto, dtype=np.uint8).reshape(-1, tam)
+    return matriz.astype(np.int64) - 48
+
+
+def _digitos_param(regra, inscr_est):
+    # Inscrições já limpas dispensam a normalização por regex
+    if len(inscr_est) == regra.tam and inscr_est.isdigit() and inscr_est.isascii():
+        return inscr_est
+    return _normalizar_param(regra, inscr_est)
+
+
+def _matriz_param(regra, ies):
+    """Normaliza ``ies`` em uma matriz ``(n, tam)`` de dígitos.
+
+    Arrays NumPy ``S``/``U`` com ``tam`` posições são reinterpretados sem
+    cópia dos caracteres; só as linhas com algum caractere que não é dígito
+    passam pela normalização de :func:`validar_param`. Retorna também a
+    máscara das linhas que resultaram em ``tam`` dígitos.
+    """
+    np = importar_numpy()
+    tam = regra.tam
+    if isinstance(ies, np.ndarray) and ies.dtype.kind in "SU":
+        largura = 4 if ies.dtype.kind == "U" else 1
+        if ies.dtype.itemsize == tam * largura:
+            codigos = np.ascontiguousarray(ies).view(
+                np.uint32 if largura == 4 else np.uint8
             )
+            matriz = codigos.reshape(-1, tam).astype(np.int64) - 48
+            validas = ((matriz >= 0) & (matriz <= 9)).all(axis=1)
+            for n in np.flatnonzero(~validas):
+                inscr_est = ies.flat[n]
+                if isinstance(inscr_est, bytes):
+                    inscr_est = inscr_est.decode("latin-1")
+                digitos = _normalizar_param(regra, inscr_est)
+                if len(digitos) == tam:
+                    matriz[n] = [ord(c) - 48 for c in digitos]
+                    validas[n] = True
+            return matriz, validas
+        ies = [i.decode("latin-1") if isinstance(i, bytes) else i for i in ies.tolist()]
+
+    normalizadas = [_digitos_param(regra, i) for i in ies]
+    validas = np.array([len(i) == tam for i in normalizadas], dtype=bool)
+    zeros = "0" * tam
+    matriz = _matriz_digitos(
+        [i if v else zeros for i, v in zip(normalizadas, validas)], tam
+    )
+    return matriz, validas
+
+
+def _validar_param_lote(regra, ies):
+    np = importar_numpy()
+    matriz, validas = _matriz_param(regra, ies)
+    if regra.starts_with:
+        prefixo = np.array([int(c) for c in regra.starts_with])
+        validas &= (matriz[:, : len(prefixo)] == prefixo).all(axis=1)
+
+    for posicao, pesos_dv in enumerate(regra.pesos, regra.val_tam):
+        r = matriz[:, :posicao] @ np.array(pesos_dv) % regra.divisor
+        if not regra.usa_resto:
+            r = np.where(r > 1, 11 - r, 0)
+        validas &= matriz[:, posicao] == r
+    return validas
+
+
+def validar_param_lote(uf, inscricoes):
+    """Valida uma coluna de inscrições de uma UF descrita em ``PARAMETERS``.
+
+    Com NumPy instalado a coluna vira uma matriz de dígitos e cada DV é
+    conferido de uma vez (produto pelo vetor de pesos, módulo 11 ou o
+    módulo 9 de RR); sem NumPy é usado :func:`validar_param` item a item.
+    O resultado é idêntico ao de :func:`validar_param`.
+
+    :param uf: Sigla da UF, em minúsculas.
+    :param inscricoes: Iterável de inscrições ou array NumPy ``S``/``U``.
+    :return: ``numpy.ndarray`` booleano na ordem de entrada (``list`` sem
+        NumPy).
+    """
+    regra = _REGRAS_PARAM.get(uf)
+    np = importar_numpy()
+    if np is None:
+        return [validar_param(uf, i) for i in inscricoes]
+    if not isinstance(inscricoes, np.ndarray):
+        inscricoes = list(inscricoes)
+    if regra is None:
+        return np.ones(len(inscricoes), dtype=bool)
+    return _validar_param_lote(regra, inscricoes)
+
+
+def _validar_sp_lote(ies):
+    np = importar_numpy()
+    # Produtor rural ("P...") segue pelo validador escalar; entradas vazias
+    # ficam sem dígitos e são inválidas
+    resultado = np.zeros(len(ies), dtype=bool)
+    escalar = [n for n, i in enumerate(ies) if i[:1] == "P"]
+    for n in escalar:
+        resultado[n] = validar_sp(ies[n])
+
+    vetorial = np.ones(len(ies), dtype=bool)
+    vetorial[escalar] = False
+    digitos = [re.sub("[^0-9]", "", i) if v else "" for i, v in zip(ies, vetorial)]
+    validas = vetorial & np.array([len(d) == 12 for d in digitos], dtype=bool)
+    matriz = _matriz_digitos([d if len(d) == 12 else "0" * 12 for d in digitos], 12)
+
+    # gera_digito_sp: resto 10 -> 0 (o resto nunca passa de 10)
+    dv1 = matriz[:, :8] @ np.array([1, 3, 4, 5, 6, 7, 8, 10]) % 11 % 10
+    dv2 = matriz[:, :11] @ np.array([3, 2, 10, 9, 8, 7, 6, 5, 4, 3, 2]) % 11 % 10
+    validas &= (matriz[:, 8] == dv1) & (matriz[:, 11] == dv2)
+    return resultado | validas
+
+
+# Pesos do DV1 de MG sobre os 11 primeiros dígitos (o zero inserido na 4ª
+# posição desloca a alternância 1, 2 dos dígitos seguintes)
+_PESOS_MG_DV1 = (1, 2, 1, 1, 2, 1, 2, 1, 2, 1, 2)
+
+
+def _validar_mg_lote(ies):
+    np = importar_numpy()
+    digitos = [re.sub("[^0-9]", "", i) for i in ies]
+    # Inscrições com 11 dígitos são sempre aceitas por validar_mg
+    resultado = np.array([len(d) == 11 for d in digitos], dtype=bool)
+    validas = np.array([len(d) == 13 for d in digitos], dtype=bool)
+    matriz = _matriz_digitos([d if len(d) == 13 else "0" * 13 for d in digitos], 13)
+
+    # DV1: soma dos algarismos de cada produto (estilo Luhn)
+    produtos = matriz[:, :11] * np.array(_PESOS_MG_DV1)
+    soma = (produtos - 9 * (produtos > 9)).sum(axis=1)
+    dv1 = (10 - soma % 10) % 10
+
+    r = matriz[:, :12] @ np.array([3, 2, 11, 10, 9, 8, 7, 6, 5, 4, 3, 2]) % 11
+    dv2 = np.where(r > 1, 11 - r, 0)
+    validas &= (matriz[:, 11] == dv1) & (matriz[:, 12] == dv2)
+    return resultado | validas
+
+
+def _validadores_lote():
+    validadores = {
+        uf: (lambda ies, regra=regra: _validar_param_lote(regra, ies))
+        for uf, regra in _REGRAS_PARAM.items()
+        if _VALIDADORES[uf] is _VALIDADORES_PARAM[uf]
+    }
+    validadores["sp"] = _validar_sp_lote
+    validadores["mg"] = _validar_mg_lote
+    return validadores
+
+
+_VALIDADORES_LOTE = _validadores_lote()
+
+
+def validar_lote(pares):
+    """Valida uma coleção de pares ``(uf, inscr_est)``.
+
+    Os pares são agrupados por UF e cada grupo é validado de uma vez. Com
+    NumPy instalado, SP, MG e as UFs descritas em ``PARAMETERS`` usam
+    somas ponderadas vetorizadas; as demais UFs (ou todas, sem NumPy) usam
+    :func:`validar` item a item. O resultado é idêntico ao de
+    :func:`validar`.
+
+    :param pares: Iterável de tuplas ``(uf, inscr_est)``.
+    :return: ``numpy.ndarray`` booleano na ordem de entrada (``list`` sem
+        NumPy).
+    """
+    pares = list(pares)
+    grupos = {}
+    for n, (uf, _) in enumerate(pares):
+        grupos.setdefault(uf, []).append(n)
+
+    np = importar_numpy()
+    if np is None:
+        resultado = [False] * len(pares)
+        validadores = {}
     else:
-        # Se produtor rural
-        inscr_est = re.sub("[^0-9]", "", inscr_est)
-        if len(inscr_est) == 12:
-            inscr_est = "P-{0}.{1}/{2}".format(
-                inscr_est[:8], inscr_est[8:9], inscr_est[9:12]
-            )
-    return inscr_est
+        resultado = np.zeros(len(pares), dtype=bool)
+        validadores = _VALIDADORES_LOTE
+
+    for uf, indices in grupos.items():
+        ies = [pares[n][1] for n in indices]
+        validar_grupo = validadores.get(uf)
+        if validar_grupo is None:
+            validas = [validar(uf, i) for i in ies]
+        else:
+            validas = validar_grupo(ies)
+        for n, valida in zip(indices, validas):
+            resultado[n] = valida
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Detecção da UF
+# ---------------------------------------------------------------------------
+
+# Tamanhos (em dígitos) e prefixos aceitos pelos validadores próprios
+_ACEITOS_CUSTOM = {
+    "ap": ((9, "03"),),
+    "ba": ((8, ""), (9, "")),
+    "go": ((9, "10"), (9, "11"), (9, "20")),
+    "mg": ((11, ""), (13, "")),
+    "pe": ((9, ""), (14, "")),
+    "rn": ((9, "20"), (10, "20")),
+    "ro": ((9, ""), (14, "")),
+    "sp": ((12, ""),),
+    "to": ((9, ""),),
+}
+
+
+def _aceitos_param(regra):
+    # Entradas curtas são completadas com zeros à esquerda: com k dígitos,
+    # os ``tam - k`` primeiros caracteres do prefixo precisam ser zeros
+    for k in range(regra.tam + 1):
+        zeros = regra.tam - k
+        if not regra.starts_with[:zeros].strip("0"):
+            yield k, regra.starts_with[zeros:]
+
+
+def _indice_uf():
+    indice = {}
+    for uf in sorted(_VALIDADORES):
+        if _VALIDADORES[uf] is _VALIDADORES_PARAM.get(uf):
+            aceitos = _aceitos_param(_REGRAS_PARAM[uf])
+        else:
+            aceitos = _ACEITOS_CUSTOM[uf]
+        for tamanho, prefixo in aceitos:
+            indice.setdefault(tamanho, []).append((prefixo, uf))
+    return indice
+
+
+# Quantidade de dígitos -> [(prefixo, uf), ...]
+_INDICE_UF = _indice_uf()
+
+
+def _candidatas_uf(inscr_est):
+    digitos = re.sub("[^0-9]", "", inscr_est)
+    return [
+        uf
+        for prefixo, uf in _INDICE_UF.get(len(digitos), ())
+        if digitos.startswith(prefixo)
+    ]
+
+
+def detectar_uf(inscr_est):
+    """Retorna as UFs para as quais a inscrição estadual é válida.
+
+    Em vez de testar as 27 UFs, o dígito verificador só é calculado para
+    as UFs cujo tamanho e prefixo são compatíveis com a inscrição.
+
+    :param inscr_est: Inscrição estadual, formatada ou não.
+    :return: Lista ordenada das siglas (minúsculas) das UFs válidas.
+    """
+    return [uf for uf in _candidatas_uf(inscr_est) if validar(uf, inscr_est)]
+
+
+def detectar_uf_lote(inscricoes):
+    """Versão em lote de :func:`detectar_uf`.
+
+    Os pares ``(uf candidata, inscrição)`` de todo o lote são validados de
+    uma vez por :func:`validar_lote`.
+
+    :param inscricoes: Iterável de inscrições estaduais.
+    :return: Lista com a lista de UFs válidas de cada inscrição.
+    """
+    inscricoes = list(inscricoes)
+    pares = []
+    donos = []
+    for n, inscr_est in enumerate(inscricoes):
+        for uf in _candidatas_uf(inscr_est):
+            pares.append((uf, inscr_est))
+            donos.append(n)
+
+    resultado = [[] for _ in inscricoes]
+    for n, (uf, _), valida in zip(donos, pares, validar_lote(pares)):
+        if valida:
+            resultado[n].append(uf)
+    return resultado
+
+
+# ---------------------------------------------------------------------------
+# Geração de inscrições válidas
+# ---------------------------------------------------------------------------
+
+
+# Formatos de cada UF com regra própria: (prefixos, tamanho, DVs). Os DVs
+# são pares ``(posição, SomaPonderada)``, na ordem de cálculo, com as mesmas
+# instâncias da validação; quando a instância depende da própria inscrição,
+# no lugar dela vai a função que a escolhe. As demais posições recebem o
+# prefixo seguido dos dígitos livres
+_FORMATOS_CUSTOM = {
+    "ap": [(("03",), 9, [(8, _dv_ap)])],
+    "ba": [
+        (
+            ("",),
+            tam,
+            [
+                (tam - 1, lambda inscr_est: _dvs_ba(inscr_est)[0]),
+                (tam - 2, lambda inscr_est: _dvs_ba(inscr_est)[1]),
+            ],
+        )
+        for tam in (8, 9)
+    ],
+    "go": [(("10", "11", "20"), 9, [(8, _dv_go)])],
+    "mg": [(("",), 13, [(11, _DV1_MG), (12, _DV2_MG)])],
+    "pe": [
+        (("",), 9, [(7, _DV_PE[0]), (8, _DV_PE[1])]),
+        (("",), 14, [(13, _DV_PE_14)]),
+    ],
+    "rn": [(("20",), tam, [(tam - 1, _DV_RN[tam])]) for tam in (9, 10)],
+    "ro": [(("",), tam, [(tam - 1, _DV_RO[tam])]) for tam in (9, 14)],
+    "sp": [(("",), 12, [(8, _DV1_SP), (11, _DV2_SP)])],
+    "to": [(("",), 9, [(8, _DV_TO)])],
+}
+
+
+def _formatos(uf, produtor_rural):
+    if produtor_rural:
+        if uf != "sp":
+            raise ValueError("Inscrição de produtor rural só existe para SP")
+        return [(("0",), 12, [(8, _DV_SP_PR)])]
+    if uf not in _VALIDADORES:
+        raise ValueError("UF sem regra de validação: {!r}".format(uf))
+    if _VALIDADORES[uf] is _VALIDADORES_PARAM.get(uf):
+        regra = _REGRAS_PARAM[uf]
+        return [((regra.starts_with,), regra.tam, _DVS_PARAM[uf])]
+    return _FORMATOS_CUSTOM[uf]
+
+
+def _livres(formato):
+    prefixos, tam, dvs = formato
+    return tam - len(dvs) - len(prefixos[0])
+
+
+def _percorrer_formato(formato, seed):
+    prefixos, tam, dvs = formato
+    livres = _livres(formato)
+    espaco = 10**livres
+    posicoes_dv = {posicao for posicao, _ in dvs}
+    posicoes_corpo = [posicao for posicao in range(tam) if posicao not in posicoes_dv]
+
+    # As posições de DV ainda não calculadas não entram na soma: o peso de
+    # cada DV na própria posição é zero ou inexistente
+    inscr_est = ["0"] * tam
+    for valor in permutacao(len(prefixos) * espaco, len(prefixos) * espaco, seed):
+        indice, valor = divmod(valor, espaco)
+        corpo = prefixos[indice] + "{:0{}d}".format(valor, livres)
+        for posicao, digito in zip(posicoes_corpo, corpo):
+            inscr_est[posicao] = digito
+        for posicao, dv in dvs:
+            digitos = "".join(inscr_est)
+            if not isinstance(dv, SomaPonderada):
+                dv = dv(digitos)
+            digito = dv.dv(digitos)
+            if digito is None:
+                # Resto sem DV possível: o corpo não gera inscrição válida
+                break
+            inscr_est[posicao] = digito
+        else:
+            yield "".join(inscr_est)
+
+
+def gerar(uf, n, seed=None, produtor_rural=False):
+    """Gera ``n`` inscrições estaduais válidas e distintas da UF, sem máscara.
+
+    As inscrições são produzidas sob demanda (gerador). Quando a UF aceita
+    mais de um tamanho (BA, PE, RN, RO) os formatos são alternados.
+
+    Args:
+        uf (str): Sigla da UF, em minúsculas.
+        n (int): Quantidade de inscrições.
+        seed: Semente para resultados reprodutíveis.
+        produtor_rural (bool): Gera inscrições de produtor rural de SP
+            (``P`` seguido de 12 dígitos).
+
+    Yields:
+        str: Inscrição estadual válida para ``uf``.
+
+    Raises:
+        ValueError: Se ``uf`` não tem regra ou se não há ``n`` inscrições
+            válidas distintas no formato da UF.
+    """
+    formatos = _formatos(uf, produtor_rural)
+    espaco = sum(len(f[0]) * 10 ** _livres(f) for f in formatos)
+    if n > espaco:
+        raise ValueError(
+            "Não é possível gerar {} inscrições distintas (máximo {})".format(n, espaco)
+        )
+
+    rnd = random.Random(seed)
+    geradores = [_percorrer_formato(f, rnd.random()) for f in formatos]
+    prefixo = "P" if produtor_rural else ""
+    while n and geradores:
+        for gerador in list(geradores):
+            inscr_est = next(gerador, None)
+            if inscr_est is None:
+                geradores.remove(gerador)
+                continue
+            yield prefixo + inscr_est
+            n -= 1
+            if not n:
+                return
+
+    # Parte dos corpos sorteados não admite DV: o espaço acabou antes de n
+    if n:
+        raise ValueError("Não há inscrições válidas suficientes: faltaram {}".format(n))
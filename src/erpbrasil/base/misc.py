@@ -4,8 +4,13 @@
 # Copyright (C) 2015  Base4 Sistemas Ltda ME
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
+import random
 import re
 import string
+import threading
+from collections import OrderedDict
+from math import sqrt
+from operator import getitem
 
 
 def only_digits(string_value):
@@ -53,3 +58,179 @@ def modulo11(base):
     acumulado = sum([int(a) * int(b) for a, b in zip(base[::-1], pesos)])
     digito = 11 - (acumulado % 11)
     return 0 if digito >= 10 else digito
+
+
+class SomaPonderada(object):
+    """Dígito verificador por soma ponderada de uma string de dígitos.
+
+    A contribuição de cada dígito em cada posição é pré-calculada, então o
+    cálculo não converte nem copia os dígitos. Os pesos valem a partir da
+    primeira posição e as posições além deles são ignoradas: a string
+    completa, DVs incluídos, pode ser passada sem fatiamento (peso ``0``
+    ignora uma posição).
+
+    :param pesos: Peso de cada posição.
+    :param int modulo: Divisor aplicado à soma.
+    :param restos: DV correspondente a cada resto, ou ``None`` quando o resto
+        não admite DV. O padrão é o módulo 11 usual (``11 - r``, ou ``0``
+        para restos 0 e 1).
+    :param bool luhn: Soma os algarismos de cada produto em vez do produto.
+    :param int constante: Valor somado antes de aplicar o módulo.
+    """
+
+    __slots__ = ("_tabelas", "_restos", "modulo", "constante")
+
+    def __init__(self, pesos, modulo=11, restos=None, luhn=False, constante=0):
+        tabelas = []
+        for peso in pesos:
+            produtos = [d * peso for d in range(10)]
+            if luhn:
+                produtos = [sum(divmod(p, 10)) for p in produtos]
+            tabelas.append(dict(zip("0123456789", produtos)))
+        if restos is None:
+            restos = [11 - r if r > 1 else 0 for r in range(modulo)]
+
+        self._tabelas = tuple(tabelas)
+        self._restos = tuple(None if dv is None else str(dv) for dv in restos)
+        self.modulo = modulo
+        self.constante = constante
+
+    def soma(self, digitos):
+        """Soma ponderada de ``digitos`` (string só com dígitos ASCII)."""
+        return sum(map(getitem, self._tabelas, digitos), self.constante)
+
+    def dv(self, digitos):
+        """Retorna o DV (``str``) de ``digitos`` ou ``None``."""
+        return self._restos[self.soma(digitos) % self.modulo]
+
+    def confere(self, digitos, posicao):
+        """Confere se o caractere em ``posicao`` é o DV calculado."""
+        return digitos[posicao] == self._restos[self.soma(digitos) % self.modulo]
+
+
+class LRUCache(object):
+    """Cache limitado com descarte LRU, seguro para uso entre threads.
+
+    Os valores são calculados fora do lock: duas threads podem calcular a
+    mesma chave ao mesmo tempo, mas nunca bloqueiam umas às outras durante o
+    cálculo.
+
+    :param int maxsize: Número máximo de entradas mantidas.
+    """
+
+    def __init__(self, maxsize=4096):
+        if maxsize < 1:
+            raise ValueError("maxsize deve ser positivo: {!r}".format(maxsize))
+        self.maxsize = maxsize
+        self._dados = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, compute):
+        """Retorna o valor de ``key``, calculando-o com ``compute(key)``
+        quando não estiver no cache."""
+        with self._lock:
+            try:
+                value = self._dados[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self._dados.move_to_end(key)
+                self.hits += 1
+                return value
+
+        value = compute(key)
+
+        with self._lock:
+            self._dados[key] = value
+            if len(self._dados) > self.maxsize:
+                self._dados.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def stats(self):
+        """Retorna ``hits``, ``misses``, ``evictions``, ``currsize`` e
+        ``maxsize`` em um ``dict``."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "currsize": len(self._dados),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        """Esvazia o cache e zera as estatísticas."""
+        with self._lock:
+            self._dados.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self):
+        return len(self._dados)
+
+
+# Constante multiplicativa (razão áurea em 64 bits) das rodadas de permutacao
+_FEISTEL_MULTIPLICADOR = 0x9E3779B97F4A7C15
+_FEISTEL_RODADAS = 4
+_MASCARA_64 = (1 << 64) - 1
+
+
+def permutacao(n, tamanho, seed=None):
+    """Percorre ``n`` valores distintos de ``range(tamanho)`` em ordem
+    pseudo-aleatória, sem guardar os valores já gerados.
+
+    O índice ``i`` passa por uma rede de Feistel de 4 rodadas sobre o menor
+    domínio ``lado * lado`` que contém ``range(tamanho)``, com as metades
+    somadas módulo ``lado``; resultados fora do intervalo são cifrados de
+    novo até caírem nele (*cycle walking*). A rede é uma bijeção, o que garante unicidade com memória constante, e
+    valores consecutivos não guardam relação aritmética entre si. Não é uma
+    permutação criptograficamente segura.
+
+    :param int n: Quantidade de valores.
+    :param int tamanho: Tamanho do intervalo ``range(tamanho)``.
+    :param seed: Semente do gerador pseudo-aleatório.
+    :return: Gerador de inteiros distintos.
+    :raises ValueError: Se ``n`` for maior que ``tamanho``.
+    """
+    if n > tamanho:
+        raise ValueError(
+            "Não é possível gerar {} valores distintos (máximo {})".format(n, tamanho)
+        )
+    rnd = random.Random(seed)
+    chaves = [rnd.getrandbits(64) for _ in range(_FEISTEL_RODADAS)]
+    # Domínio quadrado: valor = esquerda * lado + direita, com lado ** 2 >= tamanho
+    lado = int(sqrt(tamanho))
+    while lado * lado < tamanho:
+        lado += 1
+
+    def cifrar(valor):
+        esquerda, direita = divmod(valor, lado)
+        for chave in chaves:
+            mistura = (direita ^ chave) * _FEISTEL_MULTIPLICADOR & _MASCARA_64
+            esquerda, direita = direita, (esquerda + (mistura >> 16)) % lado
+        return esquerda * lado + direita
+
+    for i in range(n):
+        valor = cifrar(i)
+        while valor >= tamanho:
+            valor = cifrar(valor)
+        yield valor
+
+
+def importar_numpy():
+    """Importa o NumPy sob demanda.
+
+    As funções de validação em lote chamam esta função em vez de importar o
+    NumPy no topo do módulo, para que ``import erpbrasil.base`` não carregue
+    o NumPy.
+
+    :return: O módulo ``numpy`` ou ``None`` se ele não estiver instalado.
+    """
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+    return numpy
@@ -0,0 +1,114 @@
+# Copyright (C) 2026  Luis Felipe Mileo - KMEE
+# License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
+
+from unittest import TestCase
+
+from erpbrasil.base.fiscal import cadastro
+from erpbrasil.base.fiscal import codigo_municipio
+from erpbrasil.base.fiscal import ie
+
+
+class TestValidarRegistro(TestCase):
+    def test_registro_valido(self):
+        resultado = cadastro.validar_registro(
+            cnpj_cpf="11.222.333/0001-81",
+            inscr_est="110.042.490.114",
+            uf="SP",
+            municipio="3550308",
+        )
+        self.assertTrue(resultado.valido)
+        self.assertEqual(resultado.erros, {})
+        self.assertEqual(resultado.cnpj_cpf.valor, "11222333000181")
+        self.assertEqual(resultado.inscr_est.valor, "110042490114")
+        self.assertEqual(resultado.uf.valor, "sp")
+        self.assertEqual(resultado.municipio.valor, "3550308")
+
+    def test_campos_invalidos(self):
+        resultado = cadastro.validar_registro(
+            cnpj_cpf="11222333000180",
+            inscr_est="110042490115",
+            uf="sp",
+            municipio=2700102,
+        )
+        self.assertFalse(resultado.valido)
+        self.assertEqual(set(resultado.erros), {"cnpj_cpf", "inscr_est", "municipio"})
+        self.assertTrue(resultado.uf.valido)
+
+    def test_municipio_fora_da_uf(self):
+        resultado = cadastro.validar_registro(uf="AL", municipio="3550308")
+        self.assertFalse(resultado.municipio.valido)
+        self.assertTrue(cadastro.validar_registro(uf="AL", municipio="2700102").valido)
+
+    def test_isento(self):
+        resultado = cadastro.validar_registro(
+            cnpj_cpf="529.982.247-25", inscr_est=" isento ", uf="MG"
+        )
+        self.assertTrue(resultado.valido)
+        self.assertEqual(resultado.inscr_est.valor, cadastro.ISENTO)
+
+    def test_exterior(self):
+        self.assertTrue(
+            cadastro.validar_registro(
+                inscr_est="ISENTO", uf="EX", municipio="9999999"
+            ).valido
+        )
+        self.assertFalse(cadastro.validar_registro(uf="SP", municipio="9999999").valido)
+        self.assertFalse(cadastro.validar_registro(inscr_est="123", uf="EX").valido)
+
+    def test_valores_nao_textuais(self):
+        resultado = cadastro.validar_registro(
+            cnpj_cpf=11222333000181, inscr_est=110042490114, uf="sp", municipio=3550308
+        )
+        self.assertTrue(resultado.valido)
+        self.assertEqual(resultado.cnpj_cpf.valor, "11222333000181")
+        self.assertEqual(resultado.inscr_est.valor, "110042490114")
+        # Zeros à esquerda perdidos na conversão para inteiro
+        self.assertFalse(cadastro.validar_registro(cnpj_cpf=2960895000131).valido)
+
+    def test_inscr_est_validada_como_informada(self):
+        """A IE é validada por ie.validar, sem o preenchimento de desformata"""
+        resultado = cadastro.validar_registro(inscr_est="03.128.476-0", uf="AP")
+        self.assertTrue(resultado.valido)
+        self.assertEqual(resultado.inscr_est.valor, "031284760")
+        # desformata completaria o zero à esquerda que ie.validar exige
+        self.assertEqual(ie.desformata("ap", "31284760"), "031284760")
+        registro = {"inscr_est": "31284760", "uf": "AP"}
+        self.assertFalse(cadastro.validar_registro(**registro).inscr_est.valido)
+        self.assertFalse(cadastro.validar_registros([registro])[0].inscr_est.valido)
+
+    def test_codigos_uf(self):
+        self.assertEqual(
+            sorted(cadastro.CODIGOS_UF.values()),
+            sorted(codigo_municipio.CODIGOS_DE_ESTADO),
+        )
+        self.assertEqual(cadastro.CODIGOS_UF["sp"], "35")
+        self.assertEqual(cadastro.CODIGOS_UF["df"], "53")
+
+    def test_campos_nao_informados(self):
+        resultado = cadastro.validar_registro(cnpj_cpf="", municipio=None)
+        self.assertTrue(resultado.valido)
+        self.assertIsNone(resultado.cnpj_cpf.valido)
+        self.assertIsNone(resultado.municipio.valido)
+
+    def test_inscr_est_sem_uf(self):
+        resultado = cadastro.validar_registro(inscr_est="110042490114")
+        self.assertFalse(resultado.inscr_est.valido)
+        resultado = cadastro.validar_registro(inscr_est="110042490114", uf="XX")
+        self.assertFalse(resultado.uf.valido)
+        self.assertFalse(resultado.inscr_est.valido)
+
+    def test_validar_registros(self):
+        registros = [
+            {"cnpj_cpf": "11222333000181", "inscr_est": i, "uf": uf}
+            for uf in ("sp", "mg", "ba", "xx")
+            for i in ie.gerar("sp", 3, seed=1)
+        ]
+        registros.append({})
+        resultados = cadastro.validar_registros(iter(registros))
+        self.assertEqual(
+            resultados,
+            [cadastro.validar_registro(**registro) for registro in registros],
+        )
+        self.assertEqual(
+            [r.valido for r in resultados], [True] * 3 + [False] * 9 + [True]
+        )
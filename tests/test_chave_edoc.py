@@ -1,11 +1,50 @@
 # Copyright (C) 2020  Luis Felipe Mileo - KMEE
 # License AGPL-3 - See http://www.gnu.org/licenses/agpl-3.0.html
 
+import mmap
+import tempfile
 from unittest import TestCase
+from unittest import mock
+from unittest import skipIf
 
+from erpbrasil.base.fiscal import edoc
+from erpbrasil.base.fiscal.edoc import AnaliseNumeracao
 from erpbrasil.base.fiscal.edoc import ChaveCFeSAT
 from erpbrasil.base.fiscal.edoc import ChaveEdoc
 from erpbrasil.base.fiscal.edoc import detectar_chave_edoc
+from erpbrasil.base.fiscal.edoc import gerar_chaves
+from erpbrasil.base.fiscal.edoc import mensagem_chave
+from erpbrasil.base.fiscal.edoc import parse_chaves
+from erpbrasil.base.fiscal.edoc import validar_chaves
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+CHAVES_VALIDAS = [
+    "50131248740351011795580001490001531345952745",
+    "43140201098983010680657960000005991148127446",
+    "35210320695448000184550010000035891981839923",
+    "32171232438772000104570010001990751153183825",
+    "35150808723218000186599000040190000241114257",
+    "35150808723218000186599000040190000557255950",
+    "42221200050690671849559100000000811540256167",
+    "32171232438772000104670010001990751234429533",
+]
+
+CHAVES_INVALIDAS = [
+    # número do CNPJ emitente inválido
+    "35150808723218000187599000040190000241114259",
+    # NF-E
+    "35210320695448000184550010000035891981839924",
+    # Modelo invalido - 54
+    "35210320695448000184540010000035891981839924",
+    # UF Inválida
+    "99150808723218000186599000040190000241114257",
+    # Chave com série de CNPJ mas com CPF emitente
+    "42221200050690671849558890000000811540256167",
+]
 
 
 class Tests(TestCase):
@@ -468,3 +507,327 @@ class Tests(TestCase):
         for chave in chaves_validas:
             edoc = detectar_chave_edoc(chave=chave)
             self.assertTrue(edoc, "Erro chave edoc")
+
+    def test_mensagens_validar(self):
+        mensagens = {
+            "99150808723218000186599000040190000241114257": (
+                "Chave de acesso invalida (codigo UF: '99'): {!r}"
+            ),
+            "35210320695448000184540010000035891981839924": (
+                "Chave de acesso invalida (Modelos não permitidos: '54'): {!r}"
+            ),
+            "42221200050690671849559700000000811540256160": (
+                "Chave de acesso invalida (Série: '970'): {!r}"
+            ),
+            "35150808723218000187599000040190000241114259": (
+                "Chave de acesso invalida ('CNPJ' emitente: '08.723.218/0001-87'): "
+                "{!r}"
+            ),
+            "35210320695448000184550010000035891981839924": (
+                "Digito verificador invalido: chave={!r}, digito calculado=3"
+            ),
+        }
+        for chave, mensagem in mensagens.items():
+            with self.assertRaises(ValueError) as contexto:
+                ChaveEdoc(chave=chave, validar=True)
+            self.assertEqual(str(contexto.exception), mensagem.format(chave))
+
+        # Séries 920-969: emitente CPF
+        ChaveEdoc(chave="42221200050690671849559200000000811540256162", validar=True)
+        with self.assertRaises(ValueError) as contexto:
+            ChaveEdoc(
+                chave="42221200050690671849559200000000811540256160", validar=True
+            )
+        self.assertIn("digito calculado=2", str(contexto.exception))
+
+
+@skipIf(np is None, "NumPy não instalado")
+class TestParseChaves(TestCase):
+    def _conferir(self, linha, chave, classe):
+        objeto = classe(chave=chave)
+        self.assertEqual(linha["codigo_uf"], objeto.codigo_uf)
+        self.assertEqual(linha["ano_mes"].decode(), objeto.ano_mes)
+        self.assertEqual(
+            linha["cnpj_cpf_emitente"].decode(), objeto.campos[classe.CNPJ_CPF]
+        )
+        self.assertEqual(linha["modelo_documento"], int(objeto.modelo_documento))
+        self.assertEqual(linha["numero_serie"], int(objeto.numero_serie))
+        self.assertEqual(linha["numero_documento"], int(objeto.numero_documento))
+        self.assertEqual(linha["codigo_aleatorio"], int(objeto.codigo_aleatorio))
+        self.assertEqual(linha["digito_verificador"], int(objeto.digito_verificador))
+
+    def test_colunas(self):
+        chaves = CHAVES_VALIDAS + CHAVES_INVALIDAS
+        for classe in (ChaveEdoc, ChaveCFeSAT):
+            resultado = parse_chaves(chaves, classe)
+            self.assertEqual(len(resultado), len(chaves))
+            for linha, chave in zip(resultado, chaves):
+                self._conferir(linha, chave, classe)
+            self.assertEqual(
+                resultado["valida"].tolist(),
+                [True] * len(CHAVES_VALIDAS) + [False] * len(CHAVES_INVALIDAS),
+            )
+
+    def test_ano_mes_texto(self):
+        """AAMM mantém o zero à esquerda, como nos demais campos da chave"""
+        chave = _chave_nfe(1, ano_mes="0912")
+        resultado = parse_chaves([chave, "123"])
+        self.assertEqual(resultado["ano_mes"].tolist(), [b"0912", b""])
+        self.assertTrue(resultado["valida"][0])
+
+    def test_blocos(self):
+        """Chaves em mais de um bloco são lidas como em um só"""
+        chaves = (CHAVES_VALIDAS + CHAVES_INVALIDAS) * 3
+        esperado = parse_chaves(chaves).tolist()
+        codigos = validar_chaves(chaves).tolist()
+        with mock.patch.object(edoc, "_BLOCO_CHAVES", 5):
+            self.assertEqual(parse_chaves(chaves).tolist(), esperado)
+            self.assertEqual(validar_chaves(chaves).tolist(), codigos)
+
+    def test_layout_cfe_sat(self):
+        edoc = parse_chaves(CHAVES_VALIDAS[4:5])
+        sat = parse_chaves(CHAVES_VALIDAS[4:5], ChaveCFeSAT)
+        self.assertIn("forma_emissao", edoc.dtype.names)
+        self.assertNotIn("forma_emissao", sat.dtype.names)
+        self.assertEqual(edoc["numero_serie"][0], 900)
+        self.assertEqual(sat["numero_serie"][0], 900004019)
+        self.assertEqual(sat["numero_documento"][0], 24)
+
+    def test_entradas(self):
+        esperado = parse_chaves(CHAVES_VALIDAS)
+        for entrada in (
+            iter(CHAVES_VALIDAS),
+            np.array(CHAVES_VALIDAS),
+            np.array(CHAVES_VALIDAS, dtype="S44"),
+            "".join(CHAVES_VALIDAS).encode(),
+            "\n".join(CHAVES_VALIDAS).encode(),
+            ("\r\n".join(CHAVES_VALIDAS) + "\r\n").encode(),
+        ):
+            self.assertEqual(parse_chaves(entrada).tolist(), esperado.tolist())
+        with self.assertRaises(ValueError):
+            parse_chaves(("\n".join(CHAVES_VALIDAS) + "\n123").encode())
+
+    def test_chaves_mal_formadas(self):
+        resultado = parse_chaves(["123", "NFe" + CHAVES_VALIDAS[0], "x" * 44])
+        self.assertFalse(resultado["valida"].any())
+        self.assertFalse(resultado["numero_documento"].any())
+        self.assertEqual(len(parse_chaves([])), 0)
+
+
+class TestValidarChaves(TestCase):
+    chaves = CHAVES_VALIDAS + CHAVES_INVALIDAS + ["123", "NFe" + CHAVES_VALIDAS[0]]
+    codigos = [edoc.CHAVE_VALIDA] * len(CHAVES_VALIDAS) + [
+        edoc.CHAVE_EMITENTE_INVALIDO,
+        edoc.CHAVE_DV_INVALIDO,
+        edoc.CHAVE_MODELO_INVALIDO,
+        edoc.CHAVE_UF_INVALIDA,
+        edoc.CHAVE_EMITENTE_INVALIDO,
+        edoc.CHAVE_TAMANHO_INVALIDO,
+        edoc.CHAVE_TAMANHO_INVALIDO,
+    ]
+
+    def test_codigos(self):
+        self.assertEqual(list(validar_chaves(iter(self.chaves))), self.codigos)
+        self.assertEqual(list(validar_chaves([])), [])
+
+    def test_sem_numpy(self):
+        with mock.patch.object(edoc, "importar_numpy", return_value=None):
+            self.assertEqual(validar_chaves(self.chaves), self.codigos)
+            buffer = "\n".join(CHAVES_VALIDAS).encode()
+            self.assertEqual(validar_chaves(buffer), [0] * len(CHAVES_VALIDAS))
+
+    @skipIf(np is None, "NumPy não instalado")
+    def test_entradas(self):
+        codigos = validar_chaves(self.chaves)
+        self.assertEqual(codigos.dtype, np.uint8)
+        self.assertEqual(validar_chaves(np.array(self.chaves)).tolist(), self.codigos)
+        buffer = "".join(CHAVES_VALIDAS + CHAVES_INVALIDAS).encode()
+        self.assertEqual(validar_chaves(buffer).tolist(), self.codigos[:-2])
+
+    def test_buffers(self):
+        """Com e sem NumPy os buffers são lidos com as mesmas regras"""
+        chaves = CHAVES_VALIDAS + CHAVES_INVALIDAS
+        esperado = self.codigos[:-2]
+        buffers = [
+            "".join(chaves),
+            "\n".join(chaves) + "\n",
+            "\r\n".join(chaves) + "\r\n  ",
+        ]
+        invalidos = [
+            " ".join(chaves),
+            "\n".join(chaves[:2]) + "\r\n" + chaves[2],
+            "\n".join(chaves[:2] + ["123"]),
+            "\n" + "\n".join(chaves),
+        ]
+        caminhos = [mock.patch.object(edoc, "importar_numpy", return_value=None)]
+        if np is not None:
+            caminhos.append(mock.patch.object(edoc, "importar_numpy", return_value=np))
+        for caminho in caminhos:
+            with caminho:
+                for buffer in buffers:
+                    codigos = validar_chaves(buffer.encode())
+                    self.assertEqual(list(codigos), esperado, repr(buffer))
+                self.assertEqual(list(validar_chaves(b" \n")), [])
+                with tempfile.TemporaryFile() as arquivo:
+                    arquivo.write(buffers[2].encode())
+                    arquivo.flush()
+                    with mmap.mmap(arquivo.fileno(), 0) as mapa:
+                        self.assertEqual(list(validar_chaves(mapa)), esperado)
+                for buffer in invalidos:
+                    with self.assertRaises(ValueError, msg=repr(buffer)):
+                        validar_chaves(buffer.encode())
+
+    def test_mensagens(self):
+        for chave, codigo in zip(self.chaves, validar_chaves(self.chaves)):
+            try:
+                ChaveEdoc(chave=chave, validar=True)
+            except ValueError as erro:
+                esperado = str(erro)
+            else:
+                esperado = None
+            self.assertEqual(mensagem_chave(chave, codigo), esperado)
+            self.assertEqual(mensagem_chave(chave), esperado)
+
+    def test_mensagens_quebra_de_linha(self):
+        """Chaves lidas de arquivos: a mensagem é a de ChaveEdoc.validar"""
+        for chave in CHAVES_VALIDAS[:1] + CHAVES_INVALIDAS:
+            for final in ("\n", "\r\n"):
+                linha = chave + final
+                try:
+                    ChaveEdoc(chave=linha, validar=True)
+                except ValueError as erro:
+                    esperado = str(erro)
+                else:
+                    esperado = None
+                self.assertEqual(mensagem_chave(linha), esperado, repr(linha))
+                codigo = validar_chaves([linha])[0]
+                self.assertEqual(mensagem_chave(linha, codigo), esperado)
+
+
+def _chave_nfe(numero, ano_mes="2103", serie=1, cnpj="20695448000184"):
+    return ChaveEdoc(
+        codigo_uf=35,
+        ano_mes=ano_mes,
+        cnpj_cpf_emitente=cnpj,
+        modelo_documento=55,
+        numero_serie=serie,
+        numero_documento=numero,
+    ).chave
+
+
+class TestAnaliseNumeracao(TestCase):
+    def test_lacunas_e_duplicados(self):
+        numeros = [7, 1, 2, 3, 10, 5, 2, 11, 12, 3, 2, 4]
+        analise = AnaliseNumeracao(validar=True)
+        analise.adicionar_chaves(_chave_nfe(n) for n in numeros)
+        (resultado,) = analise.resultados()
+        self.assertEqual(
+            resultado[:3], ("20695448000184", "55", "001"), "Série da numeração"
+        )
+        self.assertEqual(resultado.quantidade, len(numeros))
+        self.assertEqual((resultado.primeiro, resultado.ultimo), (1, 12))
+        self.assertEqual(resultado.lacunas, [(6, 6), (8, 9)])
+        self.assertEqual(resultado.duplicados, {2: 3, 3: 2})
+        self.assertEqual(resultado.fora_de_ordem, [])
+
+    def test_series_separadas(self):
+        analise = AnaliseNumeracao()
+        for serie in (2, 1):
+            for numero in (1, 3):
+                analise.adicionar(ChaveEdoc(chave=_chave_nfe(numero, serie=serie)))
+        analise.adicionar(_chave_nfe(1, cnpj="08723218000186"))
+        resultados = analise.resultados()
+        self.assertEqual(
+            [r[:3] for r in resultados],
+            [
+                ("08723218000186", "55", "001"),
+                ("20695448000184", "55", "001"),
+                ("20695448000184", "55", "002"),
+            ],
+        )
+        self.assertEqual([r.lacunas for r in resultados], [[], [(2, 2)], [(2, 2)]])
+
+    def test_fora_de_ordem(self):
+        analise = AnaliseNumeracao()
+        for numero, ano_mes in [
+            (1, "2101"),
+            (2, "2101"),
+            (5, "2103"),
+            (3, "2104"),
+            (4, "2102"),
+            (6, "2103"),
+        ]:
+            analise.adicionar(_chave_nfe(numero, ano_mes))
+        (resultado,) = analise.resultados()
+        self.assertEqual(resultado.lacunas, [])
+        self.assertEqual(resultado.fora_de_ordem, [(4, "2102")])
+
+    def test_fora_de_ordem_independe_da_chegada(self):
+        meses = {1: "2101", 2: "2103", 3: "2102", 5: "2101", 6: "2104", 7: "2102"}
+        esperado = [(3, "2102"), (5, "2101"), (7, "2102")]
+        for numeros in ([1, 2, 3, 5, 6, 7], [7, 6, 5, 3, 2, 1], [3, 7, 1, 6, 2, 5]):
+            analise = AnaliseNumeracao()
+            for numero in numeros:
+                analise.adicionar(_chave_nfe(numero, meses[numero]))
+            (resultado,) = analise.resultados()
+            self.assertEqual(resultado.fora_de_ordem, esperado, numeros)
+
+    def test_chaves_invalidas(self):
+        analise = AnaliseNumeracao(validar=True)
+        analise.adicionar_chaves(["123", CHAVES_INVALIDAS[1], _chave_nfe(1)])
+        self.assertEqual(analise.invalidas, 2)
+        self.assertEqual(len(analise.resultados()), 1)
+        self.assertEqual(AnaliseNumeracao().resultados(), [])
+
+
+class TestGerarChaves(TestCase):
+    def _conferir(self, emitente, modelo, serie, numero_inicial, quantidade, **kw):
+        chaves = gerar_chaves(emitente, modelo, serie, numero_inicial, quantidade, **kw)
+        esperado = [
+            ChaveEdoc(
+                cnpj_cpf_emitente=emitente,
+                modelo_documento=modelo,
+                numero_serie=serie,
+                numero_documento=numero,
+                **kw,
+            ).chave
+            for numero in range(numero_inicial, numero_inicial + quantidade)
+        ]
+        self.assertEqual(list(chaves), esperado)
+        self.assertEqual(list(validar_chaves(esperado)), [0] * quantidade)
+
+    def test_igual_chave_edoc(self):
+        self._conferir(
+            "20.695.448/0001-84", "55", "001", 3580, 20, codigo_uf=35, ano_mes="2103"
+        )
+        # Passagem de milhares e de milhões no número do documento
+        self._conferir(
+            "01098983010680", 65, "796", 998990, 1020, codigo_uf=43, ano_mes="1402"
+        )
+        self._conferir(
+            "529.982.247-25",
+            55,
+            "920",
+            999999990,
+            10,
+            codigo_uf=42,
+            ano_mes="2212",
+            forma_emissao=9,
+        )
+
+    def test_primeira_chave(self):
+        chave = next(
+            gerar_chaves("48740351011795", 58, "000", 149000153, 1, 50, "1312")
+        )
+        self.assertEqual(chave, "50131248740351011795580001490001531345952745")
+
+    def test_parametros_invalidos(self):
+        with self.assertRaises(ValueError):
+            list(gerar_chaves("20695448000184", 55, 1, 0, 1, 35, "2103"))
+        with self.assertRaises(ValueError):
+            list(gerar_chaves("20695448000184", 55, 1, 999999999, 2, 35, "2103"))
+        with self.assertRaises(ValueError):
+            list(gerar_chaves("20695448000184", 55, 1000, 1, 1, 35, "2103"))
+        self.assertEqual(
+            list(gerar_chaves("20695448000184", 55, 1, 1, 0, 35, "2103")), []
+        )
@@ -382,3 +382,32 @@ class ValidateIETest(TestCase):
                     ie.formata(uf, i) in ies_formatadas[uf],
                     "Erro ao formatar inscrição estadual para a UF: %s" % uf,
                 )
+
+    def test_ie_formata_lote(self):
+        """formata_lote preserva a ordem e concorda com formata"""
+        pares = [(uf, i) for uf in ies_sem_formatacao for i in ies_sem_formatacao[uf]]
+        self.assertEqual(
+            ie.formata_lote(iter(pares)), [ie.formata(uf, i) for uf, i in pares]
+        )
+
+    def test_ie_formata_layouts(self):
+        """Máscaras escolhidas pelo tamanho ou pelo prefixo P"""
+        self.assertEqual(ie.formata("pe", "032141840"), "0321418-40")
+        self.assertEqual(ie.formata("pe", "18100100000049"), "18.1.001.0000004-9")
+        self.assertEqual(ie.formata("rn", "2000400400"), "200.040.040-0")
+        self.assertEqual(ie.formata("sp", "P-01100424.3/002"), "P-01100424.3/002")
+        self.assertEqual(ie.formata("sp", "P011004243002"), "P-01100424.3/002")
+        self.assertEqual(ie.formata("ba", "41902653"), "041.902.653")
+        self.assertEqual(ie.formata("xx", "1.2-3"), "123")
+
+    def test_ie_desformata(self):
+        """desformata é o inverso de formata"""
+        for uf in ies_formatadas:
+            # A máscara de PR descarta o último dígito
+            if uf == "pr":
+                continue
+            for i in ies_formatadas[uf]:
+                self.assertEqual(ie.formata(uf, ie.desformata(uf, i)), i)
+        self.assertEqual(ie.desformata("sp", "P-01100424.3/002"), "P011004243002")
+        self.assertEqual(ie.desformata("ba", "41.902.653"), "041902653")
+        self.assertEqual(ie.desformata("ap", "03.038.034-0"), "030380340")
@@ -4,10 +4,18 @@
 # Copyright (C) 2023  Gabriel Krauss - KMEE
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
+import threading
 from unittest import TestCase
+from unittest import mock
+from unittest import skipIf
 
 from erpbrasil.base.fiscal import ie
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 # Create a dictionary with a list of invalid inscr_est for each state
 ie_invalidas = {
     "ac": [
@@ -417,3 +425,223 @@ class ValidarIETest(TestCase):
                     ie.validar(uf, i),
                     "Erro a validar inscrição estadual para a UF: %s" % uf,
                 )
+
+    def test_registro_validadores(self):
+        """Todas as 27 UFs possuem validador registrado"""
+        self.assertEqual(len(ie._VALIDADORES), 27)
+        self.assertEqual(set(ie._VALIDADORES), set(ie_validas))
+
+    def test_uf_desconhecida(self):
+        """UFs sem regra de validação são consideradas válidas"""
+        self.assertTrue(ie.validar("xx", "123"))
+        self.assertTrue(ie.validar_param("sp", "123"))
+
+    def _pares_lote(self):
+        pares = []
+        for uf in sorted(ie_validas):
+            for i in ie_validas[uf] + ie_invalidas.get(uf, []):
+                pares.append((uf, i))
+                pares.append((uf, i[:-1]))
+        pares.append(("xx", "123"))
+        return pares
+
+    def test_validar_lote(self):
+        """validar_lote preserva a ordem e concorda com validar"""
+        pares = self._pares_lote()
+        esperado = [ie.validar(uf, i) for uf, i in pares]
+        self.assertEqual([bool(v) for v in ie.validar_lote(pares)], esperado)
+        self.assertEqual(len(ie.validar_lote([])), 0)
+
+    def test_validar_lote_sem_numpy(self):
+        """Sem NumPy, validar_lote usa os validadores escalares"""
+        pares = self._pares_lote()
+        esperado = [ie.validar(uf, i) for uf, i in pares]
+        with mock.patch.object(ie, "importar_numpy", return_value=None):
+            self.assertEqual(ie.validar_lote(iter(pares)), esperado)
+
+    def test_validar_lote_vazia(self):
+        """Uma IE vazia no lote de SP é inválida e não interrompe o lote"""
+        self.assertFalse(ie.validar("sp", ""))
+        pares = [("sp", "110.042.490.114"), ("sp", ""), ("sp", "P-01100424.3/002")]
+        esperado = [True, False, True]
+        self.assertEqual([bool(v) for v in ie.validar_lote(pares)], esperado)
+        with mock.patch.object(ie, "importar_numpy", return_value=None):
+            self.assertEqual(ie.validar_lote(pares), esperado)
+
+    def test_detectar_uf(self):
+        """detectar_uf retorna todas as UFs em que a IE é válida"""
+        todas = sorted(ie._VALIDADORES)
+        for uf in ie_validas:
+            for i in ie_validas[uf] + ie_invalidas.get(uf, []):
+                esperado = [u for u in todas if ie.validar(u, i)]
+                self.assertEqual(ie.detectar_uf(i), esperado)
+                if i in ie_validas[uf]:
+                    self.assertIn(uf, esperado)
+
+    def test_detectar_uf_prefixo(self):
+        """Apenas UFs com prefixo compatível são candidatas"""
+        self.assertEqual(ie.detectar_uf("P-01100424.3/002"), ["sp"])
+        candidatas = ie._candidatas_uf("030123459")
+        self.assertIn("ap", candidatas)
+        self.assertNotIn("al", candidatas)
+        self.assertNotIn("go", candidatas)
+
+    def test_detectar_uf_lote(self):
+        """A versão em lote concorda com detectar_uf"""
+        inscricoes = [i for uf in sorted(ie_validas) for i in ie_validas[uf]]
+        self.assertEqual(
+            ie.detectar_uf_lote(iter(inscricoes)),
+            [ie.detectar_uf(i) for i in inscricoes],
+        )
+
+    def test_gerar(self):
+        """gerar produz inscrições válidas e distintas para todas as UFs"""
+        for uf in ie._VALIDADORES:
+            inscricoes = list(ie.gerar(uf, 500, seed=uf))
+            self.assertEqual(len(set(inscricoes)), 500, uf)
+            for i in inscricoes:
+                self.assertTrue(ie.validar(uf, i), "{}: {}".format(uf, i))
+
+    def test_gerar_formatos(self):
+        """UFs com mais de um tamanho alternam os formatos"""
+        tamanhos = {len(i) for i in ie.gerar("pe", 10, seed=1)}
+        self.assertEqual(tamanhos, {9, 14})
+        self.assertTrue(all(i.startswith("20") for i in ie.gerar("rn", 10)))
+        self.assertEqual(
+            list(ie.gerar("go", 5, seed=3)), list(ie.gerar("go", 5, seed=3))
+        )
+
+    def test_gerar_produtor_rural(self):
+        """Inscrições de produtor rural de SP"""
+        for i in ie.gerar("sp", 200, seed=1, produtor_rural=True):
+            self.assertTrue(i.startswith("P0"))
+            self.assertTrue(ie.validar("sp", i))
+        with self.assertRaises(ValueError):
+            next(ie.gerar("mg", 1, produtor_rural=True))
+
+    def test_gerar_limites(self):
+        """UF desconhecida ou quantidade maior que o espaço de inscrições"""
+        with self.assertRaises(ValueError):
+            next(ie.gerar("xx", 1))
+        with self.assertRaises(ValueError):
+            next(ie.gerar("ap", 10**6 + 1))
+
+    def test_gerar_sem_dv_possivel(self):
+        """Corpos sem DV possível não fazem gerar devolver menos que n"""
+        # Produtor rural de SP com um único dígito livre: o corpo terminado
+        # em 1 tem resto 10, que não admite DV
+        formato = (("0000000",), 9, [(8, ie._DV_SP_PR)])
+        with mock.patch.object(ie, "_formatos", return_value=[formato]):
+            self.assertEqual(len(list(ie.gerar("sp", 9, seed=1))), 9)
+            gerados = []
+            with self.assertRaises(ValueError):
+                for inscr_est in ie.gerar("sp", 10, seed=1):
+                    gerados.append(inscr_est)
+        self.assertEqual(len(gerados), 9)
+        self.assertNotIn("000000010", gerados)
+
+    def _colunas_param(self):
+        for uf in ie.PARAMETERS:
+            inscricoes = ie_validas.get(uf, []) + ie_invalidas.get(uf, [])
+            inscricoes += [i[1:] for i in inscricoes] + ["", "abc"]
+            yield uf, inscricoes
+
+    def test_validar_param_lote(self):
+        """validar_param_lote concorda com validar_param"""
+        for uf, inscricoes in self._colunas_param():
+            esperado = [ie.validar_param(uf, i) for i in inscricoes]
+            obtido = ie.validar_param_lote(uf, iter(inscricoes))
+            self.assertEqual([bool(v) for v in obtido], esperado, uf)
+        self.assertTrue(all(ie.validar_param_lote("xx", ["123"])))
+
+    @skipIf(np is None, "NumPy não instalado")
+    def test_validar_param_lote_array(self):
+        """Arrays de largura fixa são reinterpretados como matriz"""
+        for uf, inscricoes in self._colunas_param():
+            tam = ie.PARAMETERS[uf]["tam"]
+            inscricoes = [i for i in inscricoes if len(i) <= tam]
+            esperado = [ie.validar_param(uf, i) for i in inscricoes]
+            for dtype in ("U", "S"):
+                coluna = np.array(inscricoes, dtype="{}{}".format(dtype, tam))
+                obtido = ie.validar_param_lote(uf, coluna)
+                self.assertEqual(obtido.tolist(), esperado, (uf, dtype))
+
+    def test_validar_param_lote_sem_numpy(self):
+        """Sem NumPy, validar_param_lote usa validar_param"""
+        with mock.patch.object(ie, "importar_numpy", return_value=None):
+            for uf, inscricoes in self._colunas_param():
+                self.assertEqual(
+                    ie.validar_param_lote(uf, inscricoes),
+                    [ie.validar_param(uf, i) for i in inscricoes],
+                )
+
+
+class CacheIETest(TestCase):
+    def tearDown(self):
+        ie.desativar_cache()
+
+    def test_cache_validar_formata(self):
+        """validar e formata são guardados em entradas separadas"""
+        cache = ie.CachedValidator(maxsize=10)
+        self.assertTrue(cache.validar("sp", "110.042.490.114"))
+        self.assertTrue(cache.validar("sp", "110.042.490.114"))
+        self.assertEqual(cache.formata("sp", "110.042.490.114"), "110.042.490.114")
+        self.assertFalse(cache("sp", "110042490115"))
+        self.assertTrue(cache.validar("mg", "0623079040081"))
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 4))
+        self.assertEqual(stats["por_uf"]["sp"], {"hits": 1, "misses": 3})
+        self.assertEqual(stats["por_uf"]["mg"], {"hits": 0, "misses": 1})
+        cache.clear()
+        self.assertEqual(cache.stats()["por_uf"], {})
+
+    def test_cache_calcula_so_o_pedido(self):
+        cache = ie.CachedValidator(maxsize=10)
+        with mock.patch.object(ie, "_formata", wraps=ie._formata) as formata:
+            cache.validar("sp", "110042490114")
+            self.assertFalse(formata.called)
+            cache.formata("sp", "110042490114")
+            cache.formata("sp", "110042490114")
+            self.assertEqual(formata.call_count, 1)
+
+    def test_cache_evicao(self):
+        cache = ie.CachedValidator(maxsize=1)
+        cache.validar("sp", "110042490114")
+        cache.validar("sp", "110.042.490.114")
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_cache_global(self):
+        """Com o cache global ativo, validar e formata usam o cache"""
+        cache = ie.ativar_cache(maxsize=100)
+        for uf in ie_validas:
+            for i in ie_validas[uf]:
+                self.assertTrue(ie.validar(uf, i))
+                self.assertTrue(ie.validar(uf, i))
+                ie.formata(uf, i)
+        for uf in ie_invalidas:
+            for i in ie_invalidas[uf]:
+                self.assertFalse(ie.validar(uf, i))
+        self.assertGreater(cache.stats()["hits"], 0)
+        ie.desativar_cache()
+        hits = cache.stats()["hits"]
+        self.assertTrue(ie.validar("sp", "110042490114"))
+        self.assertEqual(cache.stats()["hits"], hits)
+
+    def test_cache_threads(self):
+        cache = ie.CachedValidator(maxsize=8)
+        inscricoes = list(ie.gerar("mg", 32, seed=1))
+        erros = []
+
+        def trabalhar():
+            for i in inscricoes * 20:
+                if not cache.validar("mg", i):
+                    erros.append(i)
+
+        threads = [threading.Thread(target=trabalhar) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(erros, [])
+        por_uf = cache.stats()["por_uf"]["mg"]
+        self.assertEqual(por_uf["hits"] + por_uf["misses"], 4 * 32 * 20)
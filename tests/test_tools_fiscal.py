@@ -4,10 +4,17 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
 from unittest import TestCase
+from unittest import mock
+from unittest import skipIf
 
 from erpbrasil.base.fiscal import cnpj_cpf
 from erpbrasil.base.fiscal import pis
 
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
 
 class Tests(TestCase):
     def test_01_validar_pis_pasep(self):
@@ -83,6 +90,7 @@ class TestCNPJAlfa(TestCase):
     def _calcular_dv(self, cnpj12):
         """Helper para calcular DV via módulo."""
         from erpbrasil.base.fiscal.cnpj_cpf import _calcular_dv_cnpj
+
         return _calcular_dv_cnpj(cnpj12)
 
     def test_calcula_dv_numerico_igual_ao_algoritmo_antigo(self):
@@ -159,13 +167,406 @@ class TestCNPJAlfa(TestCase):
     def test_char_value_digitos(self):
         """Dígitos numéricos mantêm os mesmos valores (ord('0')-48=0)."""
         from erpbrasil.base.fiscal.cnpj_cpf import _char_value
+
         self.assertEqual(_char_value("0"), 0)
         self.assertEqual(_char_value("9"), 9)
 
     def test_char_value_letras(self):
         """Letras mapeiam conforme ASCII-48: A=17, B=18, Z=42."""
         from erpbrasil.base.fiscal.cnpj_cpf import _char_value
+
         self.assertEqual(_char_value("A"), 17)
         self.assertEqual(_char_value("B"), 18)
         self.assertEqual(_char_value("Z"), 42)
 
+    def test_calcula_dv_letra_proibida(self):
+        """O cálculo do DV rejeita letras proibidas e caracteres inválidos."""
+        for cnpj12 in ("12IBC34D0001", "12ABC34D000a", "12.ABC34D000"):
+            with self.assertRaises(ValueError):
+                self._calcular_dv(cnpj12)
+
+    def test_tabela_dv_igual_char_value(self):
+        """As tabelas de DV equivalem a ``_char_value(c) * peso``."""
+        from erpbrasil.base.fiscal.cnpj_cpf import _PESOS_DV
+        from erpbrasil.base.fiscal.cnpj_cpf import _TABELA_DV1
+        from erpbrasil.base.fiscal.cnpj_cpf import _TABELA_DV2
+        from erpbrasil.base.fiscal.cnpj_cpf import _char_value
+
+        for i in range(12):
+            self.assertEqual(_TABELA_DV1[i]["Z"], _char_value("Z") * _PESOS_DV[i + 1])
+            self.assertEqual(_TABELA_DV2[i]["7"], 7 * _PESOS_DV[i])
+            self.assertNotIn("F", _TABELA_DV1[i])
+
+
+class TestClassificar(TestCase):
+    """Testes para a normalização/classificação única de CNPJ/CPF."""
+
+    def test_classifica_cnpj_numerico(self):
+        documento = cnpj_cpf.classificar(" 02.960.895/0001-31 ")
+        self.assertEqual(documento.tipo, cnpj_cpf.CNPJ)
+        self.assertEqual(documento.valor, "02960895000131")
+
+    def test_classifica_cnpj_alfa(self):
+        documento = cnpj_cpf.classificar("12.abc.34d/0001-66")
+        self.assertEqual(documento.tipo, cnpj_cpf.CNPJ_ALFA)
+        self.assertEqual(documento.valor, "12ABC34D000166")
+
+    def test_classifica_cpf(self):
+        for cpf in ("017.013.558-68", "01701355868", "CPF: 017.013.558/68"):
+            documento = cnpj_cpf.classificar(cpf)
+            self.assertEqual(documento.tipo, cnpj_cpf.CPF)
+            self.assertEqual(documento.valor, "01701355868")
+
+    def test_classifica_invalido(self):
+        for valor in ("123", "12 345 678 901", "029608950001311"):
+            self.assertIsNone(cnpj_cpf.classificar(valor).tipo)
+
+    def test_cpf_com_espacos(self):
+        """validar_cpf continua considerando apenas os dígitos."""
+        self.assertTrue(cnpj_cpf.validar_cpf("017 013 558 68"))
+        self.assertFalse(cnpj_cpf.validar("017 013 558 68"))
+
+
+class TestEntradaBytes(TestCase):
+    """Testes para validação a partir de bytes/bytearray/memoryview."""
+
+    def test_validar_bytes(self):
+        for valor in (
+            b"02.960.895/0001-31",
+            bytearray(b"02960895000131"),
+            memoryview(b"xx02960895000131")[2:],
+            b"12ABC34D000166",
+        ):
+            self.assertTrue(cnpj_cpf.validar(valor))
+            self.assertTrue(cnpj_cpf.validar_cnpj(valor))
+        self.assertTrue(cnpj_cpf.validar(b"017.013.558-68"))
+        self.assertTrue(cnpj_cpf.validar_cpf(bytearray(b"01701355868")))
+
+    def test_validar_bytes_invalidos(self):
+        for valor in (b"14018406000193", b"00000000000000", b"12IBC34D000144"):
+            self.assertFalse(cnpj_cpf.validar_cnpj(valor))
+        self.assertFalse(cnpj_cpf.validar_cpf(b"11111111111"))
+        self.assertFalse(cnpj_cpf.validar_cpf(b"203.519.810-05"))
+
+    def test_formata_bytes(self):
+        self.assertEqual(cnpj_cpf.formata(b"02960895000131"), "02.960.895/0001-31")
+        self.assertEqual(
+            cnpj_cpf.formata(memoryview(b"12abc34d000166")), "12.ABC.34D/0001-66"
+        )
+        self.assertEqual(cnpj_cpf.formata(bytearray(b"01701355868")), "017.013.558-68")
+        self.assertEqual(cnpj_cpf.formata_cnpj(b"02960895000131"), "02.960.895/0001-31")
+        self.assertEqual(cnpj_cpf.formata_cpf(b"017.013.558-68"), "017.013.558-68")
+
+    def test_tipos_nao_suportados(self):
+        for valor in (12345678000195, 10**8, 1, 2.5, ["02960895000131"]):
+            with self.assertRaises(TypeError):
+                cnpj_cpf.validar(valor)
+            with self.assertRaises(TypeError):
+                cnpj_cpf.validar_cnpj(valor)
+            with self.assertRaises(TypeError):
+                cnpj_cpf.validar_cpf(valor)
+            with self.assertRaises(TypeError):
+                cnpj_cpf.formata(valor)
+
+    def test_validar_campo(self):
+        buffer = b"HDR0296089500013100001701355868FIM"
+        self.assertTrue(cnpj_cpf.validar_campo(buffer, 3, 14))
+        self.assertTrue(cnpj_cpf.validar_campo(buffer, 20, 11))
+        self.assertTrue(cnpj_cpf.validar_campo(buffer, 17, 14, tipo=cnpj_cpf.CPF))
+        self.assertFalse(cnpj_cpf.validar_campo(buffer, 4, 14))
+        self.assertFalse(cnpj_cpf.validar_campo(buffer, 30, 14))
+        self.assertFalse(cnpj_cpf.validar_campo(buffer, 3, 13))
+
+
+class TestSugerirCorrecoes(TestCase):
+    """Testes para as sugestões de correção de CNPJ/CPF."""
+
+    def test_transposicao_dv(self):
+        self.assertIn(
+            "02960895000131", cnpj_cpf.sugerir_correcoes("02.960.895/0001-13")
+        )
+
+    def test_substituicao(self):
+        sugestoes = cnpj_cpf.sugerir_correcoes("02960995000131")
+        self.assertIn("02960895000131", sugestoes)
+        self.assertTrue(all(map(cnpj_cpf.validar_cnpj, sugestoes)))
+
+    def test_cnpj_alfa(self):
+        sugestoes = cnpj_cpf.sugerir_correcoes("12ABC34E000166")
+        self.assertIn("12ABC34D000166", sugestoes)
+        self.assertTrue(all(map(cnpj_cpf.validar_cnpj, sugestoes)))
+        self.assertIn("12ABC34D000166", cnpj_cpf.sugerir_correcoes("12IBC34D000166"))
+
+    def test_entradas(self):
+        self.assertEqual(
+            cnpj_cpf.sugerir_correcoes(b"02960995000131"),
+            cnpj_cpf.sugerir_correcoes("02960995000131"),
+        )
+        with self.assertRaises(TypeError):
+            cnpj_cpf.sugerir_correcoes(12345678000195)
+
+    def test_cpf(self):
+        self.assertEqual(cnpj_cpf.sugerir_correcoes("017.013.558-69"), ["01701355868"])
+        sugestoes = cnpj_cpf.sugerir_correcoes("01701355886")
+        self.assertIn("01701355868", sugestoes)
+
+    def test_entrada_nao_reconhecida(self):
+        self.assertEqual(cnpj_cpf.sugerir_correcoes("123"), [])
+        self.assertEqual(cnpj_cpf.sugerir_correcoes(""), [])
+
+
+class TestCachedValidator(TestCase):
+    """Testes para o cache de validação de CNPJ/CPF."""
+
+    def tearDown(self):
+        cnpj_cpf.desativar_cache()
+
+    def test_cache_chave_normalizada(self):
+        """Formas diferentes do mesmo documento compartilham a entrada."""
+        validador = cnpj_cpf.CachedValidator(maxsize=10)
+        self.assertTrue(validador.validar("02.960.895/0001-31"))
+        self.assertTrue(validador("02960895000131"))
+        self.assertFalse(validador.validar("14.018.406/0001-93"))
+        self.assertIsNone(validador.validar(""))
+        stats = validador.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 2)
+
+    def test_cache_evicao(self):
+        validador = cnpj_cpf.CachedValidator(maxsize=1)
+        validador.validar("02960895000131")
+        validador.validar("01701355868")
+        self.assertEqual(validador.stats()["evictions"], 1)
+
+    def test_cache_global(self):
+        """Com o cache global ativo, validar() usa o cache."""
+        validador = cnpj_cpf.ativar_cache(maxsize=10)
+        self.assertTrue(cnpj_cpf.validar("02.960.895/0001-31"))
+        self.assertTrue(cnpj_cpf.validar_cnpj("02960895000131"))
+        self.assertTrue(cnpj_cpf.validar_cpf("017.013.558-68"))
+        self.assertEqual(validador.stats()["hits"], 1)
+        cnpj_cpf.desativar_cache()
+        self.assertTrue(cnpj_cpf.validar("02.960.895/0001-31"))
+        self.assertEqual(validador.stats()["hits"], 1)
+
+
+class TestDocumento(TestCase):
+    """Testes para o tipo compacto Documento e o DocumentoSet."""
+
+    def test_round_trip(self):
+        for valor, tipo in (
+            ("02.960.895/0001-31", cnpj_cpf.CNPJ),
+            ("12.ABC.34D/0001-66", cnpj_cpf.CNPJ_ALFA),
+            ("017.013.558-68", cnpj_cpf.CPF),
+        ):
+            documento = cnpj_cpf.Documento(valor)
+            self.assertEqual(documento.formata(), valor)
+            self.assertEqual(str(documento), cnpj_cpf.classificar(valor).valor)
+            self.assertEqual(documento.tipo, tipo)
+            self.assertEqual(cnpj_cpf.Documento.de_codigo(int(documento)), documento)
+            self.assertLess(int(documento), 1 << 64)
+
+    def test_igualdade_hash_ordem(self):
+        a = cnpj_cpf.Documento("02960895000131")
+        b = cnpj_cpf.Documento("02.960.895/0001-31")
+        c = cnpj_cpf.Documento("12ABC34D000166")
+        d = cnpj_cpf.Documento("01701355868")
+        self.assertEqual(a, b)
+        self.assertEqual(len({a, b, c, d}), 3)
+        self.assertEqual(sorted([d, c, a]), [a, c, d])
+
+    def test_documento_invalido(self):
+        for valor in ("14.018.406/0001-93", "", "123"):
+            with self.assertRaises(ValueError):
+                cnpj_cpf.Documento(valor)
+
+    def test_documento_set(self):
+        conjunto = cnpj_cpf.DocumentoSet(
+            ["02960895000131", "01701355868", "12ABC34D000166", "02960895000131"]
+        )
+        self.assertEqual(len(conjunto), 3)
+        self.assertIn("02.960.895/0001-31", conjunto)
+        self.assertIn(cnpj_cpf.Documento("017.013.558-68"), conjunto)
+        self.assertNotIn("55394836000", conjunto)
+        self.assertNotIn("invalido", conjunto)
+        self.assertEqual(list(conjunto), sorted(conjunto))
+        self.assertEqual(conjunto.codigos.typecode, "Q")
+
+
+class TestIndiceRaiz(TestCase):
+    """Testes para o índice de CNPJs por raiz."""
+
+    def setUp(self):
+        raizes = ("02960895", "12ABC34D")
+        ordens = ("0001", "0002", "0010", "00A1")
+        self.cnpjs = []
+        for raiz in raizes:
+            for ordem in ordens:
+                cnpj12 = raiz + ordem
+                self.cnpjs.append(cnpj12 + cnpj_cpf._calcular_dv_cnpj(cnpj12))
+        self.indice = cnpj_cpf.IndiceRaiz(reversed(self.cnpjs))
+
+    def test_estabelecimentos(self):
+        self.assertEqual(len(self.indice), 8)
+        self.assertEqual(self.indice.estabelecimentos("02.960.895"), self.cnpjs[:4])
+        self.assertEqual(self.indice.estabelecimentos("99999999"), [])
+        self.assertEqual(set(self.indice.raizes()), {"02960895", "12ABC34D"})
+
+    def test_matriz_e_filiais(self):
+        self.assertEqual(self.indice.matriz("12ABC34D000166"), "12ABC34D000166")
+        self.assertEqual(self.indice.filiais("12abc34d"), self.cnpjs[5:])
+        self.assertIsNone(self.indice.matriz("99999999"))
+
+    def test_intervalo(self):
+        self.assertEqual(self.indice.intervalo("02960895", 2, "0010"), self.cnpjs[1:3])
+        self.assertEqual(
+            self.indice.intervalo("02960895", "0011", "00ZZ"), self.cnpjs[3:4]
+        )
+
+    def test_adicionar_e_pertinencia(self):
+        self.assertFalse(self.indice.adicionar("02.960.895/0001-31"))
+        self.assertIn("02.960.895/0001-31", self.indice)
+        self.assertNotIn("14.018.406/0001-93", self.indice)
+        with self.assertRaises(ValueError):
+            self.indice.adicionar("14.018.406/0001-93")
+        self.assertEqual(sorted(self.indice), sorted(self.cnpjs))
+
+    def test_adicionar_apos_consulta(self):
+        """Inclusões avulsas ficam pendentes até a próxima consulta."""
+        indice = cnpj_cpf.IndiceRaiz()
+        for cnpj in reversed(self.cnpjs[:4]):
+            self.assertTrue(indice.adicionar(cnpj))
+            self.assertFalse(indice.adicionar(cnpj))
+        self.assertEqual(indice.estabelecimentos("02960895"), self.cnpjs[:4])
+        self.assertFalse(indice.adicionar(self.cnpjs[0]))
+        novo = "029608950003" + cnpj_cpf._calcular_dv_cnpj("029608950003")
+        self.assertTrue(indice.adicionar(novo))
+        self.assertIn(novo, indice)
+        self.assertEqual(
+            indice.intervalo("02960895", 1, 10), self.cnpjs[:2] + [novo, self.cnpjs[2]]
+        )
+        self.assertEqual(len(indice), 5)
+
+    def test_adicionar_bytes(self):
+        """CNPJs bytes-like são guardados e remontados como str."""
+        indice = cnpj_cpf.IndiceRaiz()
+        self.assertTrue(indice.adicionar(self.cnpjs[0].encode("ascii")))
+        self.assertFalse(indice.adicionar(bytearray(self.cnpjs[0], "ascii")))
+        self.assertTrue(indice.adicionar(memoryview(self.cnpjs[5].encode("ascii"))))
+        self.assertIn(self.cnpjs[0], indice)
+        self.assertIn(self.cnpjs[5].encode("ascii"), indice)
+        self.assertEqual(sorted(indice), [self.cnpjs[0], self.cnpjs[5]])
+        self.assertEqual(set(indice.raizes()), {"02960895", "12ABC34D"})
+
+    def test_limite_pendentes(self):
+        """Pendentes são ordenadas ao atingir o limite, mesmo sem consulta."""
+        indice = cnpj_cpf.IndiceRaiz()
+        with mock.patch.object(cnpj_cpf, "_LIMITE_PENDENTES", 3):
+            for cnpj in self.cnpjs[:3]:
+                indice.adicionar(cnpj)
+            self.assertEqual(indice._pendentes, {})
+            indice.adicionar(self.cnpjs[3])
+            self.assertEqual(len(indice._pendentes), 1)
+        self.assertEqual(indice.estabelecimentos("02960895"), self.cnpjs[:4])
+        self.assertEqual(len(indice), 4)
+
+
+class TestFiliais(TestCase):
+    """Testes para a enumeração de filiais de uma raiz."""
+
+    def test_filiais_numerico(self):
+        cnpjs = list(cnpj_cpf.filiais("02.960.895"))
+        self.assertEqual(len(cnpjs), 9999)
+        self.assertEqual(cnpjs[0], "02960895000131")
+        for numero in (1, 2, 10, 9999):
+            cnpj12 = "02960895{:04d}".format(numero)
+            self.assertEqual(
+                cnpjs[numero - 1], cnpj12 + cnpj_cpf._calcular_dv_cnpj(cnpj12)
+            )
+
+    def test_filiais_alfa_formatado(self):
+        self.assertEqual(
+            list(cnpj_cpf.filiais("12ABC34D", 1, 2, formatado=True)),
+            ["12.ABC.34D/0001-66", "12.ABC.34D/0002-47"],
+        )
+
+    def test_filiais_invalido(self):
+        for raiz, inicio, fim in (
+            ("12IBC34D", 1, 1),
+            ("1234567", 1, 1),
+            ("12345678", 5, 1),
+            ("12345678", 1, 10000),
+        ):
+            with self.assertRaises(ValueError):
+                next(cnpj_cpf.filiais(raiz, inicio, fim))
+
+
+class TestGerarDocumentos(TestCase):
+    """Testes para os geradores de CNPJ/CPF."""
+
+    def test_gerar_cnpj(self):
+        cnpjs = list(cnpj_cpf.gerar_cnpj(500, seed=1))
+        self.assertEqual(len(set(cnpjs)), 500)
+        self.assertTrue(all(c.isdigit() for c in cnpjs))
+        self.assertTrue(all(map(cnpj_cpf.validar_cnpj, cnpjs)))
+        self.assertEqual(cnpjs, list(cnpj_cpf.gerar_cnpj(500, seed=1)))
+
+    def test_gerar_cnpj_alfanumerico(self):
+        cnpjs = list(cnpj_cpf.gerar_cnpj(500, alfanumerico=True, seed=1))
+        self.assertEqual(len(set(cnpjs)), 500)
+        self.assertTrue(all(map(cnpj_cpf.validar_cnpj, cnpjs)))
+        self.assertTrue(any(not c.isdigit() for c in cnpjs))
+
+    def test_gerar_cpf(self):
+        cpfs = list(cnpj_cpf.gerar_cpf(500, seed=2))
+        self.assertEqual(len(set(cpfs)), 500)
+        self.assertTrue(all(map(cnpj_cpf.validar_cpf, cpfs)))
+
+    def test_gerador_preguicoso(self):
+        gerador = cnpj_cpf.gerar_cnpj(10**11)
+        self.assertTrue(cnpj_cpf.validar_cnpj(next(gerador)))
+        with self.assertRaises(ValueError):
+            next(cnpj_cpf.gerar_cnpj(10**12))
+
+
+@skipIf(np is None, "NumPy não instalado")
+class TestCNPJLote(TestCase):
+    """Testes para a validação vetorizada de CNPJ."""
+
+    CNPJS = [
+        "02960895000131",
+        "02.960.895/0001-31",
+        "14.018.406/0001-93",
+        "12ABC34D000166",
+        "12abc34d000166",
+        "12.ABC.34D/0001-66",
+        "12IBC34D000144",
+        "00000000000000",
+        "12ABC34D0001",
+        "",
+        None,
+    ]
+
+    def test_lista_igual_validar_cnpj(self):
+        """O resultado em lote deve coincidir com validar_cnpj item a item."""
+        esperado = [cnpj_cpf.validar_cnpj(c) for c in self.CNPJS]
+        self.assertEqual(cnpj_cpf.validar_cnpj_lote(self.CNPJS).tolist(), esperado)
+
+    def test_array_u14_e_s14(self):
+        """Arrays U14 e S14 devem produzir a mesma máscara."""
+        arr = np.array(["02960895000131", "12ABC34D000166", "12ABC34D000165"])
+        esperado = [True, True, False]
+        self.assertEqual(cnpj_cpf.validar_cnpj_lote(arr).tolist(), esperado)
+        self.assertEqual(
+            cnpj_cpf.validar_cnpj_lote(arr.astype("S14")).tolist(), esperado
+        )
+
+    def test_array_preserva_formato(self):
+        """A máscara deve ter o mesmo formato do array de entrada."""
+        arr = np.array([["02960895000131"], ["14018406000193"]])
+        resultado = cnpj_cpf.validar_cnpj_lote(arr)
+        self.assertEqual(resultado.shape, (2, 1))
+        self.assertEqual(resultado.ravel().tolist(), [True, False])
+
+    def test_lista_vazia(self):
+        self.assertEqual(len(cnpj_cpf.validar_cnpj_lote([])), 0)
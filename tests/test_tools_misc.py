@@ -3,10 +3,16 @@
 #   Magno Costa <magno.costa@akretion.com.br>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
+import subprocess
+import sys
 from unittest import TestCase
 
+from erpbrasil.base.misc import LRUCache
+from erpbrasil.base.misc import SomaPonderada
 from erpbrasil.base.misc import calc_price_ratio
+from erpbrasil.base.misc import importar_numpy
 from erpbrasil.base.misc import only_digits
+from erpbrasil.base.misc import permutacao
 from erpbrasil.base.misc import punctuation_rm
 
 
@@ -38,3 +44,67 @@ class Tests(TestCase):
         self.assertEqual(
             calc_price_ratio(10, 100, 0), 0, "The function calc_price_ratio failed."
         )
+
+    def test_lru_cache(self):
+        cache = LRUCache(maxsize=2)
+        self.assertEqual(cache.get("a", str.upper), "A")
+        self.assertEqual(cache.get("b", str.upper), "B")
+        self.assertEqual(cache.get("a", str.upper), "A")
+        self.assertEqual(cache.get("c", str.upper), "C")  # descarta "b"
+        self.assertEqual(
+            cache.stats(),
+            {"hits": 1, "misses": 3, "evictions": 1, "currsize": 2, "maxsize": 2},
+        )
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.stats()["misses"], 0)
+
+    def test_lru_cache_maxsize_invalido(self):
+        with self.assertRaises(ValueError):
+            LRUCache(maxsize=0)
+
+    def test_soma_ponderada(self):
+        dv = SomaPonderada([9, 8, 7, 6, 5, 4, 3, 2])
+        # Posições além dos pesos são ignoradas
+        self.assertEqual(dv.soma("123456789"), dv.soma("12345678"))
+        self.assertEqual(dv.soma("12345678"), 156)
+        self.assertEqual(dv.dv("12345678"), "9")
+        self.assertTrue(dv.confere("123456789", 8))
+        self.assertFalse(dv.confere("123456780", 8))
+
+    def test_soma_ponderada_restos(self):
+        dv = SomaPonderada([1, 2], modulo=9, restos=range(9), constante=4)
+        self.assertEqual(dv.soma("35"), 17)
+        self.assertEqual(dv.dv("35"), "8")
+        sem_dv = SomaPonderada([1], restos=[None] * 11)
+        self.assertIsNone(sem_dv.dv("5"))
+        self.assertFalse(sem_dv.confere("55", 1))
+
+    def test_soma_ponderada_luhn(self):
+        dv = SomaPonderada([2, 1, 2], modulo=10, luhn=True)
+        # 9 * 2 = 18 -> 1 + 8
+        self.assertEqual(dv.soma("990"), 18)
+
+    def test_permutacao(self):
+        valores = list(permutacao(100, 100, seed=1))
+        self.assertEqual(sorted(valores), list(range(100)))
+        self.assertEqual(list(permutacao(100, 100, seed=1)), valores)
+        self.assertEqual(len(set(permutacao(10, 10**12, seed=2))), 10)
+        # Valores consecutivos não formam uma progressão aritmética
+        diferencas = {(b - a) % 100 for a, b in zip(valores, valores[1:])}
+        self.assertGreater(len(diferencas), 10)
+        for tamanho in (1, 2, 7, 10**4 + 1):
+            self.assertEqual(
+                sorted(permutacao(tamanho, tamanho, seed=3)), list(range(tamanho))
+            )
+        with self.assertRaises(ValueError):
+            next(permutacao(11, 10))
+
+    def test_importar_numpy_sob_demanda(self):
+        """Importar o pacote não deve carregar o NumPy."""
+        codigo = "import sys, erpbrasil.base; print('numpy' in sys.modules)"
+        saida = subprocess.check_output([sys.executable, "-c", codigo], text=True)
+        self.assertEqual(saida.strip(), "False")
+        numpy = importar_numpy()
+        if numpy is not None:
+            self.assertIn("numpy", sys.modules)